@@ -0,0 +1,75 @@
+"""
+Migration script to add departed column to pegawai table.
+Marks the rows comparisons copied in for employees missing from a period's
+upload, so a transfer's arrival row (also 'Pindah') stays on the roster
+used by delta uploads and upserts.
+"""
+import sys
+import os
+from sqlalchemy import create_engine, text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def add_departed_flag():
+    """Add departed column to pegawai table and mark the departed rows already stored."""
+    try:
+        # Get database configuration from environment variables
+        POSTGRES_USER = os.getenv("POSTGRES_USER", "user")
+        POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
+        POSTGRES_DB = os.getenv("POSTGRES_DB", "pegawai_db")
+        POSTGRES_HOST = os.getenv("POSTGRES_HOST", "db")
+        POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
+
+        DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+
+        engine = create_engine(DATABASE_URL)
+
+        with engine.connect() as conn:
+            # Check if column already exists
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='pegawai' AND column_name='departed'
+            """))
+
+            if result.fetchone():
+                logger.info("Column 'departed' already exists. Skipping migration.")
+                return
+
+            logger.info("Adding 'departed' column to pegawai table...")
+            conn.execute(text("""
+                ALTER TABLE pegawai
+                ADD COLUMN departed INTEGER DEFAULT 0 NOT NULL
+            """))
+            conn.commit()
+            logger.info("✓ Successfully added 'departed' column")
+
+            # Keluar/Pensiun rows, and Pindah rows of employees the unit already
+            # had within the 12 months a comparison looks back (departure sides)
+            result = conn.execute(text("""
+                UPDATE pegawai AS cur
+                SET departed = 1
+                WHERE cur.status IN ('Keluar', 'Pensiun')
+                   OR (cur.status = 'Pindah' AND EXISTS (
+                        SELECT 1 FROM pegawai AS prev
+                        WHERE prev.nip = cur.nip
+                          AND prev.unit = cur.unit
+                          AND prev.year * 12 + prev.month
+                              BETWEEN cur.year * 12 + cur.month - 12 AND cur.year * 12 + cur.month - 1
+                   ))
+            """))
+            conn.commit()
+            logger.info(f"✓ Marked {result.rowcount} departed rows")
+
+    except Exception as e:
+        logger.error(f"Error adding departed column: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logger.info("Starting migration: Add departed flag")
+    add_departed_flag()
+    logger.info("Migration completed successfully!")
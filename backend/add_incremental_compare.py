@@ -0,0 +1,66 @@
+"""
+Migration script for incremental recompares: adds the (unit, month, year,
+updated_at) index to pegawai table, through which the rows of a period edited
+since the last comparison are looked up, and the replace_version column to
+period_version table.
+"""
+import sys
+import os
+from sqlalchemy import create_engine, text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def add_incremental_compare():
+    """Add idx_unit_month_year_updated_at to pegawai and replace_version to period_version."""
+    try:
+        # Get database configuration from environment variables
+        POSTGRES_USER = os.getenv("POSTGRES_USER", "user")
+        POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
+        POSTGRES_DB = os.getenv("POSTGRES_DB", "pegawai_db")
+        POSTGRES_HOST = os.getenv("POSTGRES_HOST", "db")
+        POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
+
+        DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+
+        engine = create_engine(DATABASE_URL)
+
+        with engine.connect() as conn:
+            logger.info("Creating index 'idx_unit_month_year_updated_at' on pegawai table...")
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_unit_month_year_updated_at
+                ON pegawai (unit, month, year, updated_at)
+            """))
+            conn.commit()
+            logger.info("✓ Successfully created 'idx_unit_month_year_updated_at'")
+
+            # Check if column already exists (the table itself is created on startup)
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='period_version' AND column_name='replace_version'
+            """))
+
+            if result.fetchone():
+                logger.info("Column 'replace_version' already exists. Skipping migration.")
+                return
+
+            logger.info("Adding 'replace_version' column to period_version table...")
+            conn.execute(text("""
+                ALTER TABLE period_version
+                ADD COLUMN replace_version INTEGER DEFAULT 0 NOT NULL
+            """))
+            conn.commit()
+            logger.info("✓ Successfully added 'replace_version' column")
+
+    except Exception as e:
+        logger.error(f"Error migrating for incremental recompares: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logger.info("Starting migration: Incremental recompare")
+    add_incremental_compare()
+    logger.info("Migration completed successfully!")
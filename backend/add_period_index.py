@@ -0,0 +1,76 @@
+"""
+Migration script to turn period_version table into the index of periods
+with data: adds the row_count column and the (unit, year * 100 + month)
+index, and counts the rows of every period already in pegawai table.
+Comparisons look up their baseline (latest earlier period with data) in it.
+"""
+import sys
+import os
+from sqlalchemy import create_engine, text
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def add_period_index():
+    """Add row_count and idx_period_version_unit_period to period_version and fill it from pegawai."""
+    try:
+        # Get database configuration from environment variables
+        POSTGRES_USER = os.getenv("POSTGRES_USER", "user")
+        POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
+        POSTGRES_DB = os.getenv("POSTGRES_DB", "pegawai_db")
+        POSTGRES_HOST = os.getenv("POSTGRES_HOST", "db")
+        POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
+
+        DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+
+        engine = create_engine(DATABASE_URL)
+
+        with engine.connect() as conn:
+            # Check if column already exists (the table itself is created on startup)
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='period_version' AND column_name='row_count'
+            """))
+
+            if result.fetchone():
+                logger.info("Column 'row_count' already exists. Recounting rows only.")
+            else:
+                logger.info("Adding 'row_count' column to period_version table...")
+                conn.execute(text("""
+                    ALTER TABLE period_version
+                    ADD COLUMN row_count INTEGER DEFAULT 0 NOT NULL
+                """))
+                conn.commit()
+                logger.info("✓ Successfully added 'row_count' column")
+
+            logger.info("Creating index 'idx_period_version_unit_period'...")
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS idx_period_version_unit_period
+                ON period_version (unit, (year * 100 + month))
+            """))
+            conn.commit()
+
+            # Periods uploaded before versions were introduced have no row yet
+            result = conn.execute(text("""
+                INSERT INTO period_version (unit, month, year, version, replace_version, row_count, updated_at)
+                SELECT unit, month, year, 1, 0, COUNT(*), NOW()
+                FROM pegawai
+                GROUP BY unit, month, year
+                ON CONFLICT ON CONSTRAINT uq_period_version_unit_month_year
+                DO UPDATE SET row_count = EXCLUDED.row_count
+            """))
+            conn.commit()
+            logger.info(f"✓ Indexed {result.rowcount} periods")
+
+    except Exception as e:
+        logger.error(f"Error adding period index: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logger.info("Starting migration: Add period index")
+    add_period_index()
+    logger.info("Migration completed successfully!")
@@ -0,0 +1,87 @@
+"""
+Migration script to add fingerprint column to pegawai table.
+The fingerprint is a hash of the comparable fields; comparison only diffs
+rows field by field when their fingerprints differ.
+"""
+import sys
+import os
+from sqlalchemy import create_engine, text
+from app.services.row_fingerprint import COMPARABLE_FIELDS, row_fingerprint
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rows fingerprinted per UPDATE batch
+BATCH_SIZE = 5000
+
+
+def backfill_fingerprints(conn) -> int:
+    """Compute the fingerprint of every row that has none, BATCH_SIZE rows at a time."""
+    total = 0
+    while True:
+        rows = conn.execute(text(f"""
+            SELECT id, {', '.join(COMPARABLE_FIELDS)}
+            FROM pegawai
+            WHERE fingerprint IS NULL
+            ORDER BY id
+            LIMIT :limit
+        """), {"limit": BATCH_SIZE}).mappings().all()
+        if not rows:
+            return total
+
+        conn.execute(
+            text("UPDATE pegawai SET fingerprint = :fingerprint WHERE id = :id"),
+            [{"id": row["id"], "fingerprint": row_fingerprint(row)} for row in rows]
+        )
+        conn.commit()
+        total += len(rows)
+        logger.info(f"Fingerprinted {total} rows...")
+
+
+def add_row_fingerprint_column():
+    """Add fingerprint column to pegawai table and fill it for existing rows."""
+    try:
+        # Get database configuration from environment variables
+        POSTGRES_USER = os.getenv("POSTGRES_USER", "user")
+        POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
+        POSTGRES_DB = os.getenv("POSTGRES_DB", "pegawai_db")
+        POSTGRES_HOST = os.getenv("POSTGRES_HOST", "db")
+        POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
+
+        DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+
+        engine = create_engine(DATABASE_URL)
+
+        with engine.connect() as conn:
+            # Check if column already exists
+            result = conn.execute(text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name='pegawai' AND column_name='fingerprint'
+            """))
+
+            if result.fetchone():
+                logger.info("Column 'fingerprint' already exists. Filling missing fingerprints only.")
+            else:
+                # Add the column
+                logger.info("Adding 'fingerprint' column to pegawai table...")
+                conn.execute(text("""
+                    ALTER TABLE pegawai
+                    ADD COLUMN fingerprint VARCHAR(64)
+                """))
+                conn.commit()
+                logger.info("✓ Successfully added 'fingerprint' column")
+
+            total = backfill_fingerprints(conn)
+            logger.info(f"✓ Fingerprinted {total} existing records")
+
+    except Exception as e:
+        logger.error(f"Error adding fingerprint column: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logger.info("Starting migration: Add fingerprint column")
+    add_row_fingerprint_column()
+    logger.info("Migration completed successfully!")
@@ -3,10 +3,14 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, FileResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
+import asyncio
 import os
 from sqlalchemy.exc import OperationalError
 from app.database import init_db
-from app.routers import upload, compare, template, admin, archive, update, auth, landing
+from app.routers import upload, compare, template, admin, archive, update, auth, landing, admission
+from app.services.ingest_jobs import get_ingest_queue, shutdown_ingest_queue
+from app.services.admission import get_admission_controller
 import logging
 from pathlib import Path
 
@@ -98,6 +102,7 @@ app.include_router(template.router)
 app.include_router(admin.router)
 app.include_router(archive.router)
 app.include_router(update.router)
+app.include_router(admission.router)
 
 # Import backup router
 from app.routers import backup
@@ -116,7 +121,8 @@ app.include_router(maintenance.router)
 async def startup_event():
     """
     Initialize database on application startup.
-    Creates all tables if they don't exist.
+    Creates all tables if they don't exist, and puts upload jobs under
+    admission control.
     """
     logger.info("Initializing database...")
     try:
@@ -126,6 +132,17 @@ async def startup_event():
         logger.error(f"Failed to initialize database: {e}")
         raise
 
+    get_ingest_queue().use_admission(get_admission_controller(), asyncio.get_running_loop())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Let running upload jobs finish and stop the ingest worker pools.
+    Waits off the event loop, which jobs still need for their admission slots.
+    """
+    await run_in_threadpool(shutdown_ingest_queue)
+
 
 @app.get("/")
 async def root():
@@ -1,3 +1,6 @@
 # Models package
 from app.models.pegawai import Pegawai
 from app.models.user import User, RolePermission, LandingPageSettings
+from app.models.upload_fingerprint import UploadFingerprint
+from app.models.period_version import PeriodVersion
+from app.models.comparison_outcome import ComparisonOutcome
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class ComparisonOutcome(Base):
+    """
+    Last persisted comparison of a unit/month/year and the watermark it was
+    read after (see services.incremental_compare). Recompares of the period
+    reclassify only the employees written since the watermark and merge them
+    into the stored result, across restarts and API workers.
+    """
+    __tablename__ = "comparison_outcome"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    unit = Column(String(20), nullable=False)
+    month = Column(Integer, nullable=False)
+    year = Column(Integer, nullable=False)
+
+    # Watermark: database time, baseline compared against, replace_version of
+    # both periods and the highest pegawai id read in each
+    watermark_at = Column(DateTime, nullable=False)
+    baseline_month = Column(Integer, nullable=False)
+    baseline_year = Column(Integer, nullable=False)
+    replace_version = Column(Integer, nullable=False)
+    baseline_replace_version = Column(Integer, nullable=False)
+    current_max_id = Column(Integer, nullable=False)
+    previous_max_id = Column(Integer, nullable=False)
+
+    # ComparisonResult as JSON, without transfers
+    result = Column(Text, nullable=False)
+
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('unit', 'month', 'year', name='uq_comparison_outcome_unit_month_year'),
+    )
+
+    def __repr__(self):
+        return f"<ComparisonOutcome(unit={self.unit}, month={self.month}, year={self.year})>"
@@ -1,5 +1,4 @@
 from sqlalchemy import Column, Integer, String, Date, DateTime, Index, UniqueConstraint
-from sqlalchemy.sql import func
 from datetime import datetime
 from app.database import Base
 
@@ -26,6 +25,10 @@ class Pegawai(Base):
     nama_bank = Column(String(50), nullable=False)
     nomor_rekening = Column(String(20), nullable=False)
     
+    # SHA-256 of the comparable fields (see services.row_fingerprint), set at ingest;
+    # NULL for rows stored before it existed
+    fingerprint = Column(String(64), nullable=True)
+    
     # Status field for comparison results
     # Possible values: 'Aktif', 'Masuk', 'Keluar', 'Pindah', 'Pensiun', 'Rekening Berbeda'
     status = Column(String(30), default='Aktif', nullable=False, index=True)
@@ -33,6 +36,10 @@ class Pegawai(Base):
     # Manual override flag - if True, status was manually changed and should not be overwritten by comparison
     manual_override = Column(Integer, default=0, nullable=False)
     
+    # Departed flag - 1 for rows comparison copied in for employees missing from the
+    # period's upload (status Keluar, or Pensiun/Pindah once overridden or paired)
+    departed = Column(Integer, default=0, nullable=False)
+    
     # Unit kerja field
     # Possible values: 'Dinas', 'Cabdis Wil. 1', 'Cabdis Wil. 2', 'Cabdis Wil. 3', 
     #                  'Cabdis Wil. 4', 'Cabdis Wil. 5', 'Cabdis Wil. 6', 'PPPK'
@@ -42,9 +49,11 @@ class Pegawai(Base):
     month = Column(Integer, nullable=False, index=True)
     year = Column(Integer, nullable=False, index=True)
     
-    # Audit timestamps
-    created_at = Column(DateTime, default=func.now(), nullable=False)
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    # Audit timestamps, from the application clock like the bulk ingest paths, so
+    # every write is comparable with an incremental-compare watermark.
+    # Statuses written by comparison keep updated_at (see status_writeback)
+    created_at = Column(DateTime, default=datetime.now, nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
     
     # Table constraints and indexes
     __table_args__ = (
@@ -54,6 +63,9 @@ class Pegawai(Base):
         # Composite index for efficient month/year/unit queries
         Index('idx_month_year_unit', 'month', 'year', 'unit'),
         
+        # Rows of a period edited since a comparison watermark (incremental recompare)
+        Index('idx_unit_month_year_updated_at', 'unit', 'month', 'year', 'updated_at'),
+        
         # Individual indexes already defined in Column definitions:
         # - idx_pegawai_nip (on nip)
         # - idx_pegawai_status (on status)
@@ -66,7 +78,7 @@ class Pegawai(Base):
     def to_dict(self):
         """
         Convert model instance to dictionary.
-        Useful for API responses.
+        Useful for API responses; the internal fingerprint is left out.
         """
         return {
             'id': self.id,
@@ -80,6 +92,7 @@ class Pegawai(Base):
             'nomor_rekening': self.nomor_rekening,
             'status': self.status,
             'manual_override': self.manual_override,
+            'departed': self.departed,
             'unit': self.unit,
             'month': self.month,
             'year': self.year,
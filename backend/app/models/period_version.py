@@ -0,0 +1,38 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint, Index, text
+from app.database import Base
+
+
+class PeriodVersion(Base):
+    """
+    Data version of a unit/month/year, bumped by every write to its pegawai rows
+    (upload, status update, admin delete). Comparison results are cached per
+    version of the two periods compared. Also the index of periods with data:
+    row_count is recounted on every bump, and the baseline of a comparison is
+    the latest earlier period with rows (month_utils.find_baseline_period).
+    """
+    __tablename__ = "period_version"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    unit = Column(String(20), nullable=False)
+    month = Column(Integer, nullable=False)
+    year = Column(Integer, nullable=False)
+    version = Column(Integer, default=1, nullable=False)
+    # Bumped only by writes that can delete or replace rows (uploads, admin delete);
+    # an incremental recompare is only valid while it is unchanged
+    replace_version = Column(Integer, default=0, nullable=False)
+    # Pegawai rows in the period as of the last bump
+    row_count = Column(Integer, default=0, nullable=False)
+
+    # Application clock, fine enough that a version stamp (version, updated_at) never repeats
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('unit', 'month', 'year', name='uq_period_version_unit_month_year'),
+        
+        # MAX(year * 100 + month) of a unit's periods before a given one
+        Index('idx_period_version_unit_period', 'unit', text('(year * 100 + month)')),
+    )
+
+    def __repr__(self):
+        return f"<PeriodVersion(unit={self.unit}, month={self.month}, year={self.year}, version={self.version})>"
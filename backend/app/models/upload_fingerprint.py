@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class UploadFingerprint(Base):
+    """
+    Hashes of the last file stored for a unit/month/year.
+    Lets an identical re-upload be answered without rewriting the period.
+    """
+    __tablename__ = "upload_fingerprint"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    unit = Column(String(20), nullable=False)
+    month = Column(Integer, nullable=False)
+    year = Column(Integer, nullable=False)
+    filename = Column(String(255))
+
+    # SHA-256 of the raw file bytes
+    content_hash = Column(String(64), nullable=False)
+    # SHA-256 over the normalized required columns of every row, in file order
+    rows_hash = Column(String(64), nullable=False)
+    row_count = Column(Integer, nullable=False)
+
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('unit', 'month', 'year', name='uq_fingerprint_unit_month_year'),
+    )
+
+    def __repr__(self):
+        return f"<UploadFingerprint(unit={self.unit}, month={self.month}, year={self.year}, rows={self.row_count})>"
@@ -3,6 +3,8 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.database import get_db
 from app.models.pegawai import Pegawai
+from app.services.upload_dedup import forget_upload
+from app.services.data_version import bump_version
 import logging
 
 logger = logging.getLogger(__name__)
@@ -69,6 +71,8 @@ async def delete_data(
             Pegawai.year == year,
             Pegawai.unit == unit
         ).delete()
+        forget_upload(db, unit, month, year)
+        bump_version(db, unit, month, year, replaced=True)
         
         db.commit()
         logger.info(f"Successfully deleted {count} records")
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.services.admission import AdmissionController, AdmissionRejected, get_admission_controller
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/admission", tags=["admission"])
+
+
+def too_busy(error: AdmissionRejected) -> HTTPException:
+    """429 response for a rejected request, with its Retry-After header."""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def admission_slot(work_class: str):
+    """
+    Dependency that holds a slot of `work_class` for the whole request
+    (including a streamed response body).
+    Waits in the admission queue when the class or the memory budget is full.
+
+    Raises:
+        HTTPException 429: The wait queue is full (with a Retry-After header)
+    """
+    async def slot_holder(controller: AdmissionController = Depends(get_admission_controller)):
+        try:
+            ticket = await controller.acquire(work_class)
+        except AdmissionRejected as e:
+            raise too_busy(e)
+        try:
+            yield ticket
+        finally:
+            controller.release(ticket)
+
+    return slot_holder
+
+
+@router.get("/stats")
+async def get_admission_stats(controller: AdmissionController = Depends(get_admission_controller)):
+    """
+    Report the admission queue.
+
+    Returns:
+        Queue depth, reserved memory and, per work class, running and queued
+        requests, admitted/rejected counts and recent wait times
+    """
+    return controller.stats()
@@ -5,6 +5,11 @@ from sqlalchemy import text
 from app.database import get_db, engine
 from app.routers.auth import require_permission
 from app.models.user import User
+from app.services.admission import WORK_BACKUP
+from app.services.comparison_cache import get_comparison_cache
+from app.services.incremental_compare import forget_outcomes
+from app.services.data_version import bump_all_versions
+from app.routers.admission import admission_slot
 import subprocess
 import os
 from datetime import datetime
@@ -19,7 +24,7 @@ BACKUP_DIR = Path("backups")
 BACKUP_DIR.mkdir(exist_ok=True)
 
 
-@router.post("/create")
+@router.post("/create", dependencies=[Depends(admission_slot(WORK_BACKUP))])
 async def create_backup(
     current_user: User = Depends(require_permission("manage_backup")),
     db: Session = Depends(get_db),
@@ -234,6 +239,13 @@ async def restore_backup(
 
             conn.commit()
 
+        # A restore rewrites pegawai and may rewind period versions; bumping
+        # them all invalidates cached comparisons in every API worker
+        get_comparison_cache().clear()
+        forget_outcomes(db)
+        bump_all_versions(db)
+        db.commit()
+
         logger.info(f"Database restored successfully from: {filename}")
 
         return {
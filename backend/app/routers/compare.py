@@ -1,10 +1,29 @@
+from typing import Dict, List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.database import get_db
 from app.models.pegawai import Pegawai
-from app.services.month_utils import get_comparison_month_data
-from app.services.comparator import EmployeeComparator
+from app.services.batch_compare import (
+    compute_comparison,
+    compare_unit,
+    compare_units,
+    transfers_in_session,
+    rollup,
+    ENGINE_COLUMNAR,
+    COMPARE_ENGINES,
+    UNIT_COMPLETED
+)
+from app.services.comparator import ComparisonResult
+from app.services.status_writeback import preview_write_back
+from app.services.upload_pipeline import VALID_UNITS
+from app.services.month_utils import get_baseline_period
+from app.services.data_version import get_version_stamp
+from app.services.comparison_cache import get_comparison_cache
+from app.services.movement import movement_events
+from app.services.admission import WORK_COMPARE
+from app.routers.admission import admission_slot
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,22 +36,162 @@ class CompareRequest(BaseModel):
     month: int
     year: int
     unit: str
+    engine: str = ENGINE_COLUMNAR
 
 
-@router.post("")
+class BatchCompareRequest(BaseModel):
+    """Request model for the batch comparison endpoint."""
+    month: int
+    year: int
+    units: Optional[List[str]] = None  # Default: every unit in VALID_UNITS
+    engine: str = ENGINE_COLUMNAR
+
+
+def _validate_period(month: int, year: int) -> None:
+    """Reject an invalid month or year with HTTPException 400."""
+    if not (1 <= month <= 12):
+        raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
+    
+    if year < 2000 or year > 2100:
+        raise HTTPException(status_code=400, detail="Year must be between 2000 and 2100")
+
+
+def _validate_request(month: int, year: int, engine: str) -> None:
+    """Reject an invalid month, year or engine with HTTPException 400."""
+    _validate_period(month, year)
+    
+    if engine not in COMPARE_ENGINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid engine. Must be one of: {', '.join(COMPARE_ENGINES)}"
+        )
+
+
+def _cache_key(
+    unit: str,
+    month: int,
+    year: int,
+    engine: str,
+    persist: bool,
+    baseline: Tuple[int, int]
+) -> tuple:
+    """
+    Cache key of a comparison request. An upload of a month in between
+    changes the baseline, and so the key.
+    """
+    prev_month, prev_year = baseline
+    return (unit, month, year, engine, persist, prev_month, prev_year)
+
+
+def _cache_stamp(db: Session, unit: str, month: int, year: int, baseline: Tuple[int, int]) -> tuple:
+    """
+    Data version stamps of both periods, read from the database before
+    comparing (the comparison's own write-back does not bump them); a cached
+    response is only served while they match.
+    """
+    prev_month, prev_year = baseline
+    return (
+        get_version_stamp(db, unit, month, year),
+        get_version_stamp(db, unit, prev_month, prev_year)
+    )
+
+
+def _comparison_response(
+    comparison_result: ComparisonResult,
+    results: List[Dict],
+    unit: str,
+    month: int,
+    year: int,
+    persisted: bool,
+    baseline: Tuple[int, int]
+) -> Dict:
+    """JSON response of POST /compare, GET /compare/preview and GET /compare/periods."""
+    prev_month, prev_year = baseline
+    return {
+        "status": "success",
+        "month": month,
+        "year": year,
+        "unit": unit,
+        "baseline": {"month": prev_month, "year": prev_year},
+        "persisted": persisted,
+        "summary": {
+            "total_current": comparison_result.summary.total_current,
+            "total_previous": comparison_result.summary.total_previous,
+            "new_count": comparison_result.summary.new_count,
+            "departed_count": comparison_result.summary.departed_count,
+            "account_change_count": comparison_result.summary.account_change_count,
+            "unchanged_count": comparison_result.summary.unchanged_count,
+            "field_change_count": comparison_result.summary.field_change_count,
+            "transfer_count": len(comparison_result.transfers)
+        },
+        "results": results,
+        "new_employees": comparison_result.new_employees,
+        "departed_employees": comparison_result.departed_employees,
+        "account_changes": comparison_result.account_changes,
+        "unchanged_employees": comparison_result.unchanged_employees,
+        "field_changes": comparison_result.field_changes,
+        "transfers": comparison_result.transfers
+    }
+
+
+def _preview(
+    db: Session,
+    unit: str,
+    month: int,
+    year: int,
+    engine: str,
+    baseline: Optional[Tuple[int, int]] = None
+) -> Dict:
+    """Comparison response computed without writing (see GET /compare/preview)."""
+    baseline = baseline or get_baseline_period(db, month, year, unit)
+    cache = get_comparison_cache()
+    cache_key = _cache_key(unit, month, year, engine, persist=False, baseline=baseline)
+    cache_stamp = _cache_stamp(db, unit, month, year, baseline)
+    cached = cache.get(cache_key, cache_stamp)
+    if cached is not None:
+        return {**cached, "cached": True}
+    
+    try:
+        comparison_result = compute_comparison(db, unit, month, year, engine, baseline=baseline)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    results = preview_write_back(db, comparison_result, unit, month, year)
+    response = _comparison_response(comparison_result, results, unit, month, year, persisted=False, baseline=baseline)
+    cache.put(cache_key, cache_stamp, response)
+    return {**response, "cached": False}
+
+
+@router.post("", dependencies=[Depends(admission_slot(WORK_COMPARE))])
 async def compare_data(
     request: CompareRequest,
+    persist: bool = True,
     db: Session = Depends(get_db)
 ):
     """
-    Compare employee data between current month and previous month.
+    Compare employee data between current month and its baseline, the
+    latest earlier month with data (usually the previous month; a month
+    without upload is skipped instead of making every employee 'Masuk').
+    
+    The statuses are written back to the current month unless persist is
+    false, which returns the same comparison without writing (as
+    GET /compare/preview). The response is cached per data version of both
+    months: while neither was written to (upload, status update, admin
+    delete), the same request is answered from the cache without querying
+    or writing pegawai.
     
     Args:
-        request: CompareRequest with month and year
+        request: CompareRequest with month, year, unit and engine. With the
+            'database' engine the employee lists only carry id, nip, nama,
+            nomor_rekening and status (plus nomor_rekening_lama)
+        persist: Query parameter; false for a read-only preview
         db: Database session
         
     Returns:
-        Comparison results in JSON format with summary statistics
+        Comparison results in JSON format with summary statistics and the
+        baseline month/year compared against ("persisted" tells whether
+        statuses were written, "cached" whether the response came from the
+        cache)
         
     Raises:
         HTTPException 400: Missing data or invalid parameters
@@ -42,114 +201,25 @@ async def compare_data(
         month = request.month
         year = request.year
         unit = request.unit
+        _validate_request(month, year, request.engine)
         
-        # Validate month and year
-        if not (1 <= month <= 12):
-            raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
-        
-        if year < 2000 or year > 2100:
-            raise HTTPException(status_code=400, detail="Year must be between 2000 and 2100")
-        
-        # Query current month data
-        logger.info(f"Querying data for {unit} {month}/{year}")
-        current_data = db.query(Pegawai).filter(
-            Pegawai.month == month,
-            Pegawai.year == year,
-            Pegawai.unit == unit
-        ).all()
+        if not persist:
+            logger.info(f"Previewing comparison of {unit} {month}/{year}")
+            return _preview(db, unit, month, year, request.engine)
         
-        if not current_data:
-            raise HTTPException(
-                status_code=400,
-                detail=f"No data found for {unit} {month}/{year}. Please upload data first."
-            )
+        baseline = get_baseline_period(db, month, year, unit)
+        cache = get_comparison_cache()
+        cache_key = _cache_key(unit, month, year, request.engine, persist=True, baseline=baseline)
+        cache_stamp = _cache_stamp(db, unit, month, year, baseline)
+        cached = cache.get(cache_key, cache_stamp)
+        if cached is not None:
+            logger.info(f"Serving comparison of {unit} {month}/{year} from cache")
+            return {**cached, "cached": True}
         
-        # Get comparison month data
-        logger.info(f"Getting comparison month data")
-        comparison_data = get_comparison_month_data(db, month, year, unit)
-        
-        # Perform comparison
-        logger.info(f"Comparing {len(current_data)} current records with {len(comparison_data)} comparison records")
-        comparison_result = EmployeeComparator.compare_months(current_data, comparison_data)
-        
-        # Update database with status indicators
-        # Only update if manual_override is not set (0 or NULL)
-        logger.info("Updating database with comparison results")
-        
-        # Update new employees (Status Masuk)
-        for emp_dict in comparison_result.new_employees:
-            db.query(Pegawai).filter(
-                Pegawai.nip == emp_dict['nip'],
-                Pegawai.month == month,
-                Pegawai.year == year,
-                Pegawai.unit == unit,
-                Pegawai.manual_override == 0  # Only update if not manually overridden
-            ).update({'status': 'Masuk'})
-        
-        # Update account changes (Status Rekening Berbeda)
-        for emp_dict in comparison_result.account_changes:
-            db.query(Pegawai).filter(
-                Pegawai.nip == emp_dict['nip'],
-                Pegawai.month == month,
-                Pegawai.year == year,
-                Pegawai.unit == unit,
-                Pegawai.manual_override == 0  # Only update if not manually overridden
-            ).update({'status': 'Rekening Berbeda'})
-        
-        # Update unchanged employees (Status Aktif)
-        for emp_dict in comparison_result.unchanged_employees:
-            db.query(Pegawai).filter(
-                Pegawai.nip == emp_dict['nip'],
-                Pegawai.month == month,
-                Pegawai.year == year,
-                Pegawai.unit == unit,
-                Pegawai.manual_override == 0  # Only update if not manually overridden
-            ).update({'status': 'Aktif'})
-        
-        # Save departed employees to current month database with status "Keluar"
-        # This ensures they appear in comparison view and can be edited (e.g., change to Pensiun)
-        from app.services.month_utils import get_previous_month
-        prev_month, prev_year = get_previous_month(month, year)
-        
-        for emp_dict in comparison_result.departed_employees:
-            # Check if record already exists in current month (e.g., from manual override)
-            existing = db.query(Pegawai).filter(
-                Pegawai.nip == emp_dict['nip'],
-                Pegawai.month == month,
-                Pegawai.year == year,
-                Pegawai.unit == unit
-            ).first()
-            
-            if not existing:
-                # Get full employee data from previous month
-                prev_employee = db.query(Pegawai).filter(
-                    Pegawai.nip == emp_dict['nip'],
-                    Pegawai.month == prev_month,
-                    Pegawai.year == prev_year,
-                    Pegawai.unit == unit
-                ).first()
-                
-                if prev_employee:
-                    # Create new record in current month with status "Keluar"
-                    new_departed = Pegawai(
-                        nip=prev_employee.nip,
-                        nama=prev_employee.nama,
-                        nik=prev_employee.nik,
-                        npwp=prev_employee.npwp,
-                        tgl_lahir=prev_employee.tgl_lahir,
-                        kode_bank=prev_employee.kode_bank,
-                        nama_bank=prev_employee.nama_bank,
-                        nomor_rekening=prev_employee.nomor_rekening,
-                        unit=prev_employee.unit,
-                        month=month,
-                        year=year,
-                        status='Keluar',
-                        manual_override=0
-                    )
-                    db.add(new_departed)
-                    logger.info(f"Added departed employee {prev_employee.nip} to {month}/{year} with status Keluar")
-        
-        db.commit()
+        try:
+            comparison_result = compare_unit(db, unit, month, year, request.engine, baseline=baseline)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         logger.info("Database updated successfully")
         
         # Query current month data again to get updated status in original upload order
@@ -164,31 +234,223 @@ async def compare_data(
         # Convert to dict, preserving upload order
         all_results = [emp.to_dict() for emp in current_data_updated]
         
-        # Update departed_employees list with the new records from database
-        departed_from_db = [emp.to_dict() for emp in current_data_updated if emp.status == 'Keluar']
+        response = _comparison_response(
+            comparison_result, all_results, unit, month, year, persisted=True, baseline=baseline
+        )
+        cache.put(cache_key, cache_stamp, response)
+        return {**response, "cached": False}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during comparison: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/preview", dependencies=[Depends(admission_slot(WORK_COMPARE))])
+async def preview_comparison(
+    month: int,
+    year: int,
+    unit: str,
+    engine: str = ENGINE_COLUMNAR,
+    db: Session = Depends(get_db)
+):
+    """
+    Compare a unit with its baseline (as POST /compare) without writing to the database.
+    
+    Statuses are computed in memory (or in SQL with the 'database' engine) and
+    "results" shows the rows as POST /compare would leave them: manually
+    overridden rows keep their status and departed employees are appended as
+    'Keluar' rows with no id. Cross-unit transfers are only detected when
+    persisting, so "transfers" is empty. Cached like POST /compare.
+    
+    Args:
+        month: Current month (1-12)
+        year: Current year
+        unit: Unit kerja
+        engine: 'columnar' or 'database'
+        db: Database session (only read)
+        
+    Returns:
+        Comparison results in the format of POST /compare, with "persisted": false
+        
+    Raises:
+        HTTPException 400: Missing data or invalid parameters
+        HTTPException 500: Internal server errors
+    """
+    try:
+        _validate_request(month, year, engine)
+        return _preview(db, unit, month, year, engine)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during comparison preview: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/periods", dependencies=[Depends(admission_slot(WORK_COMPARE))])
+async def compare_periods(
+    month: int,
+    year: int,
+    baseline_month: int,
+    baseline_year: int,
+    unit: str,
+    engine: str = ENGINE_COLUMNAR,
+    db: Session = Depends(get_db)
+):
+    """
+    Compare a unit in any period with any other period, without writing.
+    
+    For audits such as January against June: the employees of month/year are
+    classified against baseline_month/baseline_year exactly as POST /compare
+    classifies them against its baseline, but no status is stored.
+    Cached like GET /compare/preview.
+    
+    Args:
+        month: Period compared (1-12)
+        year: Year of month
+        baseline_month: Period compared against (1-12), earlier or later
+        baseline_year: Year of baseline_month
+        unit: Unit kerja
+        engine: 'columnar' or 'database'
+        db: Database session (only read)
+        
+    Returns:
+        Comparison results in the format of GET /compare/preview, with the
+        baseline period
+        
+    Raises:
+        HTTPException 400: Missing data, same period twice or invalid parameters
+        HTTPException 500: Internal server errors
+    """
+    try:
+        _validate_request(month, year, engine)
+        _validate_period(baseline_month, baseline_year)
+        if (baseline_month, baseline_year) == (month, year):
+            raise HTTPException(status_code=400, detail="Baseline must be a different period")
+        
+        logger.info(f"Comparing {unit} {month}/{year} with {baseline_month}/{baseline_year}")
+        return _preview(db, unit, month, year, engine, baseline=(baseline_month, baseline_year))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during period comparison: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/range", dependencies=[Depends(admission_slot(WORK_COMPARE))])
+async def compare_range(
+    start_month: int,
+    start_year: int,
+    end_month: int,
+    end_year: int,
+    unit: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Movement report of a unit across a range of months, without writing.
+    
+    Every entry, exit and account change between consecutive months with
+    data in the range, from one query with window functions over the
+    employees' periods (see movement.movement_events). Months without data
+    are skipped.
+    
+    Args:
+        start_month: First month of the range (1-12)
+        start_year: Year of start_month
+        end_month: Last month of the range (1-12)
+        end_year: Year of end_month
+        unit: Unit kerja
+        db: Database session (only read)
+        
+    Returns:
+        The months with data, the event stream (one event per NIP and month,
+        in month then NIP order) and the counts per month
+        
+    Raises:
+        HTTPException 400: Invalid range
+        HTTPException 500: Internal server errors
+    """
+    try:
+        _validate_period(start_month, start_year)
+        _validate_period(end_month, end_year)
+        
+        try:
+            movement = movement_events(db, unit, start_month, start_year, end_month, end_year)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        return {
+            "status": "success",
+            "unit": unit,
+            "start": {"month": start_month, "year": start_year},
+            "end": {"month": end_month, "year": end_year},
+            **movement
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during range comparison: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/batch", dependencies=[Depends(admission_slot(WORK_COMPARE))])
+async def compare_batch(request: BatchCompareRequest):
+    """
+    Compare every unit (or the requested ones) of a period concurrently.
+    
+    Each unit is compared and written back exactly as POST /compare does, in a
+    worker thread with its own session, so the batch takes about as long as
+    the slowest unit. Employee lists are not returned; POST /compare for a
+    single unit returns them.
+    
+    Args:
+        request: BatchCompareRequest with month, year, units (optional) and engine
+        
+    Returns:
+        Per-unit summaries (or the reason a unit failed), a province-wide rollup
+        and the transfers between units (status Pindah) found in the period
+        
+    Raises:
+        HTTPException 400: Invalid parameters, or no unit has data for the period
+        HTTPException 500: Internal server errors
+    """
+    try:
+        month = request.month
+        year = request.year
+        _validate_request(month, year, request.engine)
+        
+        units = list(dict.fromkeys(request.units)) if request.units else VALID_UNITS
+        invalid = [unit for unit in units if unit not in VALID_UNITS]
+        if invalid:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid unit: {', '.join(invalid)}. Must be one of: {', '.join(VALID_UNITS)}"
+            )
+        
+        outcomes = await run_in_threadpool(compare_units, units, month, year, request.engine)
+        if not any(outcome['status'] == UNIT_COMPLETED for outcome in outcomes.values()):
+            raise HTTPException(
+                status_code=400,
+                detail="; ".join(f"{unit}: {outcome['detail']}" for unit, outcome in outcomes.items())
+            )
+        
+        # Once every unit is written back, pair departures and arrivals across units
+        transfers = await run_in_threadpool(transfers_in_session, month, year)
+        totals = rollup(outcomes)
+        totals['transfer_count'] = len(transfers)
         
         return {
             "status": "success",
             "month": month,
             "year": year,
-            "unit": unit,
-            "summary": {
-                "total_current": comparison_result.summary.total_current,
-                "total_previous": comparison_result.summary.total_previous,
-                "new_count": comparison_result.summary.new_count,
-                "departed_count": comparison_result.summary.departed_count,
-                "account_change_count": comparison_result.summary.account_change_count,
-                "unchanged_count": comparison_result.summary.unchanged_count
-            },
-            "results": all_results,
-            "new_employees": comparison_result.new_employees,
-            "departed_employees": comparison_result.departed_employees,
-            "account_changes": comparison_result.account_changes,
-            "unchanged_employees": comparison_result.unchanged_employees
+            "units": outcomes,
+            "rollup": totals,
+            "transfers": transfers
         }
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error during comparison: {e}")
+        logger.error(f"Unexpected error during batch comparison: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
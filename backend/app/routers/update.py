@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.database import get_db
 from app.models.pegawai import Pegawai
+from app.services.data_version import bump_version
 import logging
 
 logger = logging.getLogger(__name__)
@@ -68,6 +69,7 @@ async def update_status(
         old_status = employee.status
         employee.status = request.status
         employee.manual_override = 1  # Mark as manually overridden
+        bump_version(db, employee.unit, employee.month, employee.year)
         
         db.commit()
         db.refresh(employee)
@@ -132,6 +134,7 @@ async def update_departed_status(
             old_status = existing.status
             existing.status = request.status
             existing.manual_override = 1
+            bump_version(db, request.unit, request.month, request.year)
             db.commit()
             db.refresh(existing)
             
@@ -143,9 +146,9 @@ async def update_departed_status(
                 "employee": existing.to_dict()
             }
         
-        # Find employee data from previous month to copy
-        from app.services.month_utils import get_previous_month
-        prev_month, prev_year = get_previous_month(request.month, request.year)
+        # Find employee data from the month the target month is compared with to copy
+        from app.services.month_utils import get_baseline_period
+        prev_month, prev_year = get_baseline_period(db, request.month, request.year, request.unit)
         
         previous_employee = db.query(Pegawai).filter(
             Pegawai.nip == request.nip,
@@ -170,14 +173,17 @@ async def update_departed_status(
             kode_bank=previous_employee.kode_bank,
             nama_bank=previous_employee.nama_bank,
             nomor_rekening=previous_employee.nomor_rekening,
+            fingerprint=previous_employee.fingerprint,
             unit=previous_employee.unit,
             month=request.month,
             year=request.year,
             status=request.status,
-            manual_override=1  # Mark as manually overridden
+            manual_override=1,  # Mark as manually overridden
+            departed=1
         )
         
         db.add(new_employee)
+        bump_version(db, request.unit, request.month, request.year)
         db.commit()
         db.refresh(new_employee)
         
@@ -1,200 +1,440 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from app.database import get_db
-from app.models.pegawai import Pegawai
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, FileResponse
+from starlette.background import BackgroundTask
+from app.services.ingest_jobs import IngestJobQueue, get_ingest_queue, KIND_FILE, KIND_WORKBOOK
+from app.services.chunked_upload import ChunkedUploadStore, get_upload_store, RECOMMENDED_CHUNK_SIZE
+from app.services.upload_pipeline import VALID_UNITS, UPLOAD_MODES, MODE_STAGING
 from app.services.excel_parser import ExcelParser
-from app.services.validation import validate_employee_data, check_duplicate_nip
-from datetime import datetime
-from typing import List, Dict
+from app.services.preflight import preflight_ndjson, write_annotated_workbook, REPORT_FORMATS, REPORT_NDJSON, REPORT_XLSX
+from app.services.admission import WORK_UPLOAD, AdmissionRejected
+from app.routers.admission import admission_slot, too_busy
+from pathlib import Path
+from typing import Dict, Optional
+import itertools
+import tempfile
+import os
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/upload", tags=["upload"])
 
-# Valid unit values
-VALID_UNITS = [
-    "Dinas",
-    "Cabdis Wil. 1",
-    "Cabdis Wil. 2",
-    "Cabdis Wil. 3",
-    "Cabdis Wil. 4",
-    "Cabdis Wil. 5",
-    "Cabdis Wil. 6",
-    "PPPK"
-]
 
-
-def parse_date(date_str: str) -> datetime.date:
+def _check_upload_params(month: int, year: int, mode: str, unit: Optional[str] = None) -> None:
     """
-    Parse date string to date object.
-    Supports multiple formats: YYYY-MM-DD, DD/MM/YYYY, DD-MM-YYYY.
+    Raises:
+        HTTPException 400: Month, year, mode or (when given) unit out of range
     """
-    date_formats = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d']
+    if not (1 <= month <= 12):
+        raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
     
-    for date_format in date_formats:
-        try:
-            return datetime.strptime(str(date_str), date_format).date()
-        except ValueError:
-            continue
+    if year < 2000 or year > 2100:
+        raise HTTPException(status_code=400, detail="Year must be between 2000 and 2100")
     
-    raise ValueError(f"Unable to parse date: {date_str}")
+    if unit is not None and unit not in VALID_UNITS:
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Invalid unit. Must be one of: {', '.join(VALID_UNITS)}"
+        )
+    
+    if mode not in UPLOAD_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid mode. Must be one of: {', '.join(UPLOAD_MODES)}"
+        )
 
 
-@router.post("")
+def _accepted(job: Dict, message: str, **fields) -> Dict:
+    """Response of an upload accepted for background processing."""
+    # Identical to the stored upload: the job is already complete
+    if job["phase"] == "completed":
+        return {**job["result"], "job_id": job["id"], "phase": job["phase"]}
+    
+    return {
+        "status": "accepted",
+        "message": message,
+        "job_id": job["id"],
+        "phase": job["phase"],
+        **fields
+    }
+
+
+@router.post("", status_code=202)
 async def upload_file(
     file: UploadFile = File(...),
     month: int = Form(...),
     year: int = Form(...),
     unit: str = Form(...),
-    db: Session = Depends(get_db)
+    mode: str = Form(MODE_STAGING),
+    queue: IngestJobQueue = Depends(get_ingest_queue)
 ):
     """
     Upload Excel file containing employee data.
+    The file is stored and processed by a background job, which waits for an
+    upload admission slot (see IngestJobQueue); poll GET /upload/jobs/{job_id}
+    for progress and the final result. The job is refused with 429 when the
+    admission queue is already full.
     
     Args:
         file: Excel file (.xlsx or .csv)
         month: Month number (1-12)
         year: Year number
         unit: Unit kerja (must be one of VALID_UNITS)
-        db: Database session
+        mode: 'staging' (default) swaps the period in one transaction through a
+            temporary table; 'direct' deletes the period first, then inserts;
+            'delta' takes only added, changed and removed employees (marked
+            TAMBAH, UBAH or HAPUS in an 'Aksi' column) and applies them onto
+            the previous month; 'upsert' updates changed employees in place,
+            keeping their ids and leaving manually overridden rows alone
+        queue: Ingest job queue
         
     Returns:
-        Success response with record count
+        Accepted response with the job id, or the final "no changes" result
+        when the file is identical to the one already stored for the period
         
     Raises:
-        HTTPException 400: Validation errors or duplicate NIPs
+        HTTPException 400: Invalid parameters or unsupported file format
+        HTTPException 429: The admission queue is full (with a Retry-After header)
         HTTPException 500: Internal server errors
     """
     try:
-        # Validate month and year
-        if not (1 <= month <= 12):
-            raise HTTPException(status_code=400, detail="Month must be between 1 and 12")
+        _check_upload_params(month, year, mode, unit)
+        
+        # Writing the file to disk is blocking I/O; keep it off the event loop
+        try:
+            job = await run_in_threadpool(queue.submit, file.file, file.filename, unit, month, year, mode)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except AdmissionRejected as e:
+            raise too_busy(e)
         
-        if year < 2000 or year > 2100:
-            raise HTTPException(status_code=400, detail="Year must be between 2000 and 2100")
+        return _accepted(job, "File accepted for processing", month=month, year=year, unit=unit, mode=mode)
         
-        # Validate unit
-        if unit not in VALID_UNITS:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Invalid unit. Must be one of: {', '.join(VALID_UNITS)}"
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during upload: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/workbook", status_code=202)
+async def upload_workbook(
+    file: UploadFile = File(...),
+    month: int = Form(...),
+    year: int = Form(...),
+    mode: str = Form(MODE_STAGING),
+    queue: IngestJobQueue = Depends(get_ingest_queue)
+):
+    """
+    Upload the data of several units at once: an .xlsx workbook with one sheet
+    per unit, or a .zip of per-unit .xlsx/.csv files. Sheets and files are
+    matched to units by name (e.g. "Cabdis Wil. 1"); others are skipped.
+    Units are validated in parallel and each is stored in its own transaction;
+    poll GET /upload/jobs/{job_id} for the per-unit report.
+    
+    Args:
+        file: Workbook (.xlsx) or archive (.zip)
+        month: Month number (1-12)
+        year: Year number
+        mode: Upload mode applied to every unit
+        queue: Ingest job queue
+        
+    Returns:
+        Accepted response with the job id
+        
+    Raises:
+        HTTPException 400: Invalid parameters or unsupported file format
+        HTTPException 429: The admission queue is full (with a Retry-After header)
+        HTTPException 500: Internal server errors
+    """
+    try:
+        _check_upload_params(month, year, mode)
         
-        # Parse and validate Excel file
-        logger.info(f"Parsing file: {file.filename}")
         try:
-            records = await ExcelParser.parse_and_validate(file)
+            job = await run_in_threadpool(queue.submit_workbook, file.file, file.filename, month, year, mode)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
+        except AdmissionRejected as e:
+            raise too_busy(e)
         
-        if not records:
-            raise HTTPException(status_code=400, detail="File contains no data")
+        return _accepted(job, "Workbook accepted for processing", month=month, year=year, mode=mode)
         
-        # Check for duplicate NIPs within the upload
-        duplicates = check_duplicate_nip(records, month, year)
-        if duplicates:
-            duplicate_details = []
-            for nip, indices in duplicates.items():
-                duplicate_details.append(f"NIP {nip} appears at rows {indices}")
-            raise HTTPException(
-                status_code=400,
-                detail=f"Duplicate NIP entries found: {'; '.join(duplicate_details)}"
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during workbook upload: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/preflight", dependencies=[Depends(admission_slot(WORK_UPLOAD))])
+async def preflight_upload(
+    file: UploadFile = File(...),
+    report: str = Form(REPORT_NDJSON)
+):
+    """
+    Check an upload without touching the database: parsing, duplicate NIPs and
+    every field rule. Operators can fix the file before uploading it.
+    
+    Args:
+        file: Excel file (.xlsx or .csv)
+        report: 'ndjson' (default) streams one JSON line per invalid row, then
+            duplicate NIPs, then a summary; 'xlsx' returns the file annotated
+            with an "Errors" column
         
-        # Validate all employee data
-        all_errors = []
-        for idx, employee in enumerate(records):
-            errors = validate_employee_data(employee)
-            if errors:
-                all_errors.append(f"Row {idx + 1}: {'; '.join(errors)}")
+    Returns:
+        NDJSON stream or annotated workbook
         
-        if all_errors:
+    Raises:
+        HTTPException 400: Unsupported format, unreadable file or missing columns
+        HTTPException 500: Internal server errors
+    """
+    try:
+        if report not in REPORT_FORMATS:
             raise HTTPException(
                 status_code=400,
-                detail=f"Validation errors: {' | '.join(all_errors)}"
+                detail=f"Invalid report. Must be one of: {', '.join(REPORT_FORMATS)}"
             )
         
-        # Check if data already exists for this month/year/unit
-        # Only delete records with status 'Aktif' to preserve comparison results (Keluar, Pensiun, etc.)
-        existing_count = db.query(Pegawai).filter(
-            Pegawai.month == month,
-            Pegawai.year == year,
-            Pegawai.unit == unit,
-            Pegawai.status == 'Aktif'
-        ).count()
-        
-        if existing_count > 0:
-            # Delete only 'Aktif' records - preserve Keluar, Pensiun, etc. from comparison
-            logger.info(f"Found {existing_count} existing 'Aktif' records for {unit} {month}/{year}. Replacing...")
-            db.query(Pegawai).filter(
-                Pegawai.month == month,
-                Pegawai.year == year,
-                Pegawai.unit == unit,
-                Pegawai.status == 'Aktif'
-            ).delete(synchronize_session=False)
-            db.commit()  # Commit delete before adding new records
-            logger.info(f"Deleted {existing_count} existing 'Aktif' records")
-        
-        # Store validated data in database
-        logger.info(f"Storing {len(records)} records to database")
-        stored_count = 0
-        
-        for employee in records:
+        if report == REPORT_XLSX:
+            handle, report_path = tempfile.mkstemp(suffix=".xlsx")
+            os.close(handle)
             try:
-                # Parse date
-                tgl_lahir = parse_date(employee['Tanggal Lahir'])
-                
-                # Create Pegawai object
-                pegawai = Pegawai(
-                    nip=str(employee['NIP']).strip(),
-                    nama=str(employee['Nama']).strip(),
-                    nik=str(employee['NIK']).strip(),
-                    npwp=str(employee['NPWP']).strip(),
-                    tgl_lahir=tgl_lahir,
-                    kode_bank=str(employee['Kode Bank']).strip(),
-                    nama_bank=str(employee['Nama Bank']).strip(),
-                    nomor_rekening=str(employee['Nomor Rekening']).strip(),
-                    status='Aktif',
-                    unit=unit,
-                    month=month,
-                    year=year
-                )
-                
-                db.add(pegawai)
-                stored_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error storing employee {employee.get('NIP')}: {e}")
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Error storing employee {employee.get('NIP')}: {str(e)}"
-                )
-        
-        # Commit all changes
-        try:
-            db.commit()
-            logger.info(f"Successfully stored {stored_count} records")
-        except IntegrityError as e:
-            db.rollback()
-            logger.error(f"Database integrity error: {e}")
-            raise HTTPException(
-                status_code=400,
-                detail="Database error occurred during upload"
+                summary = await run_in_threadpool(write_annotated_workbook, file.file, file.filename, report_path)
+            except ValueError as e:
+                os.remove(report_path)
+                raise HTTPException(status_code=400, detail=str(e))
+            except Exception:
+                os.remove(report_path)
+                raise
+            
+            return FileResponse(
+                report_path,
+                filename=f"preflight-{Path(file.filename).stem}.xlsx",
+                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                headers={"X-Preflight-Valid": str(summary["valid"]).lower()},
+                background=BackgroundTask(os.remove, report_path)
             )
         
-        return {
-            "status": "success",
-            "message": "File successfully uploaded and processed",
-            "records_processed": stored_count,
-            "month": month,
-            "year": year,
-            "unit": unit
-        }
+        # Read up to the first batch here so header problems are a plain 400,
+        # not an error in the middle of a stream
+        batches = ExcelParser.iter_batches(file.file, file.filename)
+        try:
+            first = await run_in_threadpool(next, batches, None)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        head = [first] if first is not None else []
+        return StreamingResponse(
+            preflight_ndjson(itertools.chain(head, batches)),
+            media_type="application/x-ndjson"
+        )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error during upload: {e}")
+        logger.error(f"Unexpected error during preflight: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.post("/sessions", status_code=201)
+async def create_upload_session(
+    filename: str = Form(...),
+    month: int = Form(...),
+    year: int = Form(...),
+    unit: Optional[str] = Form(None),
+    mode: str = Form(MODE_STAGING),
+    size: Optional[int] = Form(None),
+    store: ChunkedUploadStore = Depends(get_upload_store)
+):
+    """
+    Start a resumable upload for files too large for one request.
+    Send the bytes with PUT /upload/sessions/{id}?offset=N, then
+    POST /upload/sessions/{id}/finalize.
+    
+    Args:
+        filename: Original filename; .xlsx/.csv with a unit (as POST /upload),
+            or .xlsx/.zip without one (as POST /upload/workbook)
+        month: Month number (1-12)
+        year: Year number
+        unit: Unit kerja; omit for a multi-unit workbook
+        mode: Upload mode
+        size: Total size in bytes, if known
+        store: Chunked upload store
+        
+    Returns:
+        The session, with offset 0 and a recommended chunk size
+        
+    Raises:
+        HTTPException 400: Invalid parameters or unsupported file format
+    """
+    _check_upload_params(month, year, mode, unit)
+    kind = KIND_FILE if unit is not None else KIND_WORKBOOK
+    
+    try:
+        session = await run_in_threadpool(store.create, filename, kind, month, year, unit, mode, size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {**session, "chunk_size": RECOMMENDED_CHUNK_SIZE}
+
+
+@router.get("/sessions/{session_id}")
+async def get_upload_session(session_id: str, store: ChunkedUploadStore = Depends(get_upload_store)):
+    """
+    Report how many bytes of a resumable upload were received.
+    After a dropped connection the client resumes from `offset`.
+    
+    Raises:
+        HTTPException 404: Unknown, finalized or expired session
+    """
+    session = await run_in_threadpool(store.get, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Upload session {session_id} not found")
+    return session
+
+
+@router.put("/sessions/{session_id}")
+async def upload_chunk(
+    session_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    store: ChunkedUploadStore = Depends(get_upload_store)
+):
+    """
+    Append one chunk (the raw request body) to a resumable upload.
+    The body is written to disk as it arrives; if the connection drops, the
+    bytes already received are kept and GET /upload/sessions/{id} tells
+    where to resume.
+    
+    Args:
+        session_id: Session id
+        request: The request whose body is the chunk
+        offset: Byte position of the chunk; must equal the bytes received so far
+        store: Chunked upload store
+        
+    Returns:
+        The new offset
+        
+    Raises:
+        HTTPException 404: Unknown session
+        HTTPException 409: Wrong offset, or another chunk is being written
+        HTTPException 400: Chunk goes past the declared size
+    """
+    try:
+        writer = await run_in_threadpool(store.open_chunk, session_id, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if writer is None:
+        raise HTTPException(status_code=404, detail=f"Upload session {session_id} not found")
+    
+    try:
+        async for data in request.stream():
+            if data:
+                await run_in_threadpool(writer.write, data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        new_offset = await run_in_threadpool(writer.close)
+    
+    return {"id": session_id, "offset": new_offset}
+
+
+@router.post("/sessions/{session_id}/finalize", status_code=202)
+async def finalize_upload_session(
+    session_id: str,
+    store: ChunkedUploadStore = Depends(get_upload_store),
+    queue: IngestJobQueue = Depends(get_ingest_queue)
+):
+    """
+    Hand a fully received upload to the ingest queue, exactly as if it had
+    been sent to POST /upload (or /upload/workbook) in one request.
+    
+    Returns:
+        Accepted response with the job id; poll GET /upload/jobs/{job_id}
+        
+    Raises:
+        HTTPException 404: Unknown session
+        HTTPException 400: Data missing or incomplete
+        HTTPException 429: The admission queue is full; the session is kept,
+            so finalizing can be retried after Retry-After
+        HTTPException 500: Internal server errors
+    """
+    # Queue place first: a rejected finalize must not consume the received data
+    try:
+        reservation = await run_in_threadpool(queue.reserve)
+    except AdmissionRejected as e:
+        raise too_busy(e)
+    
+    try:
+        completed = await run_in_threadpool(store.complete, session_id)
+    except ValueError as e:
+        queue.release_reservation(reservation)
+        raise HTTPException(status_code=400, detail=str(e))
+    if completed is None:
+        queue.release_reservation(reservation)
+        raise HTTPException(status_code=404, detail=f"Upload session {session_id} not found")
+    session, path = completed
+    
+    try:
+        if session["kind"] == KIND_WORKBOOK:
+            job = await run_in_threadpool(
+                queue.submit_workbook, path, session["filename"], session["month"], session["year"],
+                session["mode"], reservation
+            )
+            return _accepted(
+                job, "Workbook accepted for processing",
+                month=session["month"], year=session["year"], mode=session["mode"]
+            )
+        
+        job = await run_in_threadpool(
+            queue.submit, path, session["filename"], session["unit"],
+            session["month"], session["year"], session["mode"], reservation
+        )
+        return _accepted(
+            job, "File accepted for processing",
+            month=session["month"], year=session["year"], unit=session["unit"], mode=session["mode"]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error finalizing upload session {session_id}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        # Left behind only if the queue did not take the file over
+        if path.exists():
+            os.remove(path)
+
+
+@router.delete("/sessions/{session_id}")
+async def cancel_upload_session(session_id: str, store: ChunkedUploadStore = Depends(get_upload_store)):
+    """
+    Abandon a resumable upload and delete the data received so far.
+    
+    Raises:
+        HTTPException 404: Unknown session
+    """
+    if not await run_in_threadpool(store.discard, session_id):
+        raise HTTPException(status_code=404, detail=f"Upload session {session_id} not found")
+    return {"status": "success", "message": f"Upload session {session_id} cancelled"}
+
+
+@router.get("/jobs/{job_id}")
+async def get_upload_job(job_id: str, queue: IngestJobQueue = Depends(get_ingest_queue)):
+    """
+    Report the progress of an upload job.
+    
+    Args:
+        job_id: Job id returned by POST /upload
+        queue: Ingest job queue
+        
+    Returns:
+        Job phase, rows processed, errors, timings and (when completed) the upload result
+        
+    Raises:
+        HTTPException 404: Unknown or expired job
+    """
+    job = await run_in_threadpool(queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Upload job {job_id} not found")
+    return job
@@ -0,0 +1,357 @@
+from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from collections import deque
+import asyncio
+import itertools
+import math
+import time
+import os
+import logging
+from app.services.memory_usage import current_rss_mb
+
+logger = logging.getLogger(__name__)
+
+# Work classes guarded by the controller
+WORK_COMPARE = 'compare'
+WORK_UPLOAD = 'upload'
+WORK_BACKUP = 'backup'
+
+# Waiting requests across all classes; beyond this new requests get 429
+DEFAULT_MAX_QUEUE = 32
+
+# Memory the admitted requests may reserve together, in MB
+DEFAULT_MEMORY_BUDGET_MB = 1024
+
+# Wait and run times kept per class for the statistics and Retry-After
+SAMPLE_SIZE = 200
+
+# Retry-After used before a class has finished any request, and its upper bound (seconds)
+DEFAULT_SERVICE_SECONDS = 5
+MAX_RETRY_AFTER_SECONDS = 300
+
+
+@dataclass
+class WorkClass:
+    """Limits of one kind of heavy request."""
+    name: str
+    priority: int           # lower is admitted first
+    concurrency: int        # requests of this class running at once
+    memory_mb: int          # memory reserved from the budget while one runs
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+
+def default_work_classes() -> Dict[str, WorkClass]:
+    """
+    Classes for /compare, /upload and /backup/create. Interactive comparisons go
+    first, backups last. Every value can be set with ADMISSION_<CLASS>_CONCURRENCY,
+    ADMISSION_<CLASS>_MEMORY_MB and ADMISSION_<CLASS>_PRIORITY.
+    """
+    defaults = [
+        (WORK_COMPARE, 0, 2, 384),
+        (WORK_UPLOAD, 1, 2, 256),
+        (WORK_BACKUP, 2, 1, 512),
+    ]
+    classes = {}
+    for name, priority, concurrency, memory_mb in defaults:
+        prefix = f"ADMISSION_{name.upper()}"
+        classes[name] = WorkClass(
+            name=name,
+            priority=_env_int(f"{prefix}_PRIORITY", priority),
+            concurrency=max(1, _env_int(f"{prefix}_CONCURRENCY", concurrency)),
+            memory_mb=max(0, _env_int(f"{prefix}_MEMORY_MB", memory_mb))
+        )
+    return classes
+
+
+class AdmissionRejected(Exception):
+    """The wait queue is full; retry after `retry_after` seconds."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class Ticket:
+    """An admitted request; hand it back to release()."""
+    work_class: str
+    memory_mb: int
+    admitted_at: float
+
+
+@dataclass(eq=False)
+class Reservation:
+    """A place in the wait queue held by work accepted now and run later; hand it back to unreserve()."""
+    work_class: str
+    reserved_at: float
+
+
+@dataclass
+class _Waiter:
+    work_class: WorkClass
+    sequence: int
+    enqueued_at: float
+    future: asyncio.Future
+
+    @property
+    def order(self):
+        return (self.work_class.priority, self.sequence)
+
+
+@dataclass
+class _ClassStats:
+    running: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    waits: deque = field(default_factory=lambda: deque(maxlen=SAMPLE_SIZE))
+    runs: deque = field(default_factory=lambda: deque(maxlen=SAMPLE_SIZE))
+
+
+class AdmissionController:
+    """
+    Admission control for CPU- and memory-heavy requests.
+
+    A request is admitted when its class is below its concurrency limit and
+    its memory reservation fits in the budget. Otherwise it waits in a queue
+    ordered by class priority, then arrival. A class at its own limit does not
+    hold up other classes; a waiter that does not fit in memory holds up
+    everything behind it, so large jobs are not starved by small ones. A single
+    request larger than the whole budget runs alone.
+
+    Work accepted for later (queued upload jobs) holds a Reservation until it
+    asks for its slot, so the backlog counts against max_queue and shows in
+    the statistics.
+
+    State is only touched from the event loop, so no lock is needed.
+    """
+
+    def __init__(
+        self,
+        classes: Optional[Dict[str, WorkClass]] = None,
+        memory_budget_mb: Optional[int] = None,
+        max_queue: Optional[int] = None
+    ):
+        self.classes = classes or default_work_classes()
+        self.memory_budget_mb = memory_budget_mb or _env_int("ADMISSION_MEMORY_BUDGET_MB", DEFAULT_MEMORY_BUDGET_MB)
+        self.max_queue = max_queue if max_queue is not None else _env_int("ADMISSION_MAX_QUEUE", DEFAULT_MAX_QUEUE)
+        self.memory_reserved_mb = 0
+        self._waiters: List[_Waiter] = []
+        self._reservations: List[Reservation] = []
+        self._sequence = itertools.count()
+        self._stats = {name: _ClassStats() for name in self.classes}
+
+    def _queued(self) -> int:
+        return len(self._waiters) + len(self._reservations)
+
+    def _reject(self, name: str) -> AdmissionRejected:
+        self._stats[name].rejected += 1
+        retry_after = self.retry_after(name)
+        logger.warning(f"Rejected {name} request: {self.max_queue} requests already waiting")
+        return AdmissionRejected(
+            f"Server is busy: {self.max_queue} requests are already waiting. "
+            f"Retry in {retry_after} seconds.",
+            retry_after
+        )
+
+    def _fits(self, work_class: WorkClass) -> bool:
+        # A request larger than the whole budget still runs, but only on its own
+        return (
+            not any(stats.running for stats in self._stats.values())
+            or self.memory_reserved_mb + work_class.memory_mb <= self.memory_budget_mb
+        )
+
+    def _admit(self, work_class: WorkClass, waited: float) -> Ticket:
+        stats = self._stats[work_class.name]
+        stats.running += 1
+        stats.admitted += 1
+        stats.waits.append(waited)
+        self.memory_reserved_mb += work_class.memory_mb
+        return Ticket(work_class.name, work_class.memory_mb, time.monotonic())
+
+    def _dispatch(self) -> None:
+        """Admit waiters in queue order while they fit."""
+        now = time.monotonic()
+        for waiter in sorted(self._waiters, key=lambda w: w.order):
+            work_class = waiter.work_class
+            if self._stats[work_class.name].running >= work_class.concurrency:
+                continue
+            if not self._fits(work_class):
+                break
+            self._waiters.remove(waiter)
+            waiter.future.set_result(self._admit(work_class, now - waiter.enqueued_at))
+
+    def retry_after(self, name: str) -> int:
+        """Seconds until a slot of this class is likely to free up."""
+        work_class = self.classes[name]
+        stats = self._stats[name]
+        service = sum(stats.runs) / len(stats.runs) if stats.runs else DEFAULT_SERVICE_SECONDS
+        ahead = sum(1 for waiter in self._waiters if waiter.work_class.priority <= work_class.priority) + sum(
+            1 for reservation in self._reservations
+            if self.classes[reservation.work_class].priority <= work_class.priority
+        )
+        estimate = math.ceil(service * (ahead + 1) / work_class.concurrency)
+        return min(max(1, estimate), MAX_RETRY_AFTER_SECONDS)
+
+    async def acquire(self, name: str, bounded: bool = True) -> Ticket:
+        """
+        Wait until a request of class `name` may run.
+
+        Args:
+            name: Work class
+            bounded: Reject the request when max_queue requests are already
+                waiting (off for work that was already accepted, e.g. queued jobs)
+
+        Returns:
+            Ticket: Pass it to release() when the request is done
+
+        Raises:
+            ValueError: Unknown work class
+            AdmissionRejected: The wait queue is full
+        """
+        if name not in self.classes:
+            raise ValueError(f"Unknown work class: {name}")
+        waiter = _Waiter(
+            work_class=self.classes[name],
+            sequence=next(self._sequence),
+            enqueued_at=time.monotonic(),
+            future=asyncio.get_running_loop().create_future()
+        )
+        self._waiters.append(waiter)
+        self._dispatch()
+
+        if bounded and not waiter.future.done() and self._queued() > self.max_queue:
+            self._waiters.remove(waiter)
+            raise self._reject(name)
+
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            # Client went away while waiting, or right after being admitted
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(waiter.future.result())
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self, ticket: Ticket) -> None:
+        """Return the slot and memory of an admitted request and admit the next waiters."""
+        stats = self._stats[ticket.work_class]
+        stats.running -= 1
+        stats.runs.append(time.monotonic() - ticket.admitted_at)
+        self.memory_reserved_mb -= ticket.memory_mb
+        self._dispatch()
+
+    def reserve(self, name: str) -> Reservation:
+        """
+        Hold a place in the wait queue for work accepted now and run later,
+        e.g. an upload job waiting for an ingest worker. The reservation counts
+        towards max_queue until unreserve(); the work then asks for its slot
+        unbounded (see acquire_threadsafe).
+
+        Args:
+            name: Work class
+
+        Returns:
+            Reservation: Pass it to unreserve() once the work starts or is dropped
+
+        Raises:
+            ValueError: Unknown work class
+            AdmissionRejected: The wait queue is full
+        """
+        if name not in self.classes:
+            raise ValueError(f"Unknown work class: {name}")
+        if self._queued() >= self.max_queue:
+            raise self._reject(name)
+        reservation = Reservation(name, time.monotonic())
+        self._reservations.append(reservation)
+        return reservation
+
+    def unreserve(self, reservation: Reservation) -> None:
+        """Give back a place held by reserve(); releasing it twice is harmless."""
+        if reservation in self._reservations:
+            self._reservations.remove(reservation)
+
+    def acquire_threadsafe(self, name: str, loop: asyncio.AbstractEventLoop) -> Ticket:
+        """
+        Wait, from a worker thread, until work of class `name` may run.
+        The wait runs on `loop` (the loop serving requests) and is never
+        rejected: the work was already accepted.
+
+        Args:
+            name: Work class
+            loop: Event loop the controller is used from
+
+        Returns:
+            Ticket: Pass it to release_threadsafe() when the work is done
+
+        Raises:
+            ValueError: Unknown work class
+        """
+        return asyncio.run_coroutine_threadsafe(self.acquire(name, bounded=False), loop).result()
+
+    def release_threadsafe(self, ticket: Ticket, loop: asyncio.AbstractEventLoop) -> None:
+        """release() from a worker thread."""
+        loop.call_soon_threadsafe(self.release, ticket)
+
+    def reserve_threadsafe(self, name: str, loop: asyncio.AbstractEventLoop) -> Reservation:
+        """reserve() from a worker thread; raises what reserve() raises."""
+        async def reserve():
+            return self.reserve(name)
+
+        return asyncio.run_coroutine_threadsafe(reserve(), loop).result()
+
+    def unreserve_threadsafe(self, reservation: Reservation, loop: asyncio.AbstractEventLoop) -> None:
+        """unreserve() from a worker thread."""
+        loop.call_soon_threadsafe(self.unreserve, reservation)
+
+    def stats(self) -> Dict:
+        """
+        Queue depth, running requests and wait times per class (as reported by
+        GET /admission/stats). Queued counts include reserved (accepted, not yet
+        started) work.
+        """
+        classes = {}
+        for name, work_class in self.classes.items():
+            stats = self._stats[name]
+            waits = sorted(stats.waits)
+            reserved = sum(1 for reservation in self._reservations if reservation.work_class == name)
+            classes[name] = {
+                'priority': work_class.priority,
+                'concurrency': work_class.concurrency,
+                'memory_mb': work_class.memory_mb,
+                'running': stats.running,
+                'queued': sum(1 for waiter in self._waiters if waiter.work_class.name == name) + reserved,
+                'reserved': reserved,
+                'admitted': stats.admitted,
+                'rejected': stats.rejected,
+                'wait_ms': {
+                    'avg': round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+                    'p95': round(1000 * waits[min(len(waits) - 1, int(len(waits) * 0.95))], 1) if waits else 0.0,
+                    'max': round(1000 * waits[-1], 1) if waits else 0.0,
+                },
+            }
+        now = time.monotonic()
+        queued_since = [w.enqueued_at for w in self._waiters] + [r.reserved_at for r in self._reservations]
+        return {
+            'queue_depth': self._queued(),
+            'max_queue': self.max_queue,
+            'oldest_wait_ms': round(1000 * max((now - since for since in queued_since), default=0.0), 1),
+            'memory_budget_mb': self.memory_budget_mb,
+            'memory_reserved_mb': self.memory_reserved_mb,
+            'rss_mb': round(current_rss_mb(), 1),
+            'classes': classes,
+        }
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Return the application-wide admission controller, creating it on first use."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,240 @@
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, fields
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.services.comparator import EmployeeComparator, ComparisonResult, ComparisonSummary
+from app.services.month_utils import get_period_frame, get_baseline_period
+from app.services.sql_comparator import compare_in_database
+from app.services.status_writeback import write_back_statuses
+from app.services.transfers import detect_transfers
+from app.services.data_version import bump_versions
+from app.services.incremental_compare import take_watermark, incremental_comparison, remember_outcome
+import os
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Comparison engines accepted by POST /compare and POST /compare/batch
+ENGINE_COLUMNAR = 'columnar'    # load both months as frames, classify with pandas
+ENGINE_DATABASE = 'database'    # FULL OUTER JOIN in the database, only the classification comes back
+COMPARE_ENGINES = [ENGINE_COLUMNAR, ENGINE_DATABASE]
+
+# Outcome of one unit in a batch
+UNIT_COMPLETED = 'completed'
+UNIT_FAILED = 'failed'
+
+
+def compute_comparison(
+    db: Session,
+    unit: str,
+    month: int,
+    year: int,
+    engine: str = ENGINE_COLUMNAR,
+    baseline: Optional[Tuple[int, int]] = None
+) -> ComparisonResult:
+    """
+    Compare one unit with its baseline, the latest earlier month with data
+    (or any other period), without writing anything.
+
+    Args:
+        db: Database session (only read)
+        unit: Unit kerja
+        month: Current month (1-12)
+        year: Current year
+        engine: ENGINE_COLUMNAR or ENGINE_DATABASE
+        baseline: (month, year) to compare against (default: get_baseline_period)
+
+    Returns:
+        ComparisonResult: The comparison of the stored rows
+
+    Raises:
+        ValueError: The unit has no data for month/year
+    """
+    prev_month, prev_year = baseline or get_baseline_period(db, month, year, unit)
+
+    if engine == ENGINE_DATABASE:
+        logger.info(f"Comparing {unit} {month}/{year} in the database")
+        result = compare_in_database(db, unit, month, year, prev_month, prev_year)
+        if result.summary.total_current == 0:
+            raise ValueError(f"No data found for {unit} {month}/{year}. Please upload data first.")
+        return result
+
+    current_data = get_period_frame(db, month, year, unit)
+    if current_data.empty:
+        raise ValueError(f"No data found for {unit} {month}/{year}. Please upload data first.")
+    comparison_data = get_period_frame(db, prev_month, prev_year, unit)
+    logger.info(f"Comparing {len(current_data)} current records with {len(comparison_data)} comparison records")
+    return EmployeeComparator.compare_frames(current_data, comparison_data)
+
+
+def compare_unit(
+    db: Session,
+    unit: str,
+    month: int,
+    year: int,
+    engine: str = ENGINE_COLUMNAR,
+    find_transfers: bool = True,
+    baseline: Optional[Tuple[int, int]] = None
+) -> ComparisonResult:
+    """
+    Compare one unit with its baseline and write the statuses back.
+
+    With the columnar engine the persisted comparison is stored (comparison_outcome), and
+    recomparing the period only reclassifies the employees written since
+    (incremental_compare); otherwise, or when that is not possible, the whole
+    period is compared (compute_comparison).
+
+    Args:
+        db: Database session (committed on success)
+        unit: Unit kerja
+        month: Current month (1-12)
+        year: Current year
+        engine: ENGINE_COLUMNAR or ENGINE_DATABASE
+        find_transfers: Also run detect_transfers over the whole period
+        baseline: (month, year) compared against (default: get_baseline_period)
+
+    Returns:
+        ComparisonResult: The comparison that was written back, with the
+        transfers into or out of this unit detected in the period
+
+    Raises:
+        ValueError: The unit has no data for month/year
+    """
+    prev_month, prev_year = baseline or get_baseline_period(db, month, year, unit)
+    watermark = take_watermark(db, unit, month, year, (prev_month, prev_year)) if engine == ENGINE_COLUMNAR else None
+
+    incremental = watermark and incremental_comparison(db, unit, month, year, watermark)
+    if incremental:
+        result, written = incremental
+    else:
+        result = written = compute_comparison(db, unit, month, year, engine, baseline=(prev_month, prev_year))
+
+    # Only rows without manual_override are updated; departed employees are
+    # saved to the current month with status "Keluar". The comparison's own
+    # writes do not change the period's data version.
+    write_back_statuses(
+        db, written, unit, month, year, prev_month, prev_year,
+        departed_only_in_result=bool(incremental)
+    )
+    if find_transfers:
+        transfers = detect_transfers(db, month, year)
+        # Rows of other units set to Pindah invalidate their cached comparisons
+        bump_versions(db, [
+            (other, month, year)
+            for transfer in transfers
+            for other in (transfer['from_unit'], transfer['to_unit'])
+            if other != unit
+        ])
+        result.transfers = [
+            transfer for transfer in transfers if unit in (transfer['from_unit'], transfer['to_unit'])
+        ]
+    if watermark:
+        remember_outcome(db, unit, month, year, watermark, result)
+    db.commit()
+    return result
+
+
+def _compare_in_session(session_factory: Callable, unit: str, month: int, year: int, engine: str) -> Dict:
+    """Run compare_unit in a session of its own and report the outcome."""
+    started = time.perf_counter()
+    db = session_factory()
+    try:
+        result = compare_unit(db, unit, month, year, engine, find_transfers=False)
+        outcome = {'status': UNIT_COMPLETED, 'summary': asdict(result.summary)}
+    except ValueError as e:
+        db.rollback()
+        outcome = {'status': UNIT_FAILED, 'detail': str(e)}
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Unexpected error comparing {unit} {month}/{year}: {e}")
+        outcome = {'status': UNIT_FAILED, 'detail': "Internal server error"}
+    finally:
+        db.close()
+    outcome['seconds'] = round(time.perf_counter() - started, 3)
+    return outcome
+
+
+def compare_units(
+    units: List[str],
+    month: int,
+    year: int,
+    engine: str = ENGINE_COLUMNAR,
+    session_factory: Callable = SessionLocal,
+    max_workers: Optional[int] = None
+) -> Dict[str, Dict]:
+    """
+    Compare several units of one period concurrently.
+
+    Every unit runs compare_unit in a worker thread with its own session and
+    commits on its own, so one unit without data does not stop the others.
+    Transfers are not detected per unit (workers would update each other's
+    rows); call transfers_in_session once all units are written back.
+
+    Args:
+        units: Units to compare
+        month: Current month (1-12)
+        year: Current year
+        engine: ENGINE_COLUMNAR or ENGINE_DATABASE
+        session_factory: Creates one session per unit
+        max_workers: Units compared at once (COMPARE_BATCH_WORKERS, default all)
+
+    Returns:
+        Dict: Per unit, in the given order, {'status', 'summary' or 'detail', 'seconds'}
+    """
+    workers = max_workers or int(os.getenv("COMPARE_BATCH_WORKERS", len(units)))
+    outcomes: Dict[str, Dict] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(units))), thread_name_prefix="compare-unit") as pool:
+        futures = {
+            pool.submit(_compare_in_session, session_factory, unit, month, year, engine): unit
+            for unit in units
+        }
+        for future in as_completed(futures):
+            outcomes[futures[future]] = future.result()
+
+    logger.info(
+        f"Compared {len(units)} units for {month}/{year}: "
+        f"{sum(outcome['status'] == UNIT_COMPLETED for outcome in outcomes.values())} completed"
+    )
+    return {unit: outcomes[unit] for unit in units}
+
+
+def transfers_in_session(month: int, year: int, session_factory: Callable = SessionLocal) -> List[Dict]:
+    """Run detect_transfers for a period in a session of its own and commit (bumping the units changed)."""
+    db = session_factory()
+    try:
+        transfers = detect_transfers(db, month, year)
+        bump_versions(db, [
+            (unit, month, year)
+            for transfer in transfers
+            for unit in (transfer['from_unit'], transfer['to_unit'])
+        ])
+        db.commit()
+        return transfers
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def rollup(outcomes: Dict[str, Dict]) -> Dict:
+    """
+    Province-wide totals of a batch: every ComparisonSummary count summed over
+    the completed units.
+
+    Args:
+        outcomes: Result of compare_units
+
+    Returns:
+        Dict: Summed summary counts plus units_completed and units_failed
+    """
+    totals = {summary_field.name: 0 for summary_field in fields(ComparisonSummary)}
+    completed = [outcome for outcome in outcomes.values() if outcome['status'] == UNIT_COMPLETED]
+    for outcome in completed:
+        for name in totals:
+            totals[name] += outcome['summary'][name]
+    totals['units_completed'] = len(completed)
+    totals['units_failed'] = len(outcomes) - len(completed)
+    return totals
@@ -0,0 +1,156 @@
+from typing import List, Dict, Iterable
+from datetime import datetime
+from sqlalchemy import insert, table, column
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app.models.pegawai import Pegawai
+from app.services.row_fingerprint import row_fingerprint
+import csv
+import io
+
+
+# Columns written for every ingested employee row, in COPY order
+PEGAWAI_COLUMNS = [
+    'nip',
+    'nama',
+    'nik',
+    'npwp',
+    'tgl_lahir',
+    'kode_bank',
+    'nama_bank',
+    'nomor_rekening',
+    'fingerprint',
+    'status',
+    'manual_override',
+    'departed',
+    'unit',
+    'month',
+    'year',
+    'created_at',
+    'updated_at'
+]
+
+# Rows sent per COPY / executemany round trip
+DEFAULT_BATCH_SIZE = 5000
+
+
+def build_pegawai_row(employee: Dict, tgl_lahir, unit: str, month: int, year: int, now: datetime) -> Dict:
+    """
+    Build a plain column dictionary for one validated upload record.
+
+    Args:
+        employee: Validated record keyed by the Excel column names
+        tgl_lahir: Parsed birth date
+        unit: Unit kerja
+        month: Month number
+        year: Year number
+        now: Timestamp used for created_at/updated_at
+
+    Returns:
+        Dict: Row keyed by PEGAWAI_COLUMNS, fingerprint included
+    """
+    row = {
+        'nip': str(employee['NIP']).strip(),
+        'nama': str(employee['Nama']).strip(),
+        'nik': str(employee['NIK']).strip(),
+        'npwp': str(employee['NPWP']).strip(),
+        'tgl_lahir': tgl_lahir,
+        'kode_bank': str(employee['Kode Bank']).strip(),
+        'nama_bank': str(employee['Nama Bank']).strip(),
+        'nomor_rekening': str(employee['Nomor Rekening']).strip(),
+        'status': 'Aktif',
+        'manual_override': 0,
+        'departed': 0,
+        'unit': unit,
+        'month': month,
+        'year': year,
+        'created_at': now,
+        'updated_at': now
+    }
+    row['fingerprint'] = row_fingerprint(row)
+    return row
+
+
+def _batches(rows: Iterable[Dict], batch_size: int) -> Iterable[List[Dict]]:
+    """Split an iterable of rows into lists of at most batch_size rows."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_batch(db: Session, rows: List[Dict], table_name: str) -> None:
+    """
+    Stream one batch into PostgreSQL with COPY FROM STDIN.
+    Runs on the session's own connection so it shares the current transaction.
+
+    Raises:
+        IntegrityError: (or another DBAPIError subclass) If the database rejects
+            the rows, wrapped as SQLAlchemy wraps errors of the INSERT path
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            row[col].isoformat() if hasattr(row[col], 'isoformat') else row[col]
+            for col in PEGAWAI_COLUMNS
+        ])
+    buffer.seek(0)
+
+    statement = f"COPY {table_name} ({', '.join(PEGAWAI_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    dialect = db.get_bind().dialect
+    dbapi_connection = db.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        try:
+            cursor.copy_expert(statement, buffer)
+        except dialect.loaded_dbapi.Error as e:
+            # copy_expert bypasses SQLAlchemy, so psycopg2 errors arrive unwrapped
+            raise DBAPIError.instance(
+                statement, None, e, dialect.loaded_dbapi.Error, hide_parameters=True, dialect=dialect
+            ) from e
+
+
+def _insert_batch(db: Session, rows: List[Dict], table_name: str) -> None:
+    """Insert one batch with a single executemany INSERT (non-PostgreSQL fallback)."""
+    if table_name == Pegawai.__tablename__:
+        target = Pegawai.__table__
+    else:
+        target = table(table_name, *[column(col) for col in PEGAWAI_COLUMNS])
+    db.execute(insert(target), rows)
+
+
+def bulk_insert_pegawai(
+    db: Session,
+    rows: Iterable[Dict],
+    table_name: str = Pegawai.__tablename__,
+    batch_size: int = DEFAULT_BATCH_SIZE
+) -> int:
+    """
+    Insert employee rows in batches without going through the ORM unit of work.
+    Uses COPY FROM STDIN on PostgreSQL and executemany INSERT elsewhere (SQLite in tests).
+    The caller owns the transaction and must commit or roll back.
+
+    Args:
+        db: Database session
+        rows: Rows built with build_pegawai_row
+        table_name: Target table (pegawai or a staging table with the same columns)
+        batch_size: Rows per round trip
+
+    Returns:
+        int: Number of rows inserted
+    """
+    use_copy = db.get_bind().dialect.name == 'postgresql'
+    inserted = 0
+
+    for batch in _batches(rows, batch_size):
+        if use_copy:
+            _copy_batch(db, batch, table_name)
+        else:
+            _insert_batch(db, batch, table_name)
+        inserted += len(batch)
+
+    return inserted
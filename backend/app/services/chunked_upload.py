@@ -0,0 +1,274 @@
+from typing import Dict, Optional, Tuple
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+import threading
+import json
+import uuid
+import time
+import os
+import logging
+from app.services.ingest_jobs import INGEST_DIR, SUPPORTED_EXTENSIONS, KIND_FILE, KIND_WORKBOOK
+from app.services.multi_unit import WORKBOOK_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+# Partial uploads; inside the ingest directory so finalizing is a rename
+SESSION_DIR = INGEST_DIR / "sessions"
+
+# Sessions without a chunk for this long are removed
+SESSION_TTL_SECONDS = 24 * 60 * 60
+
+# Chunk size suggested to clients; within the default 1 MB request body limit of nginx
+RECOMMENDED_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class UploadSession:
+    """A resumable upload as reported by GET /upload/sessions/{id}."""
+    id: str
+    filename: str
+    kind: str
+    month: int
+    year: int
+    unit: Optional[str]
+    mode: str
+    size: Optional[int] = None
+    offset: int = 0
+    created_at: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class ChunkWriter:
+    """
+    Appends the body of one PUT to a session's file as it arrives.
+    Nothing is buffered: every piece is written before the next is read.
+    """
+
+    def __init__(self, handle, offset: int, size: Optional[int], release):
+        self._handle = handle
+        self.offset = offset
+        self._size = size
+        self._release = release
+
+    def write(self, data: bytes) -> int:
+        """
+        Raises:
+            ValueError: If the data goes past the size declared for the session
+        """
+        if self._size is not None and self.offset + len(data) > self._size:
+            raise ValueError(f"Chunk goes past the declared upload size of {self._size} bytes")
+        self._handle.write(data)
+        self.offset += len(data)
+        return self.offset
+
+    def close(self) -> int:
+        """Flush what was received (even after a dropped connection); returns the new offset."""
+        try:
+            self._handle.close()
+        finally:
+            self._release()
+        return self.offset
+
+
+class ChunkedUploadStore:
+    """
+    Resumable uploads written to disk chunk by chunk.
+
+    A session is a metadata file plus the data received so far. The size of
+    the data file is the resume offset, so a session survives an API restart
+    and any worker sharing the upload directory can continue it. Chunks of one
+    session are written one at a time.
+    """
+
+    def __init__(self, session_dir: Path = SESSION_DIR, ttl_seconds: int = SESSION_TTL_SECONDS):
+        self.session_dir = Path(session_dir)
+        self.ttl_seconds = ttl_seconds
+        self._busy = set()
+        self._lock = threading.Lock()
+
+    def _meta_path(self, session_id: str) -> Path:
+        return self.session_dir / f"{session_id}.json"
+
+    def data_path(self, session_id: str) -> Path:
+        return self.session_dir / f"{session_id}.part"
+
+    def _claim(self, session_id: str) -> None:
+        with self._lock:
+            if session_id in self._busy:
+                raise ValueError(f"Another chunk of upload session {session_id} is still being written")
+            self._busy.add(session_id)
+
+    def _release(self, session_id: str) -> None:
+        with self._lock:
+            self._busy.discard(session_id)
+
+    def create(
+        self,
+        filename: str,
+        kind: str,
+        month: int,
+        year: int,
+        unit: Optional[str],
+        mode: str,
+        size: Optional[int] = None
+    ) -> Dict:
+        """
+        Start a resumable upload.
+
+        Args:
+            filename: Original filename
+            kind: 'file' (one unit, like POST /upload) or 'workbook' (like POST /upload/workbook)
+            month: Month number
+            year: Year number
+            unit: Unit kerja (file uploads only)
+            mode: Upload mode
+            size: Total size in bytes, if known; finalizing then requires all of it
+
+        Returns:
+            Dict: The new session
+
+        Raises:
+            ValueError: If the file format is not supported for this kind
+        """
+        extension = Path(filename or "").suffix.lower()
+        if kind == KIND_WORKBOOK:
+            if extension not in WORKBOOK_EXTENSIONS:
+                raise ValueError(f"Unsupported file format: {filename}. Only .xlsx and .zip are supported.")
+        elif extension not in SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file format: {filename}. Only .xlsx and .csv are supported.")
+        if size is not None and size <= 0:
+            raise ValueError("Size must be a positive number of bytes")
+
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        self.remove_expired()
+
+        session = UploadSession(
+            id=uuid.uuid4().hex,
+            filename=filename,
+            kind=kind,
+            month=month,
+            year=year,
+            unit=unit if kind == KIND_FILE else None,
+            mode=mode,
+            size=size,
+            created_at=datetime.now().isoformat()
+        )
+        self.data_path(session.id).touch()
+        meta = session.to_dict()
+        del meta['offset']
+        temp_path = self.session_dir / f"{session.id}.json.tmp"
+        temp_path.write_text(json.dumps(meta))
+        os.replace(temp_path, self._meta_path(session.id))
+
+        logger.info(f"Started upload session {session.id} for {filename}")
+        return session.to_dict()
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        """Return a session with its current offset, or None if it does not exist."""
+        # Ids are generated hex strings; anything else cannot name a session file
+        if not session_id.isalnum():
+            return None
+        try:
+            meta = json.loads(self._meta_path(session_id).read_text())
+            offset = os.path.getsize(self.data_path(session_id))
+        except (OSError, ValueError):
+            return None
+        return UploadSession(offset=offset, **meta).to_dict()
+
+    def open_chunk(self, session_id: str, offset: int) -> Optional[ChunkWriter]:
+        """
+        Prepare to write a chunk that starts at `offset`.
+
+        Args:
+            session_id: Session id
+            offset: Byte position of the chunk; must be the session's current offset
+
+        Returns:
+            ChunkWriter, or None if the session does not exist
+
+        Raises:
+            ValueError: If the offset is not the current one or another chunk is being written
+        """
+        self._claim(session_id)
+        try:
+            session = self.get(session_id)
+            if session is None:
+                self._release(session_id)
+                return None
+            if offset != session['offset']:
+                raise ValueError(
+                    f"Chunk offset {offset} does not match the {session['offset']} bytes received so far"
+                )
+            handle = open(self.data_path(session_id), 'ab', buffering=0)
+        except Exception:
+            self._release(session_id)
+            raise
+        return ChunkWriter(handle, offset, session['size'], lambda: self._release(session_id))
+
+    def complete(self, session_id: str) -> Optional[Tuple[Dict, Path]]:
+        """
+        Close a session whose data is fully received.
+        The caller takes over the data file (e.g. hands it to the ingest queue).
+
+        Returns:
+            Tuple: (session, path of the received file), or None if the session does not exist
+
+        Raises:
+            ValueError: If data is missing or a chunk is still being written
+        """
+        self._claim(session_id)
+        try:
+            session = self.get(session_id)
+            if session is None:
+                return None
+            if session['offset'] == 0:
+                raise ValueError("No data has been uploaded for this session")
+            if session['size'] is not None and session['offset'] != session['size']:
+                raise ValueError(
+                    f"Upload incomplete: received {session['offset']} of {session['size']} bytes"
+                )
+            os.remove(self._meta_path(session_id))
+            return session, self.data_path(session_id)
+        finally:
+            self._release(session_id)
+
+    def discard(self, session_id: str) -> bool:
+        """Delete a session and its data; returns False if it does not exist."""
+        if not session_id.isalnum() or not self._meta_path(session_id).exists():
+            return False
+        for path in (self._meta_path(session_id), self.data_path(session_id)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return True
+
+    def remove_expired(self) -> int:
+        """Delete sessions that received nothing for ttl_seconds; returns how many."""
+        cutoff = time.time() - self.ttl_seconds
+        removed = 0
+        for meta_path in self.session_dir.glob("*.json"):
+            session_id = meta_path.stem
+            try:
+                last_write = max(meta_path.stat().st_mtime, self.data_path(session_id).stat().st_mtime)
+            except OSError:
+                last_write = 0
+            if last_write < cutoff and session_id not in self._busy and self.discard(session_id):
+                removed += 1
+        return removed
+
+
+_store: Optional[ChunkedUploadStore] = None
+_store_lock = threading.Lock()
+
+
+def get_upload_store() -> ChunkedUploadStore:
+    """Return the application-wide chunked upload store, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChunkedUploadStore()
+        return _store
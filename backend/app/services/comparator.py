@@ -1,6 +1,24 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
 from app.models.pegawai import Pegawai
-from dataclasses import dataclass
+from app.services.row_fingerprint import COMPARABLE_FIELDS, field_changes
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+
+# Statuses assigned by the comparison
+STATUS_NEW = 'Masuk'
+STATUS_DEPARTED = 'Keluar'
+STATUS_ACCOUNT_CHANGE = 'Rekening Berbeda'
+STATUS_UNCHANGED = 'Aktif'
+
+# Columns of a period frame, in Pegawai.to_dict() order
+FRAME_COLUMNS = [column.name for column in Pegawai.__table__.columns]
+
+# Frame columns only read by the comparison, left out of records as Pegawai.to_dict() does
+INTERNAL_COLUMNS = ['fingerprint']
+
+# Date/time columns rendered as ISO strings, as Pegawai.to_dict() does
+ISO_COLUMNS = ['tgl_lahir', 'created_at', 'updated_at']
 
 
 @dataclass
@@ -12,6 +30,7 @@ class ComparisonSummary:
     departed_count: int
     account_change_count: int
     unchanged_count: int
+    field_change_count: int = 0  # Employees in both months with at least one changed field
 
 
 @dataclass
@@ -22,6 +41,8 @@ class ComparisonResult:
     account_changes: List[Dict]  # Status Rekening Berbeda
     unchanged_employees: List[Dict]
     summary: ComparisonSummary
+    field_changes: List[Dict] = field(default_factory=list)  # {'id', 'nip', 'changes'} per changed employee
+    transfers: List[Dict] = field(default_factory=list)  # Pindah pairs found after write-back (transfers.detect_transfers)
 
 
 class EmployeeComparator:
@@ -123,10 +144,186 @@ class EmployeeComparator:
         
         return unchanged
     
+    @staticmethod
+    def classify(current: pd.DataFrame, previous: pd.DataFrame) -> pd.DataFrame:
+        """
+        Classify every employee of both months in one outer merge on NIP.
+        
+        Args:
+            current: Current month, with at least nip and nomor_rekening
+            previous: Comparison month, with at least nip and nomor_rekening
+            
+        Returns:
+            pd.DataFrame: One row per employee with nip, status, current_pos and
+            previous_pos (row positions in the inputs, -1 when absent) and
+            nomor_rekening_lama
+        """
+        left = pd.DataFrame({
+            'nip': current['nip'].to_numpy(),
+            'nomor_rekening': current['nomor_rekening'].to_numpy(),
+            'current_pos': np.arange(len(current))
+        })
+        right = pd.DataFrame({
+            'nip': previous['nip'].to_numpy(),
+            'nomor_rekening_lama': previous['nomor_rekening'].to_numpy(),
+            'previous_pos': np.arange(len(previous))
+        })
+        # NIPs are unique per period (uq_nip_month_year_unit); keep the last one otherwise
+        right = right.drop_duplicates('nip', keep='last')
+        
+        merged = left.merge(right, on='nip', how='outer', indicator=True, sort=False)
+        side = merged['_merge'].to_numpy()
+        changed = (side == 'both') & (merged['nomor_rekening'] != merged['nomor_rekening_lama']).to_numpy()
+        
+        return pd.DataFrame({
+            'nip': merged['nip'],
+            'status': np.select(
+                [side == 'left_only', side == 'right_only', changed],
+                [STATUS_NEW, STATUS_DEPARTED, STATUS_ACCOUNT_CHANGE],
+                STATUS_UNCHANGED
+            ),
+            'current_pos': merged['current_pos'].fillna(-1).astype(np.int64),
+            'previous_pos': merged['previous_pos'].fillna(-1).astype(np.int64),
+            'nomor_rekening_lama': merged['nomor_rekening_lama']
+        })
+    
+    @staticmethod
+    def _positions(classified: pd.DataFrame, status: str, side: str) -> pd.DataFrame:
+        """Rows of one status, in the order of the month they are taken from."""
+        return classified[classified['status'] == status].sort_values(side)
+    
+    @staticmethod
+    def _column_values(column: pd.Series) -> list:
+        """Plain Python values of one column (None for missing, ISO strings for dates)."""
+        if column.name in ISO_COLUMNS:
+            # Upload batches share timestamps and birth dates repeat; format each value once
+            codes, uniques = pd.factorize(column)
+            formatted = np.array([value.isoformat() for value in uniques] + [None], dtype=object)
+            return formatted[codes].tolist()
+        if column.hasnans:
+            return column.astype(object).where(column.notna(), None).tolist()
+        return column.tolist()
+    
+    @staticmethod
+    def _records(
+        frame: pd.DataFrame,
+        positions: np.ndarray,
+        status: str,
+        old_accounts: Optional[np.ndarray] = None
+    ) -> List[Dict]:
+        """Build Pegawai.to_dict()-shaped dictionaries for the given rows only."""
+        subset = frame.iloc[positions]
+        names = [name for name in subset.columns if name not in INTERNAL_COLUMNS]
+        columns = [EmployeeComparator._column_values(subset[name]) for name in names]
+        if 'status' in names:
+            columns[names.index('status')] = [status] * len(subset)
+        else:
+            names.append('status')
+            columns.append([status] * len(subset))
+        if old_accounts is not None:
+            names.append('nomor_rekening_lama')
+            columns.append(old_accounts.tolist())
+        return [dict(zip(names, values)) for values in zip(*columns)]
+    
+    @staticmethod
+    def diff_fields(current: pd.DataFrame, previous: pd.DataFrame, classified: pd.DataFrame) -> List[Dict]:
+        """
+        Field-level changes of employees present in both months.
+        
+        Fingerprints are checked first: rows with equal fingerprints have equal
+        COMPARABLE_FIELDS and are skipped, only the rest are diffed field by field.
+        Rows without a fingerprint (stored before it existed) are always diffed.
+        
+        Args:
+            current: Current month, with nip and COMPARABLE_FIELDS (id and fingerprint optional)
+            previous: Comparison month, same columns
+            classified: Output of classify(current, previous)
+            
+        Returns:
+            List[Dict]: {'id', 'nip', 'changes': [{'field', 'old', 'new'}]} per employee
+            with at least one changed field, in current month order
+        """
+        both = classified[(classified['current_pos'] >= 0) & (classified['previous_pos'] >= 0)]
+        both = both.sort_values('current_pos')
+        current_pos = both['current_pos'].to_numpy()
+        previous_pos = both['previous_pos'].to_numpy()
+        
+        if 'fingerprint' in current.columns and 'fingerprint' in previous.columns:
+            current_hash = current['fingerprint'].to_numpy()[current_pos]
+            previous_hash = previous['fingerprint'].to_numpy()[previous_pos]
+            candidates = pd.isna(current_hash) | pd.isna(previous_hash) | (current_hash != previous_hash)
+            current_pos = current_pos[candidates]
+            previous_pos = previous_pos[candidates]
+        
+        fields = [name for name in COMPARABLE_FIELDS if name in current.columns and name in previous.columns]
+        values = EmployeeComparator._column_values
+        current_rows = current.iloc[current_pos]
+        previous_rows = previous.iloc[previous_pos]
+        current_columns = {name: values(current_rows[name]) for name in fields}
+        previous_columns = {name: values(previous_rows[name]) for name in fields}
+        ids = values(current_rows['id']) if 'id' in current.columns else [None] * len(current_rows)
+        nips = values(current_rows['nip'])
+        
+        result = []
+        for index, (row_id, nip) in enumerate(zip(ids, nips)):
+            changes = field_changes(
+                {name: current_columns[name][index] for name in fields},
+                {name: previous_columns[name][index] for name in fields}
+            )
+            if changes:
+                result.append({'id': row_id, 'nip': nip, 'changes': changes})
+        return result
+    
+    @staticmethod
+    def compare_frames(current: pd.DataFrame, previous: pd.DataFrame) -> ComparisonResult:
+        """
+        Compare two months held as columnar frames (see month_utils.get_period_frame).
+        Same result as compare_months, without loading ORM objects: rows are
+        classified with one merge and only turned into dictionaries at the end.
+        
+        Args:
+            current: Current month, FRAME_COLUMNS (at least nip and nomor_rekening)
+            previous: Comparison month, same columns
+            
+        Returns:
+            ComparisonResult: Comprehensive comparison results with summary
+        """
+        classified = EmployeeComparator.classify(current, previous)
+        pick = EmployeeComparator._positions
+        
+        new_rows = pick(classified, STATUS_NEW, 'current_pos')
+        departed_rows = pick(classified, STATUS_DEPARTED, 'previous_pos')
+        changed_rows = pick(classified, STATUS_ACCOUNT_CHANGE, 'current_pos')
+        unchanged_rows = pick(classified, STATUS_UNCHANGED, 'current_pos')
+        
+        records = EmployeeComparator._records
+        changed_fields = EmployeeComparator.diff_fields(current, previous, classified)
+        summary = ComparisonSummary(
+            total_current=len(current),
+            total_previous=len(previous),
+            new_count=len(new_rows),
+            departed_count=len(departed_rows),
+            account_change_count=len(changed_rows),
+            unchanged_count=len(unchanged_rows),
+            field_change_count=len(changed_fields)
+        )
+        return ComparisonResult(
+            new_employees=records(current, new_rows['current_pos'].to_numpy(), STATUS_NEW),
+            departed_employees=records(previous, departed_rows['previous_pos'].to_numpy(), STATUS_DEPARTED),
+            account_changes=records(
+                current, changed_rows['current_pos'].to_numpy(), STATUS_ACCOUNT_CHANGE,
+                old_accounts=changed_rows['nomor_rekening_lama'].to_numpy()
+            ),
+            unchanged_employees=records(current, unchanged_rows['current_pos'].to_numpy(), STATUS_UNCHANGED),
+            summary=summary,
+            field_changes=changed_fields
+        )
+    
     @staticmethod
     def compare_months(current: List[Pegawai], previous: List[Pegawai]) -> ComparisonResult:
         """
         Compare two months of employee data and categorize all employees.
+        Classification is done by classify(); only the ORM objects are converted here.
         
         Args:
             current: List of employees in current month
@@ -135,44 +332,46 @@ class EmployeeComparator:
         Returns:
             ComparisonResult: Comprehensive comparison results with summary
         """
-        # Handle edge case: no comparison data
-        if not previous:
-            # All current employees are "new"
-            new_employees = current
-            departed_employees = []
-            account_changes = []
-            unchanged_employees = []
-        else:
-            # Identify all categories
-            new_employees = EmployeeComparator.identify_new_employees(current, previous)
-            departed_employees = EmployeeComparator.identify_departed_employees(current, previous)
-            account_changes = EmployeeComparator.identify_account_changes(current, previous)
-            unchanged_employees = EmployeeComparator.identify_unchanged_employees(current, previous)
+        # One classification pass; the frames also carry what diff_fields needs
+        diff_columns = ['id', 'nip'] + COMPARABLE_FIELDS + ['fingerprint']
+        current_frame = pd.DataFrame({name: [getattr(emp, name) for emp in current] for name in diff_columns})
+        previous_frame = pd.DataFrame({name: [getattr(emp, name) for emp in previous] for name in diff_columns})
+        classified = EmployeeComparator.classify(current_frame, previous_frame)
+        changed_fields = EmployeeComparator.diff_fields(current_frame, previous_frame, classified)
+        pick = EmployeeComparator._positions
+        new_employees = [current[pos] for pos in pick(classified, STATUS_NEW, 'current_pos')['current_pos']]
+        departed_employees = [previous[pos] for pos in pick(classified, STATUS_DEPARTED, 'previous_pos')['previous_pos']]
+        changed_rows = pick(classified, STATUS_ACCOUNT_CHANGE, 'current_pos')
+        account_changes = [
+            (current[pos], old_account)
+            for pos, old_account in zip(changed_rows['current_pos'], changed_rows['nomor_rekening_lama'])
+        ]
+        unchanged_employees = [current[pos] for pos in pick(classified, STATUS_UNCHANGED, 'current_pos')['current_pos']]
         
         # Convert to dictionaries for API response
         new_employees_dict = []
         for emp in new_employees:
             emp_dict = emp.to_dict()
-            emp_dict['status'] = 'Masuk'
+            emp_dict['status'] = STATUS_NEW
             new_employees_dict.append(emp_dict)
         
         departed_employees_dict = []
         for emp in departed_employees:
             emp_dict = emp.to_dict()
-            emp_dict['status'] = 'Keluar'
+            emp_dict['status'] = STATUS_DEPARTED
             departed_employees_dict.append(emp_dict)
         
         account_changes_dict = []
         for emp, old_account in account_changes:
             emp_dict = emp.to_dict()
-            emp_dict['status'] = 'Rekening Berbeda'
+            emp_dict['status'] = STATUS_ACCOUNT_CHANGE
             emp_dict['nomor_rekening_lama'] = old_account
             account_changes_dict.append(emp_dict)
         
         unchanged_employees_dict = []
         for emp in unchanged_employees:
             emp_dict = emp.to_dict()
-            emp_dict['status'] = 'Aktif'
+            emp_dict['status'] = STATUS_UNCHANGED
             unchanged_employees_dict.append(emp_dict)
         
         # Create summary
@@ -182,7 +381,8 @@ class EmployeeComparator:
             new_count=len(new_employees),
             departed_count=len(departed_employees),
             account_change_count=len(account_changes),
-            unchanged_count=len(unchanged_employees)
+            unchanged_count=len(unchanged_employees),
+            field_change_count=len(changed_fields)
         )
         
         # Return comparison result
@@ -191,5 +391,6 @@ class EmployeeComparator:
             departed_employees=departed_employees_dict,
             account_changes=account_changes_dict,
             unchanged_employees=unchanged_employees_dict,
-            summary=summary
+            summary=summary,
+            field_changes=changed_fields
         )
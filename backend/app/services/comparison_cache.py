@@ -0,0 +1,96 @@
+from typing import Dict, Hashable, Optional, Tuple
+from collections import OrderedDict
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Responses kept; each holds every row of one unit/month
+DEFAULT_CACHE_SIZE = 16
+
+
+class ComparisonCache:
+    """
+    Least-recently-used cache of POST /compare responses.
+
+    Entries are keyed by request and hold the data version stamps of both
+    periods they were computed from (data_version.get_version_stamp). Callers
+    read the stamps from the database on every request; an entry whose stamps
+    no longer match is evicted, never served.
+
+    The cache lives in process memory: with several API workers each keeps its
+    own, and they stay correct because versions are only compared through the
+    database, never invalidated in memory alone.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries if max_entries is not None else int(
+            os.getenv("COMPARE_CACHE_SIZE", DEFAULT_CACHE_SIZE)
+        )
+        self._entries: "OrderedDict[Hashable, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, stamp: Tuple) -> Optional[Dict]:
+        """
+        Cached response of a request, if it was computed at the data versions in stamp.
+
+        Args:
+            key: Request (unit, periods, engine, ...)
+            stamp: Data version stamps of the periods compared, as read now
+
+        Returns:
+            Dict: The response, or None (an entry from other versions is dropped)
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != stamp:
+                del self._entries[key]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, stamp: Tuple, value: Dict) -> None:
+        """Cache a response computed at the data versions in stamp (read before computing it)."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry of this process (e.g. after a database restore, which also bumps every version)."""
+        with self._lock:
+            self._entries.clear()
+        logger.info("Comparison cache cleared")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+_cache: Optional[ComparisonCache] = None
+
+
+def get_comparison_cache() -> ComparisonCache:
+    """Return the application-wide comparison cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = ComparisonCache()
+    return _cache
@@ -0,0 +1,136 @@
+from typing import Iterable, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import select, update, func, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.pegawai import Pegawai
+from app.models.period_version import PeriodVersion
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _bump_statement(db: Session, replaced: bool):
+    """INSERT ... ON CONFLICT (unit, month, year) DO UPDATE SET version = version + 1."""
+    table = PeriodVersion.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        statement = postgresql.insert(table)
+        conflict_target = {'constraint': 'uq_period_version_unit_month_year'}
+    elif dialect == 'sqlite':
+        statement = sqlite.insert(table)
+        conflict_target = {'index_elements': ['unit', 'month', 'year']}
+    else:
+        raise ValueError(f"Period versions are not supported on {dialect}")
+
+    bumped = {'version': table.c.version + 1, 'updated_at': datetime.now()}
+    if replaced:
+        bumped['replace_version'] = table.c.replace_version + 1
+    return statement.on_conflict_do_update(**conflict_target, set_=bumped)
+
+
+def bump_versions(db: Session, periods: Iterable[Tuple[str, int, int]], replaced: bool = False) -> None:
+    """
+    Mark (unit, month, year) periods as changed, invalidating cached comparisons
+    that read them, and recount their rows. Call in the transaction of the
+    write, after it; the caller commits.
+
+    Args:
+        db: Database session
+        periods: (unit, month, year) of every period written
+        replaced: Rows may have been deleted or replaced (uploads, admin delete),
+            not only edited; also bumps replace_version
+    """
+    rows = [
+        {'unit': unit, 'month': month, 'year': year, 'version': 1, 'replace_version': 1 if replaced else 0}
+        for unit, month, year in dict.fromkeys(periods)
+    ]
+    if rows:
+        db.execute(_bump_statement(db, replaced), rows)
+        db.execute(
+            update(PeriodVersion)
+            .where(tuple_(PeriodVersion.unit, PeriodVersion.month, PeriodVersion.year).in_(
+                [(row['unit'], row['month'], row['year']) for row in rows]
+            ))
+            .values(row_count=select(func.count(Pegawai.id)).where(
+                Pegawai.unit == PeriodVersion.unit,
+                Pegawai.month == PeriodVersion.month,
+                Pegawai.year == PeriodVersion.year
+            ).scalar_subquery())
+            .execution_options(synchronize_session=False)
+        )
+        logger.debug(f"Bumped data version of {len(rows)} periods")
+
+
+def bump_version(db: Session, unit: str, month: int, year: int, replaced: bool = False) -> None:
+    """Mark one unit/month/year as changed (see bump_versions)."""
+    bump_versions(db, [(unit, month, year)], replaced)
+
+
+def bump_all_versions(db: Session) -> None:
+    """
+    Mark every period with rows or a version as replaced, e.g. after a database
+    restore, which rewrites pegawai and period_version wholesale (possibly
+    rewinding versions). Cached comparisons and stored outcomes of every API
+    worker stop matching. The caller commits.
+    """
+    periods = db.execute(
+        select(Pegawai.unit, Pegawai.month, Pegawai.year)
+        .union(select(PeriodVersion.unit, PeriodVersion.month, PeriodVersion.year))
+    ).all()
+    bump_versions(db, [tuple(period) for period in periods], replaced=True)
+    logger.info(f"Bumped data version of all {len(periods)} periods")
+
+
+def get_version_stamp(db: Session, unit: str, month: int, year: int) -> Tuple[int, Optional[datetime]]:
+    """
+    Current data version of one unit/month/year with the time it was set.
+    Unlike the version alone, a stamp read after a restore (see
+    bump_all_versions) never equals one read before it.
+
+    Returns:
+        Tuple: (version, updated_at), (0, None) for a period never written
+        since versions were introduced
+    """
+    row = db.execute(
+        select(PeriodVersion.version, PeriodVersion.updated_at).where(
+            PeriodVersion.unit == unit,
+            PeriodVersion.month == month,
+            PeriodVersion.year == year
+        )
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def get_version(db: Session, unit: str, month: int, year: int) -> int:
+    """
+    Current data version of one unit/month/year.
+
+    Returns:
+        int: 0 for a period never written since versions were introduced
+    """
+    version = db.execute(
+        select(PeriodVersion.version).where(
+            PeriodVersion.unit == unit,
+            PeriodVersion.month == month,
+            PeriodVersion.year == year
+        )
+    ).scalar()
+    return version or 0
+
+
+def get_replace_version(db: Session, unit: str, month: int, year: int) -> int:
+    """
+    Number of uploads and deletes of one unit/month/year (see bump_versions).
+
+    Returns:
+        int: 0 for a period never replaced since versions were introduced
+    """
+    version = db.execute(
+        select(PeriodVersion.replace_version).where(
+            PeriodVersion.unit == unit,
+            PeriodVersion.month == month,
+            PeriodVersion.year == year
+        )
+    ).scalar()
+    return version or 0
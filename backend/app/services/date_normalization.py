@@ -0,0 +1,157 @@
+from typing import List
+from datetime import datetime, date, timedelta
+import numbers
+import numpy as np
+import pandas as pd
+
+
+# Date formats accepted for Tanggal Lahir, in the order they are tried
+DATE_FORMATS = [
+    '%Y-%m-%d',      # 2023-12-31
+    '%d/%m/%Y',      # 31/12/2023
+    '%d-%m-%Y',      # 31-12-2023
+    '%Y/%m/%d',      # 2023/12/31
+]
+
+# Excel stores dates as days since 1899-12-30 (the 1900 leap-year bug included)
+EXCEL_EPOCH = date(1899, 12, 30)
+MAX_EXCEL_SERIAL = 2958465  # 9999-12-31
+# Largest serial that still fits a pandas Timestamp; later ones use parse_date
+MAX_TIMESTAMP_SERIAL = (pd.Timestamp.max.date() - EXCEL_EPOCH).days
+
+# Text values looked at when ranking DATE_FORMATS for a column
+INFERENCE_SAMPLE_SIZE = 1000
+
+
+def _is_serial(value) -> bool:
+    """Numeric cell values that can be an Excel date serial."""
+    return (
+        isinstance(value, numbers.Real)
+        and not isinstance(value, (bool, np.bool_))
+        and 1 <= value <= MAX_EXCEL_SERIAL
+    )
+
+
+def parse_date(value) -> date:
+    """
+    Parse one Tanggal Lahir cell to a date object.
+    Per-row fallback of normalize_dates; accepts the same values.
+
+    Args:
+        value: Text in one of DATE_FORMATS, a date/datetime/Timestamp,
+            or an Excel serial number
+
+    Returns:
+        date: The parsed date
+
+    Raises:
+        ValueError: If the value is not a date
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if _is_serial(value):
+        return EXCEL_EPOCH + timedelta(days=int(value))
+    if isinstance(value, str):
+        text = value.strip()
+        for date_format in DATE_FORMATS:
+            try:
+                return datetime.strptime(text, date_format).date()
+            except ValueError:
+                continue
+
+    raise ValueError(f"Unable to parse date: {value}")
+
+
+def infer_date_formats(text: pd.Series) -> List[str]:
+    """
+    Rank DATE_FORMATS by how many values of a sample each one parses.
+    Ties keep the DATE_FORMATS order.
+
+    Args:
+        text: Stripped date strings
+
+    Returns:
+        List[str]: All of DATE_FORMATS, dominant format first
+    """
+    sample = text.head(INFERENCE_SAMPLE_SIZE)
+    hits = [
+        int(pd.to_datetime(sample, format=date_format, errors='coerce').notna().sum())
+        for date_format in DATE_FORMATS
+    ]
+    order = sorted(range(len(DATE_FORMATS)), key=lambda index: -hits[index])
+    return [DATE_FORMATS[index] for index in order]
+
+
+def normalize_dates(series: pd.Series) -> pd.Series:
+    """
+    Convert a Tanggal Lahir column to date objects in a few vectorized passes.
+
+    Date/Timestamp cells are taken as they are and numbers as Excel serials.
+    Text is converted with the column's dominant format first, then with the
+    remaining formats on whatever is still unparsed; only rows pandas cannot
+    represent (e.g. years outside the Timestamp range) go through parse_date.
+
+    Args:
+        series: Raw cell values of one column
+
+    Returns:
+        pd.Series: date objects (object dtype, same index); None where the
+        value is missing or not a date
+    """
+    values = series.to_numpy(dtype=object)
+    result = np.full(len(values), None, dtype=object)
+    if not len(values):
+        return pd.Series(result, index=series.index, dtype=object)
+
+    present = series.notna().to_numpy()
+    if pd.api.types.is_datetime64_any_dtype(series):
+        is_datetime = present
+        is_serial = np.zeros(len(values), dtype=bool)
+        is_text = np.zeros(len(values), dtype=bool)
+    else:
+        kinds = pd.Series(values).map(type)
+        is_text = kinds.map(lambda kind: issubclass(kind, str)).to_numpy(dtype=bool)
+        is_datetime = kinds.map(lambda kind: issubclass(kind, date)).to_numpy(dtype=bool) & present
+        is_serial = np.fromiter((_is_serial(value) for value in values), dtype=bool, count=len(values))
+        is_serial &= ~is_text & ~is_datetime
+
+    rows = is_datetime.nonzero()[0]
+    if len(rows):
+        parsed = pd.to_datetime(pd.Series(values[rows]), errors='coerce')
+        converted = parsed.notna().to_numpy()
+        result[rows[converted]] = parsed[converted].dt.date.to_numpy()
+        # Plain dates pandas cannot represent as Timestamps
+        for row in rows[~converted]:
+            result[row] = parse_date(values[row])
+
+    rows = is_serial.nonzero()[0]
+    if len(rows):
+        days = np.floor(pd.to_numeric(pd.Series(values[rows]))).astype('int64').to_numpy()
+        fits = days <= MAX_TIMESTAMP_SERIAL
+        parsed = pd.Timestamp(EXCEL_EPOCH) + pd.to_timedelta(days[fits], unit='D')
+        result[rows[fits]] = parsed.date
+        for row in rows[~fits]:
+            result[row] = parse_date(values[row])
+
+    rows = is_text.nonzero()[0]
+    if len(rows):
+        stripped = pd.Series(values[rows]).str.strip()
+        pending = (stripped != '').to_numpy()
+        for date_format in infer_date_formats(stripped[pending]):
+            if not pending.any():
+                break
+            positions = pending.nonzero()[0]
+            parsed = pd.to_datetime(stripped.iloc[positions], format=date_format, errors='coerce')
+            converted = parsed.notna().to_numpy()
+            result[rows[positions[converted]]] = parsed[converted].dt.date.to_numpy()
+            pending[positions[converted]] = False
+
+        for position in pending.nonzero()[0]:
+            try:
+                result[rows[position]] = parse_date(stripped.iat[position])
+            except ValueError:
+                continue
+
+    return pd.Series(result, index=series.index, dtype=object)
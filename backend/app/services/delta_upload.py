@@ -0,0 +1,372 @@
+from typing import Union, BinaryIO, Optional, Callable, List
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, Text, Integer, DateTime, select, insert, delete, literal, and_
+from sqlalchemy.orm import Session
+from app.models.pegawai import Pegawai
+from app.services.excel_parser import ExcelParser
+from app.services.validation import validate_employee_frame
+from app.services.date_normalization import normalize_dates
+from app.services.bulk_insert import PEGAWAI_COLUMNS, build_pegawai_row, bulk_insert_pegawai
+from app.services.memory_usage import PeakRSSTracker
+from app.services.month_utils import get_previous_month
+from app.services.staging import (
+    create_staging_table,
+    drop_staging_table,
+    check_staging_table,
+    MAX_REPORTED_ROWS,
+    on_roster
+)
+import pandas as pd
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Column of a delta upload telling what to do with each row
+ACTION_COLUMN = 'Aksi'
+
+ACTION_ADD = 'TAMBAH'       # new employee: every field required, NIP must not be in the previous month
+ACTION_EDIT = 'UBAH'        # changed employee: every field required, NIP must be in the previous month
+ACTION_REMOVE = 'HAPUS'     # employee gone: only NIP required
+DELTA_ACTIONS = [ACTION_ADD, ACTION_EDIT, ACTION_REMOVE]
+
+# English spellings accepted as well
+ACTION_ALIASES = {'ADD': ACTION_ADD, 'EDIT': ACTION_EDIT, 'REMOVE': ACTION_REMOVE}
+
+
+def parse_actions(series: pd.Series) -> pd.Series:
+    """
+    Normalize an Aksi column, ignoring case and surrounding spaces.
+
+    Returns:
+        pd.Series: One of DELTA_ACTIONS per row, or None where the value is not an action
+    """
+    text = series.map(lambda value: str(value).strip().upper() if value is not None else '')
+    actions = text.map(lambda value: ACTION_ALIASES.get(value, value))
+    return actions.where(actions.isin(DELTA_ACTIONS), None)
+
+
+def validate_delta_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validate one batch of a delta upload.
+    HAPUS rows only need a valid NIP; TAMBAH and UBAH rows follow every rule of
+    validate_employee_frame.
+
+    Args:
+        df: Batch with the Excel columns plus ACTION_COLUMN
+
+    Returns:
+        pd.DataFrame: Error table with columns 'row' (0-based position) and 'message'
+
+    Raises:
+        ValueError: If the Aksi column is missing
+    """
+    if ACTION_COLUMN not in df.columns:
+        raise ValueError(
+            f"Missing required columns: {ACTION_COLUMN}. "
+            f"Delta uploads mark every row with {', '.join(DELTA_ACTIONS)}"
+        )
+
+    actions = parse_actions(df[ACTION_COLUMN]).to_numpy()
+    positions = pd.RangeIndex(len(df)).to_numpy()
+    removals = actions == ACTION_REMOVE
+    parts = []
+
+    invalid = pd.isna(actions)
+    if invalid.any():
+        parts.append(pd.DataFrame({
+            'row': positions[invalid],
+            'order': 0,
+            'message': f"{ACTION_COLUMN} must be one of {', '.join(DELTA_ACTIONS)}"
+        }))
+
+    full = validate_employee_frame(df[~removals])
+    if not full.empty:
+        parts.append(pd.DataFrame({
+            'row': positions[~removals][full['row'].to_numpy()],
+            'order': 1,
+            'message': full['message'].to_numpy()
+        }))
+
+    nip_only = validate_employee_frame(df.loc[removals, ['NIP']])
+    nip_only = nip_only[nip_only['message'].str.startswith('NIP')]
+    if not nip_only.empty:
+        parts.append(pd.DataFrame({
+            'row': positions[removals][nip_only['row'].to_numpy()],
+            'order': 1,
+            'message': nip_only['message'].to_numpy()
+        }))
+
+    if not parts:
+        return pd.DataFrame({'row': pd.Series(dtype='int64'), 'message': pd.Series(dtype=object)})
+
+    errors = pd.concat(parts, ignore_index=True).sort_values(['row', 'order'], kind='stable')
+    return errors[['row', 'message']].reset_index(drop=True)
+
+
+def _create_removal_table(db: Session) -> Table:
+    """Temporary table holding the NIPs marked HAPUS."""
+    removals = Table(
+        f"pegawai_removed_{uuid.uuid4().hex[:12]}",
+        MetaData(),
+        Column('nip', Text()),
+        prefixes=['TEMPORARY']
+    )
+    removals.create(bind=db.connection())
+    return removals
+
+
+def _load_delta(
+    db: Session,
+    source: Union[str, BinaryIO],
+    filename: str,
+    unit: str,
+    month: int,
+    year: int,
+    changes: Table,
+    removals: Table,
+    tracker: Optional[PeakRSSTracker],
+    progress: Optional[Callable[[int], None]],
+    sheet_name: Optional[str]
+) -> int:
+    """Load TAMBAH/UBAH rows into `changes` (action kept in status) and HAPUS NIPs into `removals`."""
+    now = datetime.now()
+    loaded = 0
+
+    for batch in ExcelParser.iter_batches(source, filename, None, sheet_name):
+        actions = parse_actions(batch[ACTION_COLUMN])
+        removed = batch[actions == ACTION_REMOVE]
+        changed = batch[actions != ACTION_REMOVE]
+
+        rows = []
+        dates = normalize_dates(changed['Tanggal Lahir']).tolist()
+        for (employee, tgl_lahir), action in zip(zip(changed.to_dict('records'), dates), actions[changed.index]):
+            if tgl_lahir is None:
+                raise ValueError(
+                    f"Error storing employee {employee.get('NIP')}: "
+                    f"Unable to parse date: {employee['Tanggal Lahir']}"
+                )
+            row = build_pegawai_row(employee, tgl_lahir, unit, month, year, now)
+            row['status'] = action
+            rows.append(row)
+        loaded += bulk_insert_pegawai(db, rows, table_name=changes.name)
+
+        if len(removed):
+            db.execute(insert(removals), [{'nip': str(nip).strip()} for nip in removed['NIP']])
+            loaded += len(removed)
+
+        if tracker:
+            tracker.sample()
+        if progress:
+            progress(loaded)
+
+    return loaded
+
+
+def _check_delta(
+    db: Session,
+    changes: Table,
+    removals: Table,
+    unit: str,
+    month: int,
+    year: int,
+    prev_month: int,
+    prev_year: int
+) -> List[str]:
+    """Check the loaded delta against the previous month and the rows kept in the new one."""
+    base = select(Pegawai.nip).where(
+        Pegawai.unit == unit,
+        Pegawai.month == prev_month,
+        Pegawai.year == prev_year,
+        on_roster()
+    )
+    previous = f"{unit} {prev_month}/{prev_year}"
+    errors = []
+
+    added_existing = db.execute(
+        select(changes.c.nip)
+        .where(changes.c.status == ACTION_ADD, changes.c.nip.in_(base))
+        .order_by(changes.c.nip).limit(MAX_REPORTED_ROWS)
+    ).scalars().all()
+    errors.extend(f"NIP {nip} is already in {previous}; use {ACTION_EDIT} to change it" for nip in added_existing)
+
+    edited_missing = db.execute(
+        select(changes.c.nip)
+        .where(changes.c.status == ACTION_EDIT, changes.c.nip.notin_(base))
+        .order_by(changes.c.nip).limit(MAX_REPORTED_ROWS)
+    ).scalars().all()
+    errors.extend(f"NIP {nip} is not in {previous}; use {ACTION_ADD} to add it" for nip in edited_missing)
+
+    removed_missing = db.execute(
+        select(removals.c.nip)
+        .where(removals.c.nip.notin_(base))
+        .order_by(removals.c.nip).limit(MAX_REPORTED_ROWS)
+    ).scalars().all()
+    errors.extend(f"NIP {nip} to remove is not in {previous}" for nip in removed_missing)
+
+    # Carried-over employees collide with rows comparison already wrote for the new month
+    carried_conflicts = db.execute(
+        select(Pegawai.nip, Pegawai.status)
+        .where(
+            Pegawai.unit == unit,
+            Pegawai.month == month,
+            Pegawai.year == year,
+            Pegawai.status != 'Aktif',
+            Pegawai.nip.in_(base),
+            Pegawai.nip.notin_(select(changes.c.nip)),
+            Pegawai.nip.notin_(select(removals.c.nip))
+        )
+        .order_by(Pegawai.nip).limit(MAX_REPORTED_ROWS)
+    ).all()
+    errors.extend(
+        f"NIP {nip} is already recorded as '{status}' for {unit} {month}/{year}"
+        for nip, status in carried_conflicts
+    )
+
+    return errors
+
+
+def _materialize(
+    db: Session,
+    changes: Table,
+    removals: Table,
+    unit: str,
+    month: int,
+    year: int,
+    prev_month: int,
+    prev_year: int
+) -> int:
+    """
+    Replace the 'Aktif' rows of the new month with the previous roster minus the
+    changed and removed NIPs, plus the changed rows: three statements, no rows
+    pass through Python.
+    """
+    now = datetime.now()
+    deleted = db.execute(
+        delete(Pegawai).where(and_(
+            Pegawai.month == month,
+            Pegawai.year == year,
+            Pegawai.unit == unit,
+            Pegawai.status == 'Aktif'
+        ))
+    ).rowcount
+
+    # Roster rows keep their data and fingerprint; the rest is set for the new month
+    copied = {
+        'status': literal('Aktif'),
+        'manual_override': literal(0, Integer),
+        'unit': literal(unit),
+        'month': literal(month, Integer),
+        'year': literal(year, Integer),
+        'created_at': literal(now, DateTime),
+        'updated_at': literal(now, DateTime)
+    }
+    carried = db.execute(
+        insert(Pegawai.__table__).from_select(
+            PEGAWAI_COLUMNS,
+            select(*[copied.get(name, getattr(Pegawai, name)) for name in PEGAWAI_COLUMNS]).where(
+                Pegawai.unit == unit,
+                Pegawai.month == prev_month,
+                Pegawai.year == prev_year,
+                on_roster(),
+                Pegawai.nip.notin_(select(changes.c.nip)),
+                Pegawai.nip.notin_(select(removals.c.nip))
+            )
+        )
+    ).rowcount
+
+    applied = db.execute(
+        insert(Pegawai.__table__).from_select(
+            PEGAWAI_COLUMNS,
+            select(*[
+                literal('Aktif').label('status') if name == 'status' else changes.c[name]
+                for name in PEGAWAI_COLUMNS
+            ])
+        )
+    ).rowcount
+
+    logger.info(
+        f"Delta for {unit} {month}/{year}: {deleted} 'Aktif' rows replaced by "
+        f"{carried} carried over from {prev_month}/{prev_year} and {applied} added or changed"
+    )
+    return carried + applied
+
+
+def apply_delta(
+    db: Session,
+    source: Union[str, BinaryIO],
+    filename: str,
+    unit: str,
+    month: int,
+    year: int,
+    tracker: Optional[PeakRSSTracker] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    sheet_name: Optional[str] = None
+) -> int:
+    """
+    Build a month from the previous month's roster and a file of changes only.
+
+    The delta is loaded into temporary tables and checked there; the previous
+    roster (see staging.on_roster) is copied inside the
+    database, so the work grows with the number of changes, not the headcount.
+    Everything is committed in one transaction. Keluar, Pensiun, etc. already
+    written for the new month are preserved, as with a full upload.
+
+    Args:
+        db: Database session
+        source: Path or seekable file object (already checked with scan_upload in delta mode)
+        filename: Original filename
+        unit: Unit kerja
+        month: Month number
+        year: Year number
+        tracker: Optional peak RSS tracker
+        progress: Optional callback receiving the running count of loaded delta rows
+        sheet_name: Worksheet of an .xlsx file (defaults to the active sheet)
+
+    Returns:
+        int: Number of 'Aktif' rows in the new month
+
+    Raises:
+        ValueError: No previous month to apply the delta to, or the delta does not fit it
+        IntegrityError: If the database rejects the rows
+    """
+    prev_month, prev_year = get_previous_month(month, year)
+    base_rows = db.query(Pegawai.id).filter(
+        Pegawai.unit == unit,
+        Pegawai.month == prev_month,
+        Pegawai.year == prev_year,
+        on_roster()
+    ).first()
+    if base_rows is None:
+        raise ValueError(
+            f"No data found for {unit} {prev_month}/{prev_year} to apply the changes to. "
+            f"Upload the full roster instead."
+        )
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    changes = create_staging_table(db)
+    removals = _create_removal_table(db)
+    try:
+        loaded = _load_delta(
+            db, source, filename, unit, month, year, changes, removals, tracker, progress, sheet_name
+        )
+
+        errors = check_staging_table(db, changes, unit, month, year)
+        errors += _check_delta(db, changes, removals, unit, month, year, prev_month, prev_year)
+        if errors:
+            raise ValueError(f"Delta checks failed: {'; '.join(errors)}")
+
+        stored_count = _materialize(db, changes, removals, unit, month, year, prev_month, prev_year)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        drop_staging_table(db, changes)
+        removals.drop(bind=db.connection(), checkfirst=True)
+        db.commit()
+
+    logger.info(f"Applied {loaded} changes to {unit} {month}/{year}: {stored_count} employees")
+    return stored_count
@@ -1,7 +1,12 @@
 import pandas as pd
 from fastapi import UploadFile
-from typing import List, Dict
+from typing import List, Dict, Iterator, Union, BinaryIO, Optional
+from openpyxl import load_workbook
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import csv
 import io
+import os
 
 
 class ExcelParser:
@@ -22,6 +27,24 @@ class ExcelParser:
         'Nomor Rekening'
     ]
     
+    # Columns read as text: identity numbers keep their leading zeros and are never
+    # turned into floats. Tanggal Lahir keeps date cells as dates for the normalizer.
+    STRING_COLUMNS = [
+        'NIP',
+        'Nama',
+        'NIK',
+        'NPWP',
+        'Kode Bank',
+        'Nama Bank',
+        'Nomor Rekening'
+    ]
+    
+    # Rows per batch in streaming mode
+    BATCH_SIZE = 5000
+    
+    # Bytes of CSV parsed per pyarrow block
+    CSV_BLOCK_SIZE = 1 << 20
+    
     @staticmethod
     async def parse_file(file: UploadFile) -> pd.DataFrame:
         """
@@ -42,9 +65,18 @@ class ExcelParser:
             
             # Determine file type and parse accordingly
             if file.filename.endswith('.xlsx'):
-                df = pd.read_excel(io.BytesIO(content), engine='openpyxl')
+                df = pd.read_excel(
+                    io.BytesIO(content),
+                    engine='openpyxl',
+                    dtype={column: object for column in ExcelParser.STRING_COLUMNS}
+                )
+                df = ExcelParser._text_columns(df)
             elif file.filename.endswith('.csv'):
-                df = pd.read_csv(io.BytesIO(content))
+                source = io.BytesIO(content)
+                names = ExcelParser._csv_header(source)
+                df = pacsv.read_csv(
+                    source, convert_options=ExcelParser._csv_convert_options(names)
+                ).to_pandas()
             else:
                 raise ValueError(f"Unsupported file format: {file.filename}. Only .xlsx and .csv are supported.")
             
@@ -67,8 +99,24 @@ class ExcelParser:
         Raises:
             ValueError: If required columns are missing
         """
-        # Get actual columns from DataFrame
-        actual_columns = set(df.columns)
+        return ExcelParser.validate_header(df.columns)
+    
+    @staticmethod
+    def validate_header(columns) -> bool:
+        """
+        Validate that all required columns are present in a header row.
+        
+        Args:
+            columns: Column names read from the file
+            
+        Returns:
+            bool: True if all required columns are present
+            
+        Raises:
+            ValueError: If required columns are missing
+        """
+        # Get actual columns from header
+        actual_columns = set(columns)
         required_columns = set(ExcelParser.REQUIRED_COLUMNS)
         
         # Check for missing columns
@@ -102,15 +150,16 @@ class ExcelParser:
         return records
     
     @staticmethod
-    async def parse_and_validate(file: UploadFile) -> List[Dict]:
+    async def parse_frame(file: UploadFile) -> pd.DataFrame:
         """
-        Parse Excel file and validate columns in one step.
+        Parse Excel file and validate columns, keeping the data as a DataFrame.
+        Used by the vectorized validation path.
         
         Args:
             file: UploadFile object from FastAPI
             
         Returns:
-            List[Dict]: List of employee records as dictionaries
+            pd.DataFrame: Parsed data with NaN values replaced by None
             
         Raises:
             ValueError: If parsing or validation fails
@@ -121,7 +170,219 @@ class ExcelParser:
         # Validate columns
         ExcelParser.validate_columns(df)
         
+        # Replace NaN values with None
+        return df.astype(object).where(pd.notna(df), None)
+    
+    @staticmethod
+    async def parse_and_validate(file: UploadFile) -> List[Dict]:
+        """
+        Parse Excel file and validate columns in one step.
+        
+        Args:
+            file: UploadFile object from FastAPI
+            
+        Returns:
+            List[Dict]: List of employee records as dictionaries
+            
+        Raises:
+            ValueError: If parsing or validation fails
+        """
+        df = await ExcelParser.parse_frame(file)
+        
         # Convert to list of dictionaries
-        records = ExcelParser.to_dict_list(df)
+        return df.to_dict('records')
+    
+    @staticmethod
+    def _xlsx_batches(source, batch_size: int, sheet_name: Optional[str] = None) -> Iterator:
+        """
+        Yield the header row, then row batches from the active (or named) sheet using
+        openpyxl read-only mode. Only one batch of cell values is held in memory at a time.
+        """
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            sheet = workbook[sheet_name] if sheet_name else workbook.active
+            rows = sheet.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [
+                str(name) if name is not None else f"Unnamed: {idx}"
+                for idx, name in enumerate(header)
+            ]
+            yield columns
+            
+            batch = []
+            for row in rows:
+                # Skip completely empty rows (openpyxl reports formatted blank rows too)
+                if all(value is None for value in row):
+                    continue
+                batch.append(row[:len(columns)])
+                if len(batch) >= batch_size:
+                    yield ExcelParser._text_columns(pd.DataFrame.from_records(batch, columns=columns))
+                    batch = []
+            if batch:
+                yield ExcelParser._text_columns(pd.DataFrame.from_records(batch, columns=columns))
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def sheet_names(source: Union[str, BinaryIO]) -> List[str]:
+        """
+        List the worksheet names of an .xlsx file without loading its cells.
         
-        return records
+        Raises:
+            ValueError: If the workbook cannot be opened
+        """
+        try:
+            workbook = load_workbook(source, read_only=True)
+        except Exception as e:
+            raise ValueError(f"Failed to parse file: {str(e)}")
+        try:
+            return list(workbook.sheetnames)
+        finally:
+            workbook.close()
+    
+    @staticmethod
+    def _cell_text(value):
+        """Text of a spreadsheet cell as typed, without a trailing '.0' on whole numbers."""
+        if value is None or isinstance(value, str):
+            return value
+        if isinstance(value, float):
+            if value != value:
+                return None
+            if value.is_integer():
+                return str(int(value))
+        return str(value)
+    
+    @staticmethod
+    def _text_columns(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert the STRING_COLUMNS of a batch read from .xlsx to text and the
+        other empty cells to None.
+        """
+        df = df.astype(object).where(pd.notna(df), None)
+        for column in ExcelParser.STRING_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].map(ExcelParser._cell_text)
+        return df
+    
+    @staticmethod
+    def _csv_header(source) -> List[str]:
+        """
+        Read the column names of a CSV file and leave the source where it was.
+        
+        Raises:
+            ValueError: If the file is empty
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as handle:
+                line = handle.readline()
+        else:
+            start = source.tell()
+            line = source.readline()
+            source.seek(start)
+        
+        names = next(csv.reader([line.decode('utf-8-sig')]), None)
+        if not names:
+            raise ValueError("No columns to parse from file")
+        return names
+    
+    @staticmethod
+    def _csv_convert_options(names: List[str]) -> pacsv.ConvertOptions:
+        """
+        Every column as a nullable string. Nothing is inferred, so a block that
+        looks numeric never changes the type of a later block.
+        """
+        return pacsv.ConvertOptions(
+            column_types={name: pa.string() for name in names},
+            strings_can_be_null=True
+        )
+    
+    @staticmethod
+    def _csv_batches(source, batch_size: int) -> Iterator:
+        """
+        Yield the header row, then row batches from a CSV file, parsed block by
+        block with the pyarrow streaming reader and re-cut to batch_size rows.
+        Every column arrives as str or None, so batches need no further cleanup.
+        """
+        names = ExcelParser._csv_header(source)
+        yield names
+        
+        reader = pacsv.open_csv(
+            source,
+            read_options=pacsv.ReadOptions(block_size=ExcelParser.CSV_BLOCK_SIZE),
+            convert_options=ExcelParser._csv_convert_options(names)
+        )
+        try:
+            pending = pa.Table.from_batches([], schema=reader.schema)
+            for record_batch in reader:
+                pending = pa.concat_tables([pending, pa.Table.from_batches([record_batch])])
+                while pending.num_rows >= batch_size:
+                    yield pending.slice(0, batch_size).to_pandas()
+                    pending = pending.slice(batch_size)
+            if pending.num_rows:
+                yield pending.to_pandas()
+        finally:
+            reader.close()
+    
+    @staticmethod
+    def iter_batches(
+        source: Union[str, BinaryIO],
+        filename: str,
+        batch_size: int = None,
+        sheet_name: Optional[str] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream an Excel or CSV file as fixed-size DataFrame batches.
+        Peak memory depends on the batch size, not on the file size.
+        
+        Args:
+            source: Path or seekable binary file object (e.g. UploadFile.file)
+            filename: Original filename, used to pick the reader
+            batch_size: Rows per batch (defaults to BATCH_SIZE)
+            sheet_name: Worksheet to read from an .xlsx file (defaults to the active sheet)
+            
+        Yields:
+            pd.DataFrame: Batch of rows with NaN replaced by None. The index holds
+            the 0-based row position within the whole file.
+            
+        Raises:
+            ValueError: If file format is not supported, parsing fails or
+            required columns are missing
+        """
+        batch_size = batch_size or ExcelParser.BATCH_SIZE
+        
+        if filename.endswith('.xlsx'):
+            reader = ExcelParser._xlsx_batches(source, batch_size, sheet_name)
+        elif filename.endswith('.csv'):
+            reader = ExcelParser._csv_batches(source, batch_size)
+        else:
+            raise ValueError(f"Unsupported file format: {filename}. Only .xlsx and .csv are supported.")
+        
+        # Close the reader (and its file handles) even when abandoned early
+        try:
+            try:
+                columns = next(reader, None)
+            except Exception as e:
+                raise ValueError(f"Failed to parse file: {str(e)}")
+            
+            if columns is None:
+                return
+            ExcelParser.validate_header(columns)
+            
+            offset = 0
+            while True:
+                try:
+                    batch = next(reader, None)
+                except Exception as e:
+                    raise ValueError(f"Failed to parse file: {str(e)}")
+                if batch is None:
+                    return
+                if batch.empty:
+                    continue
+                
+                batch.index = pd.RangeIndex(offset, offset + len(batch))
+                offset += len(batch)
+                yield batch
+        finally:
+            reader.close()
@@ -0,0 +1,296 @@
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from sqlalchemy import select, delete, func, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.pegawai import Pegawai
+from app.models.comparison_outcome import ComparisonOutcome
+from app.services.comparator import EmployeeComparator, ComparisonResult, ComparisonSummary
+from app.services.data_version import get_replace_version
+from app.services.month_utils import get_period_frame
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Above this share of the stored employees reclassified, a full comparison is cheaper
+DEFAULT_MAX_RECLASSIFIED_SHARE = 0.25
+
+
+@dataclass
+class Watermark:
+    """State of a period and its baseline when a comparison starts reading."""
+    time: datetime                      # Application clock, the clock pegawai.updated_at is written with
+    baseline: Tuple[int, int]           # (month, year) compared against
+    replace_versions: Tuple[int, int]   # replace_version of the current and baseline period
+    current_max_id: int                 # Highest pegawai id in each period;
+    previous_max_id: int                # rows above it were added later
+
+
+@dataclass
+class StoredOutcome:
+    """Last persisted comparison of a period and the watermark it was read after."""
+    watermark: Watermark
+    result: ComparisonResult
+
+
+def take_watermark(db: Session, unit: str, month: int, year: int, baseline: Tuple[int, int]) -> Watermark:
+    """
+    Read the watermark of a period before comparing it. Anything written after
+    this point is seen as changed by the next incremental recompare.
+
+    Args:
+        db: Database session
+        unit: Unit kerja
+        month: Current month
+        year: Current year
+        baseline: (month, year) the period is compared against
+
+    Returns:
+        Watermark: Current time, replace versions and highest ids of both periods
+    """
+    prev_month, prev_year = baseline
+    now = datetime.now()
+    max_ids = dict(
+        ((row.month, row.year), row.max_id)
+        for row in db.execute(
+            select(Pegawai.month, Pegawai.year, func.max(Pegawai.id).label('max_id'))
+            .where(
+                Pegawai.unit == unit,
+                or_(
+                    and_(Pegawai.month == month, Pegawai.year == year),
+                    and_(Pegawai.month == prev_month, Pegawai.year == prev_year)
+                )
+            )
+            .group_by(Pegawai.month, Pegawai.year)
+        )
+    )
+    return Watermark(
+        time=now,
+        baseline=baseline,
+        replace_versions=(
+            get_replace_version(db, unit, month, year),
+            get_replace_version(db, unit, prev_month, prev_year)
+        ),
+        current_max_id=max_ids.get((month, year)) or 0,
+        previous_max_id=max_ids.get((prev_month, prev_year)) or 0
+    )
+
+
+def _upsert_statement(db: Session):
+    """INSERT ... ON CONFLICT (unit, month, year) DO UPDATE of comparison_outcome."""
+    table = ComparisonOutcome.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        statement = postgresql.insert(table)
+        conflict_target = {'constraint': 'uq_comparison_outcome_unit_month_year'}
+    elif dialect == 'sqlite':
+        statement = sqlite.insert(table)
+        conflict_target = {'index_elements': ['unit', 'month', 'year']}
+    else:
+        raise ValueError(f"Stored comparisons are not supported on {dialect}")
+
+    stored = [name for name in table.c.keys() if name not in ('id', 'unit', 'month', 'year', 'updated_at')]
+    return statement.on_conflict_do_update(
+        **conflict_target,
+        set_={**{name: statement.excluded[name] for name in stored}, 'updated_at': func.now()}
+    )
+
+
+def remember_outcome(
+    db: Session,
+    unit: str,
+    month: int,
+    year: int,
+    watermark: Watermark,
+    result: ComparisonResult
+) -> None:
+    """
+    Store a full or merged comparison as the base of the next incremental
+    recompare of the period, in the transaction of its write-back (the
+    caller commits), so it is only kept once the statuses are.
+
+    Args:
+        db: Database session
+        unit: Unit kerja
+        month: Current month
+        year: Current year
+        watermark: take_watermark() from before the comparison read anything
+        result: The comparison, as returned by compare_frames
+    """
+    data = asdict(result)
+    data.pop('transfers')
+    db.execute(_upsert_statement(db), {
+        'unit': unit,
+        'month': month,
+        'year': year,
+        'watermark_at': watermark.time,
+        'baseline_month': watermark.baseline[0],
+        'baseline_year': watermark.baseline[1],
+        'replace_version': watermark.replace_versions[0],
+        'baseline_replace_version': watermark.replace_versions[1],
+        'current_max_id': watermark.current_max_id,
+        'previous_max_id': watermark.previous_max_id,
+        'result': json.dumps(data)
+    })
+
+
+def load_outcome(db: Session, unit: str, month: int, year: int) -> Optional[StoredOutcome]:
+    """
+    The last comparison stored for a period by remember_outcome.
+
+    Returns:
+        StoredOutcome: Watermark and result, or None when the period has none
+    """
+    row = db.execute(
+        select(ComparisonOutcome).where(
+            ComparisonOutcome.unit == unit,
+            ComparisonOutcome.month == month,
+            ComparisonOutcome.year == year
+        )
+    ).scalar_one_or_none()
+    if row is None:
+        return None
+
+    data = json.loads(row.result)
+    data['summary'] = ComparisonSummary(**data['summary'])
+    return StoredOutcome(
+        watermark=Watermark(
+            time=row.watermark_at,
+            baseline=(row.baseline_month, row.baseline_year),
+            replace_versions=(row.replace_version, row.baseline_replace_version),
+            current_max_id=row.current_max_id,
+            previous_max_id=row.previous_max_id
+        ),
+        result=ComparisonResult(**data)
+    )
+
+
+def forget_outcomes(db: Session) -> None:
+    """
+    Drop every stored comparison (e.g. after a database restore, which bypasses
+    versions); the caller commits.
+    """
+    db.execute(delete(ComparisonOutcome))
+
+
+def _changed_nips(
+    db: Session,
+    unit: str,
+    month: int,
+    year: int,
+    prev_month: int,
+    prev_year: int,
+    watermark: Watermark
+) -> List[str]:
+    """
+    NIPs of present employees (departed=0) with a row in either period
+    written since the watermark: updated_at at or after it (edits; statuses
+    written by comparison keep updated_at), or an id above the highest one
+    read (rows added). Read through idx_unit_month_year_updated_at.
+    """
+    since = watermark.time
+    return db.execute(
+        select(Pegawai.nip).distinct().where(
+            Pegawai.unit == unit,
+            Pegawai.departed == 0,
+            or_(
+                and_(
+                    Pegawai.month == month,
+                    Pegawai.year == year,
+                    or_(Pegawai.updated_at >= since, Pegawai.id > watermark.current_max_id)
+                ),
+                and_(
+                    Pegawai.month == prev_month,
+                    Pegawai.year == prev_year,
+                    or_(Pegawai.updated_at >= since, Pegawai.id > watermark.previous_max_id)
+                )
+            )
+        )
+    ).scalars().all()
+
+
+def _merge(stored: ComparisonResult, partial: ComparisonResult, nips: set) -> ComparisonResult:
+    """Replace the employees in nips by their reclassification, keeping each list's order."""
+    def merged(stored_records: List[Dict], partial_records: List[Dict]) -> List[Dict]:
+        kept = [record for record in stored_records if record['nip'] not in nips]
+        return sorted(kept + partial_records, key=lambda record: record['id'])
+
+    new_employees = merged(stored.new_employees, partial.new_employees)
+    departed_employees = merged(stored.departed_employees, partial.departed_employees)
+    account_changes = merged(stored.account_changes, partial.account_changes)
+    unchanged_employees = merged(stored.unchanged_employees, partial.unchanged_employees)
+    field_changes = merged(stored.field_changes, partial.field_changes)
+
+    # NIPs are unique per period, so every employee is in exactly one list per side
+    both = len(account_changes) + len(unchanged_employees)
+    return ComparisonResult(
+        new_employees=new_employees,
+        departed_employees=departed_employees,
+        account_changes=account_changes,
+        unchanged_employees=unchanged_employees,
+        summary=ComparisonSummary(
+            total_current=len(new_employees) + both,
+            total_previous=len(departed_employees) + both,
+            new_count=len(new_employees),
+            departed_count=len(departed_employees),
+            account_change_count=len(account_changes),
+            unchanged_count=len(unchanged_employees),
+            field_change_count=len(field_changes)
+        ),
+        field_changes=field_changes
+    )
+
+
+def incremental_comparison(
+    db: Session,
+    unit: str,
+    month: int,
+    year: int,
+    watermark: Watermark
+) -> Optional[Tuple[ComparisonResult, ComparisonResult]]:
+    """
+    Recompare a period by reclassifying only the employees written since its
+    last comparison and merging them into the stored outcome.
+
+    Returns None (compare in full) when there is no stored outcome, it was
+    compared against another baseline, the period or its baseline was
+    uploaded or deleted since (replace_version), or more than COMPARE_MAX_RECLASSIFIED_SHARE of the employees changed.
+
+    Args:
+        db: Database session (only read)
+        unit: Unit kerja
+        month: Current month
+        year: Current year
+        watermark: take_watermark() of this recompare, read by the caller
+
+    Returns:
+        Tuple: (merged comparison of the whole period, partial comparison of
+        the reclassified employees only, to write back), or None
+    """
+    stored = load_outcome(db, unit, month, year)
+    if stored is None or (stored.watermark.baseline, stored.watermark.replace_versions) != (
+        watermark.baseline, watermark.replace_versions
+    ):
+        return None
+
+    prev_month, prev_year = watermark.baseline
+    nips = _changed_nips(db, unit, month, year, prev_month, prev_year, stored.watermark)
+    headcount = stored.result.summary.total_current + stored.result.summary.departed_count
+    share = float(os.getenv("COMPARE_MAX_RECLASSIFIED_SHARE", DEFAULT_MAX_RECLASSIFIED_SHARE))
+    if len(nips) > max(1, headcount * share):
+        logger.info(f"{unit} {month}/{year}: {len(nips)} of {headcount} employees changed, comparing in full")
+        return None
+
+    partial = EmployeeComparator.compare_frames(
+        get_period_frame(db, month, year, unit, nips=nips),
+        get_period_frame(db, prev_month, prev_year, unit, nips=nips)
+    )
+    merged = _merge(stored.result, partial, set(nips))
+    if merged.summary.total_current == 0:
+        return None
+
+    logger.info(f"Recompared {unit} {month}/{year} incrementally: {len(nips)} employees reclassified")
+    return merged, partial
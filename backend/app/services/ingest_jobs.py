@@ -0,0 +1,806 @@
+from typing import Dict, List, Optional, Callable, BinaryIO, Tuple, Union
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+import multiprocessing
+import asyncio
+import threading
+import shutil
+import json
+import uuid
+import time
+import os
+import logging
+from sqlalchemy.exc import IntegrityError
+from app.database import SessionLocal
+from app.services.upload_pipeline import scan_upload_file, ingest_upload, VALID_UNITS, MODE_STAGING, MODE_DELTA
+from app.services.memory_usage import PeakRSSTracker
+from app.services.admission import AdmissionController, Reservation, WORK_UPLOAD
+from app.services.upload_dedup import copy_and_hash, file_hash, find_unchanged_upload, record_upload, forget_upload
+from app.services.multi_unit import UnitSource, split_unit_sources, WORKBOOK_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+# Stored uploads waiting for (or being processed by) a worker
+INGEST_DIR = Path("uploads") / "ingest"
+
+SUPPORTED_EXTENSIONS = ('.xlsx', '.csv')
+
+# Job phases, in order; a job ends in either 'completed' or 'failed'
+PHASE_QUEUED = 'queued'
+PHASE_VALIDATING = 'validating'
+PHASE_STORING = 'storing'
+PHASE_COMPLETED = 'completed'
+PHASE_FAILED = 'failed'
+FINAL_PHASES = (PHASE_COMPLETED, PHASE_FAILED)
+
+# Job kinds: one file for one unit, or a workbook/zip holding several units
+KIND_FILE = 'file'
+KIND_WORKBOOK = 'workbook'
+
+
+@dataclass
+class IngestJob:
+    """State of one upload job as reported by GET /upload/jobs/{id}."""
+    id: str
+    filename: str
+    unit: Optional[str]
+    month: int
+    year: int
+    mode: str = MODE_STAGING
+    kind: str = KIND_FILE
+    phase: str = PHASE_QUEUED
+    rows_total: Optional[int] = None
+    rows_processed: int = 0
+    errors: List[str] = field(default_factory=list)
+    result: Optional[Dict] = None
+    created_at: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    # Workbook jobs: per-unit phase, row counts, errors and result
+    units: List[Dict] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class LocalJobBackend:
+    """
+    In-process job store. Job state is only visible to the process that
+    accepted the upload, so use it with a single API worker.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Dict) -> None:
+        with self._lock:
+            self._jobs[job['id']] = dict(job)
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+
+class RedisJobBackend:
+    """
+    Job store kept in Redis (or any server speaking its protocol), so every
+    API worker can report progress for jobs accepted by another one.
+
+    Only get/set are used, so any client object exposing
+    get(key) and set(key, value, ex=seconds) can serve as the store.
+    """
+
+    def __init__(self, client, prefix: str = "ingest:job:", ttl_seconds: int = 24 * 60 * 60):
+        self.client = client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        # Each job is only written by the worker running it; the lock keeps
+        # read-modify-write updates from this process in order
+        self._lock = threading.Lock()
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}{job_id}"
+
+    def save(self, job: Dict) -> None:
+        self.client.set(self._key(job['id']), json.dumps(job), ex=self.ttl_seconds)
+
+    def load(self, job_id: str) -> Optional[Dict]:
+        raw = self.client.get(self._key(job_id))
+        if raw is None:
+            return None
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8')
+        return json.loads(raw)
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self.load(job_id)
+            if job is not None:
+                job.update(fields)
+                self.save(job)
+
+
+def create_backend_from_env():
+    """
+    Select the job store from INGEST_JOB_BACKEND ('local' or 'redis').
+    The redis package is only needed when the Redis backend is selected.
+    """
+    backend_name = os.getenv("INGEST_JOB_BACKEND", "local").lower()
+
+    if backend_name == "local":
+        return LocalJobBackend()
+
+    if backend_name == "redis":
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("INGEST_JOB_BACKEND=redis requires the 'redis' package")
+        client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        return RedisJobBackend(client)
+
+    raise RuntimeError(f"Unknown INGEST_JOB_BACKEND: {backend_name}")
+
+
+def _now_iso() -> str:
+    return datetime.now().isoformat()
+
+
+def _unchanged_result(unit: str, month: int, year: int, mode: str, row_count: int) -> Dict:
+    """Job result for an upload identical to the one already stored for the period."""
+    return {
+        "status": "success",
+        "message": f"No changes: this file is identical to the data already stored for {unit} {month}/{year}",
+        "records_processed": 0,
+        "records_unchanged": row_count,
+        "unchanged": True,
+        "month": month,
+        "year": year,
+        "unit": unit,
+        "mode": mode
+    }
+
+
+def _error_message(job_id: str, error: Exception) -> str:
+    """Message reported for a failed job or unit; internal details only go to the log."""
+    if isinstance(error, ValueError):
+        return str(error)
+    if isinstance(error, IntegrityError):
+        logger.error(f"Database integrity error in ingest job {job_id}: {error}")
+        return "Database error occurred during upload"
+    logger.error(f"Unexpected error in ingest job {job_id}: {error}", exc_info=error)
+    return "Internal server error"
+
+
+class IngestJobQueue:
+    """
+    Runs uploads off the request path.
+
+    Each job is driven by a thread from the DB pool: the file is validated in
+    a worker process (pandas parsing is CPU bound and would otherwise hold the
+    GIL), then stored with a session owned by that thread. Workbook jobs run
+    every unit this way concurrently, one transaction per unit.
+
+    With an admission controller attached (use_admission), a job holds a
+    WORK_UPLOAD reservation from submit until a DB thread picks it up, so the
+    backlog is bounded by the admission queue (submit raises AdmissionRejected
+    when it is full) and reported by its statistics. Every unit then holds a
+    WORK_UPLOAD slot from validation to the end of its store, so queued jobs
+    share the upload concurrency and memory budget with other requests.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        session_factory: Callable = SessionLocal,
+        parse_workers: int = None,
+        db_workers: int = None,
+        upload_dir: Path = INGEST_DIR
+    ):
+        self.backend = backend if backend is not None else LocalJobBackend()
+        self.session_factory = session_factory
+        # Enough processes to validate every unit of a workbook at once
+        self.parse_workers = parse_workers or int(
+            os.getenv("INGEST_PARSE_WORKERS", min(len(VALID_UNITS), os.cpu_count() or 1))
+        )
+        self.db_workers = db_workers or int(os.getenv("INGEST_DB_WORKERS", 2))
+        self.upload_dir = Path(upload_dir)
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._db_pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        # Units of a workbook are validated concurrently, but at most db_workers store at once
+        self._store_slots = threading.BoundedSemaphore(self.db_workers)
+        self.admission: Optional[AdmissionController] = None
+        self._admission_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def use_admission(self, controller: AdmissionController, loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Gate the parse and store of every job with `controller`.
+
+        Args:
+            controller: Admission controller of the application
+            loop: Event loop the controller is used from (it must keep running
+                while jobs wait, including during shutdown)
+        """
+        self.admission = controller
+        self._admission_loop = loop
+
+    def reserve(self) -> Optional[Reservation]:
+        """
+        Hold a place in the admission queue for a job about to be submitted
+        (None without admission). submit() takes it over.
+
+        Raises:
+            AdmissionRejected: The admission queue is full
+        """
+        if self.admission is None:
+            return None
+        return self.admission.reserve_threadsafe(WORK_UPLOAD, self._admission_loop)
+
+    def release_reservation(self, reservation: Optional[Reservation]) -> None:
+        """Give back a reservation from reserve() (a job started, or was never queued)."""
+        if reservation is not None:
+            self.admission.unreserve_threadsafe(reservation, self._admission_loop)
+
+    @contextmanager
+    def _admission_slot(self):
+        """Hold a WORK_UPLOAD slot while the block runs, when admission is attached."""
+        if self.admission is None:
+            yield
+            return
+        ticket = self.admission.acquire_threadsafe(WORK_UPLOAD, self._admission_loop)
+        try:
+            yield
+        finally:
+            self.admission.release_threadsafe(ticket, self._admission_loop)
+
+    def _pools(self):
+        """Start the worker pools on first use."""
+        with self._pool_lock:
+            if self._db_pool is None:
+                # spawn: never fork a process that holds DB connections and threads
+                self._parse_pool = ProcessPoolExecutor(
+                    max_workers=self.parse_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                self._db_pool = ThreadPoolExecutor(
+                    max_workers=self.db_workers,
+                    thread_name_prefix="ingest-db"
+                )
+            return self._parse_pool, self._db_pool
+
+    def _store_file(self, source: Union[BinaryIO, Path], job_id: str, extension: str) -> Tuple[Path, str]:
+        """
+        Copy an upload into the ingest directory, or move it there when it is
+        already a file on disk (a finished chunked upload); returns its path and SHA-256.
+        """
+        self.upload_dir.mkdir(parents=True, exist_ok=True)
+        path = self.upload_dir / f"{job_id}{extension}"
+        if isinstance(source, (str, Path)):
+            shutil.move(str(source), path)
+            return path, file_hash(path)
+        with open(path, 'wb') as target:
+            content_hash = copy_and_hash(source, target)
+        return path, content_hash
+
+    def submit(
+        self,
+        source: Union[BinaryIO, Path],
+        filename: str,
+        unit: str,
+        month: int,
+        year: int,
+        mode: str = MODE_STAGING,
+        reservation: Optional[Reservation] = None
+    ) -> Dict:
+        """
+        Store an uploaded file and queue it for processing.
+
+        Args:
+            source: Uploaded file object, or path of a file on disk (moved, not copied)
+            filename: Original filename
+            unit: Unit kerja
+            month: Month number
+            year: Year number
+            mode: Upload mode (see upload_pipeline.UPLOAD_MODES)
+            reservation: Place in the admission queue from reserve(), taken
+                over by the job; reserved here when not given
+
+        Returns:
+            Dict: The new job
+
+        Raises:
+            ValueError: If the file format is not supported
+            AdmissionRejected: The admission queue is full
+        """
+        extension = Path(filename or "").suffix.lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            self.release_reservation(reservation)
+            raise ValueError(f"Unsupported file format: {filename}. Only .xlsx and .csv are supported.")
+        if reservation is None:
+            reservation = self.reserve()
+
+        queued = False
+        try:
+            job = self._queue_file(source, filename, unit, month, year, mode, extension, reservation)
+            queued = job['phase'] == PHASE_QUEUED
+            return job
+        finally:
+            if not queued:
+                self.release_reservation(reservation)
+
+    def _queue_file(
+        self,
+        source: Union[BinaryIO, Path],
+        filename: str,
+        unit: str,
+        month: int,
+        year: int,
+        mode: str,
+        extension: str,
+        reservation: Optional[Reservation]
+    ) -> Dict:
+        """Body of submit(); the job is only queued when it comes back in PHASE_QUEUED."""
+        job = IngestJob(
+            id=uuid.uuid4().hex,
+            filename=filename,
+            unit=unit,
+            month=month,
+            year=year,
+            mode=mode,
+            created_at=_now_iso()
+        )
+        path, content_hash = self._store_file(source, job.id, extension)
+
+        # Byte-identical re-upload of the stored file: answer without queueing.
+        # A delta's result also depends on the previous month, so it is always applied.
+        unchanged_rows = None
+        if mode != MODE_DELTA:
+            db = self.session_factory()
+            try:
+                unchanged = find_unchanged_upload(db, unit, month, year, content_hash=content_hash)
+                unchanged_rows = unchanged.row_count if unchanged else None
+            finally:
+                db.close()
+        if unchanged_rows is not None:
+            os.remove(path)
+            job.phase = PHASE_COMPLETED
+            job.rows_total = unchanged_rows
+            job.started_at = job.finished_at = _now_iso()
+            job.result = _unchanged_result(unit, month, year, mode, unchanged_rows)
+            job_dict = job.to_dict()
+            self.backend.save(job_dict)
+            logger.info(f"Upload of {filename} for {unit} {month}/{year} is identical to the stored file")
+            return job_dict
+
+        job_dict = job.to_dict()
+        self.backend.save(job_dict)
+
+        source_spec = UnitSource(unit, str(path), filename, content_hash)
+        _, db_pool = self._pools()
+        db_pool.submit(self._run, job.id, source_spec, month, year, mode, time.perf_counter(), reservation)
+        logger.info(f"Queued ingest job {job.id} for {filename} ({unit} {month}/{year})")
+        return job_dict
+
+    def submit_workbook(
+        self,
+        source: Union[BinaryIO, Path],
+        filename: str,
+        month: int,
+        year: int,
+        mode: str = MODE_STAGING,
+        reservation: Optional[Reservation] = None
+    ) -> Dict:
+        """
+        Store a multi-unit upload (one sheet per unit, or a zip of per-unit files)
+        and queue it for processing.
+
+        Args:
+            source: Uploaded file object, or path of a file on disk (moved, not copied)
+            filename: Original filename (.xlsx or .zip)
+            month: Month number
+            year: Year number
+            mode: Upload mode applied to every unit
+            reservation: Place in the admission queue from reserve(), taken
+                over by the job; reserved here when not given
+
+        Returns:
+            Dict: The new job
+
+        Raises:
+            ValueError: If the file format is not supported
+            AdmissionRejected: The admission queue is full
+        """
+        extension = Path(filename or "").suffix.lower()
+        if extension not in WORKBOOK_EXTENSIONS:
+            self.release_reservation(reservation)
+            raise ValueError(f"Unsupported file format: {filename}. Only .xlsx and .zip are supported.")
+        if reservation is None:
+            reservation = self.reserve()
+
+        queued = False
+        try:
+            job = self._queue_workbook(source, filename, month, year, mode, extension, reservation)
+            queued = True
+            return job
+        finally:
+            if not queued:
+                self.release_reservation(reservation)
+
+    def _queue_workbook(
+        self,
+        source: Union[BinaryIO, Path],
+        filename: str,
+        month: int,
+        year: int,
+        mode: str,
+        extension: str,
+        reservation: Optional[Reservation]
+    ) -> Dict:
+        """Body of submit_workbook()."""
+        job = IngestJob(
+            id=uuid.uuid4().hex,
+            filename=filename,
+            unit=None,
+            month=month,
+            year=year,
+            mode=mode,
+            kind=KIND_WORKBOOK,
+            created_at=_now_iso()
+        )
+        path, content_hash = self._store_file(source, job.id, extension)
+
+        job_dict = job.to_dict()
+        self.backend.save(job_dict)
+
+        _, db_pool = self._pools()
+        db_pool.submit(
+            self._run_workbook, job.id, str(path), filename, content_hash,
+            month, year, mode, time.perf_counter(), reservation
+        )
+        logger.info(f"Queued workbook ingest job {job.id} for {filename} ({month}/{year})")
+        return job_dict
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.backend.load(job_id)
+
+    def _ingest_unit(
+        self,
+        source: UnitSource,
+        month: int,
+        year: int,
+        mode: str,
+        on_phase: Callable[[str, int], None],
+        on_progress: Callable[[int], None]
+    ) -> Dict:
+        """
+        Validate and store one unit in its own session and transaction.
+
+        Args:
+            source: Unit data to ingest
+            month: Month number
+            year: Year number
+            mode: Upload mode
+            on_phase: Called with (phase, rows_total) when storing starts
+            on_progress: Called with the running stored count
+
+        Returns:
+            Dict: Unit result, with its own timings
+
+        Raises:
+            ValueError, IntegrityError: Validation or storage failures
+        """
+        started = time.perf_counter()
+        timings = {}
+        parse_pool, _ = self._pools()
+
+        unchanged = None
+        if mode != MODE_DELTA:
+            db = self.session_factory()
+            try:
+                unchanged = find_unchanged_upload(db, source.unit, month, year, content_hash=source.content_hash)
+            finally:
+                db.close()
+        if unchanged is not None:
+            timings['validate_seconds'] = round(time.perf_counter() - started, 3)
+            return {**_unchanged_result(source.unit, month, year, mode, unchanged.row_count), 'timings': timings}
+
+        with self._admission_slot():
+            timings['admission_seconds'] = round(time.perf_counter() - started, 3)
+            scan = parse_pool.submit(
+                scan_upload_file, source.path, source.filename, None, source.sheet_name, mode
+            ).result()
+            timings['validate_seconds'] = round(time.perf_counter() - started, 3)
+            on_phase(PHASE_STORING, scan['rows'])
+
+            with self._store_slots:
+                return self._store_unit(source, month, year, mode, scan, timings, on_progress)
+
+    def _store_unit(
+        self,
+        source: UnitSource,
+        month: int,
+        year: int,
+        mode: str,
+        scan: Dict,
+        timings: Dict,
+        on_progress: Callable[[int], None]
+    ) -> Dict:
+        store_started = time.perf_counter()
+        tracker = PeakRSSTracker()
+        db = self.session_factory()
+        try:
+            # Same rows under different bytes (e.g. the workbook re-saved)
+            unchanged = None
+            if mode != MODE_DELTA:
+                unchanged = find_unchanged_upload(db, source.unit, month, year, rows_hash=scan['rows_hash'])
+            if unchanged is not None:
+                logger.info(f"{source.unit} {month}/{year}: rows identical to the stored upload, nothing written")
+                return {**_unchanged_result(source.unit, month, year, mode, unchanged.row_count), 'timings': timings}
+
+            # A failed store must not leave the old fingerprint matching the old file
+            forget_upload(db, source.unit, month, year)
+            db.commit()
+
+            stored_count = ingest_upload(
+                db, mode, source.path, source.filename, source.unit, month, year, tracker,
+                progress=on_progress, sheet_name=source.sheet_name
+            )
+
+            if mode != MODE_DELTA:
+                record_upload(
+                    db, source.unit, month, year, source.filename,
+                    source.content_hash, scan['rows_hash'], stored_count
+                )
+            db.commit()
+        finally:
+            db.close()
+        timings['store_seconds'] = round(time.perf_counter() - store_started, 3)
+
+        return {
+            "status": "success",
+            "message": "File successfully uploaded and processed",
+            "records_processed": stored_count,
+            "unchanged": False,
+            "month": month,
+            "year": year,
+            "unit": source.unit,
+            "mode": mode,
+            "peak_rss_mb": round(max(scan['peak_rss_mb'], tracker.peak_mb), 1),
+            "timings": timings
+        }
+
+    def _run(
+        self,
+        job_id: str,
+        source: UnitSource,
+        month: int,
+        year: int,
+        mode: str,
+        queued_at: float,
+        reservation: Optional[Reservation]
+    ):
+        # Out of the pool's queue: the units now wait for their own slots
+        self.release_reservation(reservation)
+        started = time.perf_counter()
+        timings = {'queued_seconds': round(started - queued_at, 3)}
+        self.backend.update(job_id, phase=PHASE_VALIDATING, started_at=_now_iso(), timings=dict(timings))
+
+        try:
+            result = self._ingest_unit(
+                source, month, year, mode,
+                on_phase=lambda phase, rows: self.backend.update(job_id, phase=phase, rows_total=rows),
+                on_progress=lambda count: self.backend.update(job_id, rows_processed=count)
+            )
+            timings.update(result.pop('timings'))
+            timings['total_seconds'] = round(time.perf_counter() - queued_at, 3)
+            self.backend.update(
+                job_id,
+                phase=PHASE_COMPLETED,
+                rows_processed=result['records_processed'],
+                finished_at=_now_iso(),
+                timings=timings,
+                result=result
+            )
+            logger.info(
+                f"Ingest job {job_id} stored {result['records_processed']} records in {timings['total_seconds']}s"
+            )
+        except Exception as e:
+            self._fail(job_id, [_error_message(job_id, e)], timings, queued_at)
+        finally:
+            try:
+                os.remove(source.path)
+            except OSError:
+                pass
+
+    def _run_workbook(
+        self,
+        job_id: str,
+        path: str,
+        filename: str,
+        content_hash: str,
+        month: int,
+        year: int,
+        mode: str,
+        queued_at: float,
+        reservation: Optional[Reservation]
+    ):
+        self.release_reservation(reservation)
+        started = time.perf_counter()
+        timings = {'queued_seconds': round(started - queued_at, 3)}
+        self.backend.update(job_id, phase=PHASE_VALIDATING, started_at=_now_iso(), timings=dict(timings))
+        work_dir = self.upload_dir / job_id
+
+        try:
+            sources, skipped = split_unit_sources(path, filename, content_hash, work_dir)
+        except Exception as e:
+            self._fail(job_id, [_error_message(job_id, e)], timings, queued_at)
+            self._cleanup(path, work_dir)
+            return
+
+        # Per-unit state, published as a whole so concurrent units never overwrite each other
+        units = {
+            source.unit: {
+                'unit': source.unit,
+                'phase': PHASE_VALIDATING,
+                'rows_total': None,
+                'rows_processed': 0,
+                'errors': [],
+                'result': None
+            }
+            for source in sources
+        }
+        units_lock = threading.Lock()
+
+        def publish(unit: str, **fields):
+            with units_lock:
+                units[unit].update(fields)
+                states = [dict(state) for state in units.values()]
+                storing = any(state['phase'] == PHASE_STORING for state in states)
+                self.backend.update(
+                    job_id,
+                    units=states,
+                    phase=PHASE_STORING if storing else PHASE_VALIDATING,
+                    rows_total=sum(state['rows_total'] or 0 for state in states),
+                    rows_processed=sum(state['rows_processed'] for state in states)
+                )
+
+        publish(sources[0].unit)
+
+        try:
+            with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="ingest-unit") as unit_pool:
+                futures = {
+                    unit_pool.submit(
+                        self._ingest_unit, source, month, year, mode,
+                        lambda phase, rows, unit=source.unit: publish(unit, phase=phase, rows_total=rows),
+                        lambda count, unit=source.unit: publish(unit, rows_processed=count)
+                    ): source.unit
+                    for source in sources
+                }
+                for future in as_completed(futures):
+                    unit = futures[future]
+                    try:
+                        result = future.result()
+                        publish(
+                            unit,
+                            phase=PHASE_COMPLETED,
+                            rows_processed=result['records_processed'],
+                            result=result
+                        )
+                    except Exception as e:
+                        publish(unit, phase=PHASE_FAILED, errors=[_error_message(job_id, e)])
+        finally:
+            self._cleanup(path, work_dir)
+
+        report = [units[source.unit] for source in sources]
+        failed = [state for state in report if state['phase'] == PHASE_FAILED]
+        timings['total_seconds'] = round(time.perf_counter() - queued_at, 3)
+
+        if len(failed) == len(report):
+            self._fail(
+                job_id,
+                [f"{state['unit']}: {message}" for state in failed for message in state['errors']],
+                timings,
+                queued_at
+            )
+            return
+
+        self.backend.update(
+            job_id,
+            phase=PHASE_COMPLETED,
+            finished_at=_now_iso(),
+            timings=timings,
+            errors=[f"{state['unit']}: {message}" for state in failed for message in state['errors']],
+            result={
+                "status": "partial" if failed else "success",
+                "message": (
+                    f"{len(report) - len(failed)} of {len(report)} units uploaded"
+                    if failed else f"All {len(report)} units uploaded"
+                ),
+                "records_processed": sum(state['rows_processed'] for state in report),
+                "month": month,
+                "year": year,
+                "mode": mode,
+                "units": [
+                    {
+                        "unit": state['unit'],
+                        "status": (
+                            "failed" if state['phase'] == PHASE_FAILED
+                            else "unchanged" if state['result']['unchanged']
+                            else "success"
+                        ),
+                        "records_processed": state['rows_processed'],
+                        "errors": state['errors'],
+                        "timings": state['result']['timings'] if state['result'] else {}
+                    }
+                    for state in report
+                ],
+                "skipped": skipped
+            }
+        )
+        logger.info(
+            f"Workbook ingest job {job_id}: {len(report) - len(failed)}/{len(report)} units "
+            f"in {timings['total_seconds']}s"
+        )
+
+    def _cleanup(self, path: str, work_dir: Path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _fail(self, job_id: str, messages: List[str], timings: Dict, queued_at: float):
+        timings['total_seconds'] = round(time.perf_counter() - queued_at, 3)
+        self.backend.update(
+            job_id,
+            phase=PHASE_FAILED,
+            errors=messages,
+            finished_at=_now_iso(),
+            timings=timings
+        )
+
+    def shutdown(self, wait: bool = True):
+        # Running jobs still call _pools(), so wait for them without holding the lock
+        with self._pool_lock:
+            db_pool, parse_pool = self._db_pool, self._parse_pool
+        if db_pool is None:
+            return
+        db_pool.shutdown(wait=wait)
+        parse_pool.shutdown(wait=wait)
+        with self._pool_lock:
+            if self._db_pool is db_pool:
+                self._db_pool = None
+                self._parse_pool = None
+
+
+_queue: Optional[IngestJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_ingest_queue() -> IngestJobQueue:
+    """Return the application-wide job queue, creating it on first use (see use_admission)."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = IngestJobQueue(backend=create_backend_from_env())
+        return _queue
+
+
+def shutdown_ingest_queue():
+    """Wait for running jobs and stop the worker pools."""
+    global _queue
+    with _queue_lock:
+        if _queue is not None:
+            _queue.shutdown()
+            _queue = None
@@ -0,0 +1,40 @@
+import os
+import resource
+
+
+def current_rss_mb() -> float:
+    """
+    Return the current resident set size of this process in MB.
+    Reads /proc/self/statm on Linux; elsewhere falls back to the process-wide
+    peak reported by getrusage.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PeakRSSTracker:
+    """
+    Tracks the highest RSS observed while processing one upload.
+    Call sample() at batch boundaries; peak_mb and growth_mb report the result.
+    """
+
+    def __init__(self):
+        self.baseline_mb = current_rss_mb()
+        self.peak_mb = self.baseline_mb
+
+    def sample(self) -> float:
+        """Record the current RSS and return it."""
+        rss = current_rss_mb()
+        if rss > self.peak_mb:
+            self.peak_mb = rss
+        return rss
+
+    @property
+    def growth_mb(self) -> float:
+        """Peak RSS above the level at the start of the upload."""
+        return self.peak_mb - self.baseline_mb
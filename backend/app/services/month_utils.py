@@ -1,6 +1,12 @@
-from typing import Tuple, List
+from typing import Tuple, List, Optional, Collection
+from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 from app.models.pegawai import Pegawai
+from app.models.period_version import PeriodVersion
+import pandas as pd
+
+# How far back a comparison looks for a month with data
+MAX_BASELINE_MONTHS = 12
 
 
 def get_previous_month(month: int, year: int) -> Tuple[int, int]:
@@ -23,6 +29,65 @@ def get_previous_month(month: int, year: int) -> Tuple[int, int]:
         return (month - 1, year)
 
 
+def period_key(month: int, year: int) -> int:
+    """A period as one sortable integer, year * 100 + month (e.g. 202406)."""
+    return year * 100 + month
+
+
+def find_baseline_period(db: Session, month: int, year: int, unit: str) -> Optional[Tuple[int, int]]:
+    """
+    The latest period before month/year, at most MAX_BASELINE_MONTHS back,
+    in which the unit has data.
+    
+    One MAX(year * 100 + month) over the period index (period_version rows
+    with row_count > 0, through idx_period_version_unit_period), instead of
+    loading month after month until one has rows.
+    
+    Args:
+        db: Database session
+        month: Current month (1-12)
+        year: Current year
+        unit: Unit kerja
+        
+    Returns:
+        Optional[Tuple[int, int]]: (month, year) of the baseline, or None
+    """
+    key = PeriodVersion.year * 100 + PeriodVersion.month
+    earliest_month, earliest_year = month, year
+    for _ in range(MAX_BASELINE_MONTHS):
+        earliest_month, earliest_year = get_previous_month(earliest_month, earliest_year)
+    
+    baseline = db.execute(
+        select(func.max(key)).where(
+            PeriodVersion.unit == unit,
+            PeriodVersion.row_count > 0,
+            key < period_key(month, year),
+            key >= period_key(earliest_month, earliest_year)
+        )
+    ).scalar()
+    if baseline is None:
+        return None
+    return (baseline % 100, baseline // 100)
+
+
+def get_baseline_period(db: Session, month: int, year: int, unit: str) -> Tuple[int, int]:
+    """
+    Period a comparison of month/year runs against: the latest earlier period
+    with data (find_baseline_period), so a month without upload does not make
+    every employee 'Masuk'. The previous month when no period has data.
+    
+    Args:
+        db: Database session
+        month: Current month (1-12)
+        year: Current year
+        unit: Unit kerja
+        
+    Returns:
+        Tuple[int, int]: (baseline_month, baseline_year)
+    """
+    return find_baseline_period(db, month, year, unit) or get_previous_month(month, year)
+
+
 def get_comparison_month_data(db: Session, month: int, year: int, unit: str) -> List[Pegawai]:
     """
     Retrieve all employee records for the comparison month.
@@ -50,10 +115,60 @@ def get_comparison_month_data(db: Session, month: int, year: int, unit: str) ->
     return employees
 
 
+def get_period_frame(
+    db: Session,
+    month: int,
+    year: int,
+    unit: str,
+    nips: Optional[Collection[str]] = None
+) -> pd.DataFrame:
+    """
+    Load one unit/month/year as a columnar frame, without building ORM objects.
+    Departed rows copied in by a comparison (departed=1) are left out: they
+    are not employees of the period and must never be compared as present.
+    
+    Args:
+        db: Database session
+        month: Month (1-12)
+        year: Year
+        unit: Unit kerja
+        nips: Only these employees (default: the whole period)
+        
+    Returns:
+        pd.DataFrame: One row per present employee in upload (id) order, with
+        every pegawai column (comparator.FRAME_COLUMNS)
+    """
+    table = Pegawai.__table__
+    query = select(table).where(
+        table.c.month == month, table.c.year == year, table.c.unit == unit, table.c.departed == 0
+    )
+    if nips is not None:
+        query = query.where(table.c.nip.in_(list(nips)))
+    rows = db.execute(query.order_by(table.c.id)).all()
+    return pd.DataFrame.from_records(rows, columns=[column.name for column in table.columns])
+
+
+def get_comparison_month_frame(db: Session, month: int, year: int, unit: str) -> pd.DataFrame:
+    """
+    Columnar version of get_comparison_month_data: the previous month as a frame.
+    
+    Args:
+        db: Database session
+        month: Current month (1-12)
+        year: Current year
+        unit: Unit kerja
+        
+    Returns:
+        pd.DataFrame: Employee records of the comparison month
+    """
+    prev_month, prev_year = get_previous_month(month, year)
+    return get_period_frame(db, prev_month, prev_year, unit)
+
+
 def get_most_recent_comparison_month(db: Session, month: int, year: int, unit: str) -> Tuple[int, int, List[Pegawai]]:
     """
     Get the most recent comparison month that has data.
-    Searches backwards from the given month/year until data is found.
+    Searches backwards from the given month/year (find_baseline_period).
     
     Args:
         db: Database session
@@ -65,21 +180,15 @@ def get_most_recent_comparison_month(db: Session, month: int, year: int, unit: s
         Tuple[int, int, List[Pegawai]]: (comparison_month, comparison_year, employee_records)
         Returns (None, None, []) if no comparison data exists
     """
-    search_month, search_year = get_previous_month(month, year)
-    max_iterations = 12  # Search up to 12 months back
-    
-    for _ in range(max_iterations):
-        employees = db.query(Pegawai).filter(
-            Pegawai.month == search_month,
-            Pegawai.year == search_year,
-            Pegawai.unit == unit
-        ).all()
-        
-        if employees:
-            return (search_month, search_year, employees)
-        
-        # Move to previous month
-        search_month, search_year = get_previous_month(search_month, search_year)
+    baseline = find_baseline_period(db, month, year, unit)
+    if baseline is None:
+        # No data found
+        return (None, None, [])
     
-    # No data found
-    return (None, None, [])
+    search_month, search_year = baseline
+    employees = db.query(Pegawai).filter(
+        Pegawai.month == search_month,
+        Pegawai.year == search_year,
+        Pegawai.unit == unit
+    ).all()
+    return (search_month, search_year, employees)
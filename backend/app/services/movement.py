@@ -0,0 +1,169 @@
+from typing import Dict, Tuple
+from sqlalchemy import select, func, and_, or_
+from sqlalchemy.orm import Session
+from app.models.pegawai import Pegawai
+from app.services.comparator import STATUS_NEW, STATUS_DEPARTED, STATUS_ACCOUNT_CHANGE
+from app.services.month_utils import period_key
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-period summary count of each event, named like ComparisonSummary
+EVENT_COUNTS = {
+    STATUS_NEW: 'new_count',
+    STATUS_DEPARTED: 'departed_count',
+    STATUS_ACCOUNT_CHANGE: 'account_change_count'
+}
+
+
+def _period(key: int) -> Tuple[int, int]:
+    """(month, year) of a period_key."""
+    return key % 100, key // 100
+
+
+def _appearances(unit: str, start: int, end: int):
+    """
+    The rows of a unit in [start, end] that are real appearances: the departed
+    rows a comparison copies into the current period are left out, whatever
+    status they hold now (Keluar, Pensiun after an override, Pindah for the
+    departure side of a transfer).
+    """
+    period = Pegawai.year * 100 + Pegawai.month
+    rows = (
+        select(
+            Pegawai.nip,
+            Pegawai.nama,
+            Pegawai.nomor_rekening,
+            period.label('period')
+        )
+        .where(
+            Pegawai.unit == unit,
+            Pegawai.year.between(start // 100, end // 100),
+            period.between(start, end),
+            Pegawai.departed == 0
+        )
+        .subquery('rows')
+    )
+    periods = (
+        select(
+            rows.c.period,
+            func.lag(rows.c.period).over(order_by=rows.c.period).label('previous_period'),
+            func.lead(rows.c.period).over(order_by=rows.c.period).label('next_period')
+        )
+        .group_by(rows.c.period)
+        .subquery('periods')
+    )
+    return (
+        select(rows.c.nip, rows.c.nama, rows.c.nomor_rekening, periods.c.period,
+               periods.c.previous_period, periods.c.next_period)
+        .join(periods, rows.c.period == periods.c.period)
+        .subquery('appearances')
+    )
+
+
+def movement_events(
+    db: Session,
+    unit: str,
+    start_month: int,
+    start_year: int,
+    end_month: int,
+    end_year: int
+) -> Dict:
+    """
+    Entries, exits and account changes of a unit across a range of months.
+
+    One query reads the range once: LAG/LEAD over each NIP's appearances,
+    ordered by period, are checked against the previous and next populated
+    periods of the unit, so months without data are skipped rather than
+    counted as everyone leaving. The first populated period is the baseline
+    and has no events. Statuses stored by comparisons are not used or changed.
+
+    Args:
+        db: Database session (only read)
+        unit: Unit kerja
+        start_month: First month of the range (1-12)
+        start_year: Year of start_month
+        end_month: Last month of the range (1-12)
+        end_year: Year of end_month
+
+    Returns:
+        Dict: 'periods' with data ({'month', 'year'}), 'events' ordered by
+        period then NIP ({'nip', 'nama', 'event', 'month', 'year',
+        'nomor_rekening'}, plus 'nomor_rekening_lama' for account changes;
+        event is 'Masuk', 'Keluar' or 'Rekening Berbeda') and 'summary', the
+        EVENT_COUNTS of every period
+
+    Raises:
+        ValueError: The range ends before it starts
+    """
+    start = period_key(start_month, start_year)
+    end = period_key(end_month, end_year)
+    if start > end:
+        raise ValueError(f"Range ends ({end_month}/{end_year}) before it starts ({start_month}/{start_year})")
+
+    appearances = _appearances(unit, start, end)
+    by_nip = {'partition_by': appearances.c.nip, 'order_by': appearances.c.period}
+    stream = (
+        select(
+            appearances,
+            func.lag(appearances.c.period).over(**by_nip).label('seen_before'),
+            func.lead(appearances.c.period).over(**by_nip).label('seen_after'),
+            func.lag(appearances.c.nomor_rekening).over(**by_nip).label('nomor_rekening_lama')
+        )
+        .subquery('stream')
+    )
+    entered = and_(
+        stream.c.previous_period.isnot(None),
+        or_(stream.c.seen_before.is_(None), stream.c.seen_before != stream.c.previous_period)
+    )
+    left = and_(
+        stream.c.next_period.isnot(None),
+        or_(stream.c.seen_after.is_(None), stream.c.seen_after != stream.c.next_period)
+    )
+    rekening_changed = and_(
+        stream.c.seen_before == stream.c.previous_period,
+        stream.c.nomor_rekening != stream.c.nomor_rekening_lama
+    )
+    rows = db.execute(
+        select(stream, entered.label('entered'), left.label('left'), rekening_changed.label('rekening_changed'))
+        .where(or_(entered, left, rekening_changed))
+    ).all()
+    periods = db.execute(
+        select(appearances.c.period).distinct().order_by(appearances.c.period)
+    ).scalars().all()
+
+    events = []
+    for row in rows:
+        if row.entered:
+            events.append((row.period, row.nip, STATUS_NEW, row, {}))
+        if row.rekening_changed:
+            events.append((row.period, row.nip, STATUS_ACCOUNT_CHANGE, row, {'nomor_rekening_lama': row.nomor_rekening_lama}))
+        if row.left:
+            # An exit shows in the next populated period, where the NIP is missing
+            events.append((row.next_period, row.nip, STATUS_DEPARTED, row, {}))
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    summary = {
+        key: {'month': _period(key)[0], 'year': _period(key)[1], **{count: 0 for count in EVENT_COUNTS.values()}}
+        for key in periods
+    }
+    for key, _, event, _, _ in events:
+        summary[key][EVENT_COUNTS[event]] += 1
+
+    logger.info(f"Movement of {unit} {start_month}/{start_year}-{end_month}/{end_year}: {len(events)} events")
+    return {
+        'periods': [{'month': _period(key)[0], 'year': _period(key)[1]} for key in periods],
+        'events': [
+            {
+                'nip': nip,
+                'nama': row.nama,
+                'event': event,
+                'month': _period(key)[0],
+                'year': _period(key)[1],
+                'nomor_rekening': row.nomor_rekening,
+                **extra
+            }
+            for key, nip, event, row, extra in events
+        ],
+        'summary': list(summary.values())
+    }
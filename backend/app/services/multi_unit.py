@@ -0,0 +1,123 @@
+from typing import List, Optional, Tuple
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from app.services.excel_parser import ExcelParser
+from app.services.upload_pipeline import VALID_UNITS
+from app.services.upload_dedup import copy_and_hash
+import hashlib
+import zipfile
+
+# Container formats accepted by POST /upload/workbook
+WORKBOOK_EXTENSIONS = ('.xlsx', '.zip')
+
+
+@dataclass
+class UnitSource:
+    """One unit's data inside a multi-unit upload."""
+    unit: str
+    path: str
+    filename: str
+    content_hash: str
+    sheet_name: Optional[str] = None
+
+
+def match_unit(name: str) -> Optional[str]:
+    """
+    Map a sheet or file name to its unit, ignoring case and repeated spaces.
+
+    Returns:
+        str or None: The VALID_UNITS entry, or None if the name is not a unit
+    """
+    normalized = " ".join(name.split()).lower()
+    for unit in VALID_UNITS:
+        if unit.lower() == normalized:
+            return unit
+    return None
+
+
+def _workbook_sources(path: str, filename: str, content_hash: str) -> Tuple[List[UnitSource], List[str]]:
+    sources = []
+    skipped = []
+    for sheet_name in ExcelParser.sheet_names(path):
+        unit = match_unit(sheet_name)
+        if unit is None:
+            skipped.append(sheet_name)
+            continue
+        # Sheets share the workbook bytes; tie the hash to the sheet so it never
+        # matches a single-file upload of the same workbook
+        sheet_hash = hashlib.sha256(f"{content_hash}:{sheet_name}".encode('utf-8')).hexdigest()
+        sources.append(UnitSource(unit, path, filename, sheet_hash, sheet_name))
+    return sources, skipped
+
+
+def _zip_sources(path: str, work_dir: Path) -> Tuple[List[UnitSource], List[str]]:
+    sources = []
+    skipped = []
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Failed to parse file: {str(e)}")
+
+    with archive:
+        for index, member in enumerate(archive.infolist()):
+            if member.is_dir() or member.filename.startswith('__MACOSX/'):
+                continue
+            # Only the base name is used, so archive paths cannot escape work_dir
+            name = PurePosixPath(member.filename).name
+            stem, extension = Path(name).stem, Path(name).suffix.lower()
+            unit = match_unit(stem)
+            if unit is None or extension not in ('.xlsx', '.csv'):
+                skipped.append(name)
+                continue
+
+            target_path = work_dir / f"{index}{extension}"
+            with archive.open(member) as member_file, open(target_path, 'wb') as target:
+                member_hash = copy_and_hash(member_file, target)
+            sources.append(UnitSource(unit, str(target_path), name, member_hash))
+    return sources, skipped
+
+
+def split_unit_sources(
+    path: str,
+    filename: str,
+    content_hash: str,
+    work_dir: Path
+) -> Tuple[List[UnitSource], List[str]]:
+    """
+    Find the per-unit data in a workbook (one sheet per unit) or a zip of
+    per-unit files (named after the unit, e.g. "Cabdis Wil. 1.xlsx").
+
+    Args:
+        path: Path of the stored upload
+        filename: Original filename
+        content_hash: SHA-256 of the stored upload
+        work_dir: Directory for files extracted from a zip
+
+    Returns:
+        Tuple: (unit sources, names of sheets/files that are not a unit)
+
+    Raises:
+        ValueError: Unsupported format, unreadable container, no unit found,
+        or a unit present more than once
+    """
+    extension = Path(filename or "").suffix.lower()
+    if extension == '.xlsx':
+        sources, skipped = _workbook_sources(path, filename, content_hash)
+    elif extension == '.zip':
+        work_dir.mkdir(parents=True, exist_ok=True)
+        sources, skipped = _zip_sources(path, work_dir)
+    else:
+        raise ValueError(f"Unsupported file format: {filename}. Only .xlsx and .zip are supported.")
+
+    if not sources:
+        raise ValueError(
+            f"No sheet or file named after a unit was found. Expected names: {', '.join(VALID_UNITS)}"
+        )
+
+    seen = set()
+    for source in sources:
+        if source.unit in seen:
+            raise ValueError(f"Unit {source.unit} appears more than once")
+        seen.add(source.unit)
+
+    return sources, skipped
@@ -0,0 +1,172 @@
+from typing import Dict, Iterable, Iterator, List, Union, BinaryIO
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from app.services.excel_parser import ExcelParser
+from app.services.validation import validate_employee_frame, DuplicateNipTracker
+from app.services.memory_usage import PeakRSSTracker
+import pandas as pd
+import json
+
+# Report formats accepted by POST /upload/preflight
+REPORT_NDJSON = 'ndjson'
+REPORT_XLSX = 'xlsx'
+REPORT_FORMATS = [REPORT_NDJSON, REPORT_XLSX]
+
+ERROR_FILL = PatternFill(start_color='FFC7CE', end_color='FFC7CE', fill_type='solid')
+ERROR_FONT = Font(color='9C0006')
+
+
+def _json_line(record: Dict) -> bytes:
+    return (json.dumps(record, default=str) + "\n").encode('utf-8')
+
+
+def _row_messages(batch: pd.DataFrame) -> Dict[int, List[str]]:
+    """Validation messages of one batch keyed by 1-based row number in the file."""
+    errors = validate_employee_frame(batch)
+    if errors.empty:
+        return {}
+    grouped = errors.groupby('row', sort=True)['message'].agg(list)
+    return {int(batch.index[row]) + 1: messages for row, messages in grouped.items()}
+
+
+def _summary(total_rows: int, invalid_rows: int, duplicates: Dict[str, List[int]], tracker: PeakRSSTracker) -> Dict:
+    errors = ["File contains no data"] if total_rows == 0 else []
+    return {
+        "rows": total_rows,
+        "invalid_rows": invalid_rows,
+        "duplicate_nips": len(duplicates),
+        "valid": total_rows > 0 and invalid_rows == 0 and not duplicates,
+        "errors": errors,
+        "peak_rss_mb": round(tracker.peak_mb, 1)
+    }
+
+
+def preflight_ndjson(batches: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    """
+    Check an upload without touching the database, as a stream of NDJSON lines.
+
+    Each invalid row is emitted as soon as its batch is validated, so memory
+    stays bounded by the batch size however many rows fail. Row numbers are
+    1-based data rows, as in the "Row N" upload errors.
+
+    Lines:
+        {"type": "row_error", "row": N, "nip": ..., "messages": [...]}
+        {"type": "duplicate_nip", "nip": ..., "rows": [N, ...]}   (after all rows)
+        {"type": "summary", "rows": ..., "invalid_rows": ..., "duplicate_nips": ..., "valid": ...}
+
+    Args:
+        batches: Batches from ExcelParser.iter_batches
+
+    Yields:
+        bytes: One JSON document per line
+    """
+    tracker = PeakRSSTracker()
+    nip_tracker = DuplicateNipTracker()
+    total_rows = 0
+    invalid_rows = 0
+
+    for batch in batches:
+        total_rows += len(batch)
+        nip_tracker.add(batch['NIP'])
+        for row, messages in _row_messages(batch).items():
+            invalid_rows += 1
+            yield _json_line({
+                "type": "row_error",
+                "row": row,
+                "nip": batch.at[row - 1, 'NIP'],
+                "messages": messages
+            })
+        tracker.sample()
+
+    duplicates = nip_tracker.duplicates
+    for nip, rows in sorted(duplicates.items(), key=lambda item: item[1][0]):
+        yield _json_line({"type": "duplicate_nip", "nip": nip, "rows": [row + 1 for row in rows]})
+
+    yield _json_line({"type": "summary", **_summary(total_rows, invalid_rows, duplicates, tracker)})
+
+
+def write_annotated_workbook(
+    source: Union[str, BinaryIO],
+    filename: str,
+    target_path: str,
+    batch_size: int = None
+) -> Dict:
+    """
+    Write a copy of the upload with an "Errors" column next to every row.
+
+    Two streaming passes over the file: the first finds duplicate NIPs, the
+    second validates and writes each batch with openpyxl's write-only mode, so
+    neither the input nor the report is held in memory.
+
+    Args:
+        source: Path or seekable file object
+        filename: Original filename
+        target_path: Where to write the annotated .xlsx
+        batch_size: Rows per batch
+
+    Returns:
+        Dict: Summary (rows, invalid_rows, duplicate_nips, valid, errors, peak_rss_mb)
+
+    Raises:
+        ValueError: Unsupported format, parsing errors or missing columns
+    """
+    tracker = PeakRSSTracker()
+    nip_tracker = DuplicateNipTracker()
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    for batch in ExcelParser.iter_batches(source, filename, batch_size):
+        nip_tracker.add(batch['NIP'])
+        tracker.sample()
+
+    duplicates = nip_tracker.duplicates
+    duplicate_rows = {
+        row + 1: f"Duplicate NIP {nip} (rows {', '.join(str(other + 1) for other in rows)})"
+        for nip, rows in duplicates.items()
+        for row in rows
+    }
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Preflight")
+    total_rows = 0
+    invalid_rows = 0
+    header_written = False
+
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    for batch in ExcelParser.iter_batches(source, filename, batch_size):
+        if not header_written:
+            sheet.append([str(column) for column in batch.columns] + ["Errors"])
+            header_written = True
+
+        messages = _row_messages(batch)
+        invalid_rows += len(messages)
+        total_rows += len(batch)
+
+        for position, values in enumerate(batch.itertuples(index=False, name=None)):
+            row = int(batch.index[position]) + 1
+            row_errors = messages.get(row, [])
+            if row in duplicate_rows:
+                row_errors = row_errors + [duplicate_rows[row]]
+            if row_errors:
+                cell = WriteOnlyCell(sheet, value="; ".join(row_errors))
+                cell.fill = ERROR_FILL
+                cell.font = ERROR_FONT
+            else:
+                cell = None
+            sheet.append(list(values) + [cell])
+        tracker.sample()
+
+    if not header_written:
+        sheet.append(list(ExcelParser.REQUIRED_COLUMNS) + ["Errors"])
+
+    summary = _summary(total_rows, invalid_rows, duplicates, tracker)
+    summary_sheet = workbook.create_sheet("Summary")
+    for key in ("rows", "invalid_rows", "duplicate_nips", "valid"):
+        summary_sheet.append([key, summary[key]])
+    for message in summary["errors"]:
+        summary_sheet.append(["error", message])
+
+    workbook.save(target_path)
+    return summary
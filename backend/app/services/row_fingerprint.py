@@ -0,0 +1,74 @@
+from typing import Dict, Iterable, List
+import hashlib
+
+# Employee data compared between months, in the order it is hashed
+COMPARABLE_FIELDS = [
+    'nama',
+    'nik',
+    'npwp',
+    'tgl_lahir',
+    'kode_bank',
+    'nama_bank',
+    'nomor_rekening'
+]
+
+# Separator that cannot occur in the stored text
+FIELD_SEPARATOR = '\x1f'
+
+
+def _field_text(value) -> str:
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def fingerprint_values(values: Iterable) -> str:
+    """SHA-256 hex digest of COMPARABLE_FIELDS values given in that order."""
+    text = FIELD_SEPARATOR.join(_field_text(value) for value in values)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def row_fingerprint(row: Dict) -> str:
+    """
+    Fingerprint of one employee row (stored in pegawai.fingerprint).
+
+    Two rows with the same fingerprint have the same COMPARABLE_FIELDS, so the
+    comparison only diffs field by field when fingerprints differ.
+
+    Args:
+        row: Row keyed by pegawai column names (e.g. from build_pegawai_row)
+
+    Returns:
+        str: 64-character hex digest
+    """
+    return fingerprint_values(row.get(name) for name in COMPARABLE_FIELDS)
+
+
+def field_changes(current: Dict, previous: Dict) -> List[Dict]:
+    """
+    Per-field diff of one employee between two months.
+
+    Args:
+        current: COMPARABLE_FIELDS of the current row
+        previous: COMPARABLE_FIELDS of the previous row
+
+    Returns:
+        List[Dict]: One {'field', 'old', 'new'} per differing field, in
+        COMPARABLE_FIELDS order (dates as ISO strings, as Pegawai.to_dict() does)
+    """
+    changes = []
+    for name in COMPARABLE_FIELDS:
+        old = _plain(previous.get(name))
+        new = _plain(current.get(name))
+        if old != new:
+            changes.append({'field': name, 'old': old, 'new': new})
+    return changes
+
+
+def _plain(value):
+    """JSON-ready value: dates as ISO strings, everything else unchanged."""
+    if value is not None and hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
@@ -0,0 +1,161 @@
+from typing import Dict, List
+from sqlalchemy import select, case, func, literal, or_
+from sqlalchemy.orm import Session, aliased
+from app.models.pegawai import Pegawai
+from app.services.row_fingerprint import COMPARABLE_FIELDS, field_changes
+from app.services.comparator import (
+    ComparisonResult,
+    ComparisonSummary,
+    STATUS_NEW,
+    STATUS_DEPARTED,
+    STATUS_ACCOUNT_CHANGE,
+    STATUS_UNCHANGED
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields returned per employee by the in-database engine; nomor_rekening_lama is added for account changes
+COMPARISON_FIELDS = ['id', 'nip', 'nama', 'nomor_rekening', 'status']
+
+
+def _snapshot(unit: str, month: int, year: int, name: str):
+    """The comparison columns of the present employees (departed=0) of one unit/month/year as a subquery."""
+    return (
+        select(Pegawai.id, Pegawai.nip, Pegawai.nama, Pegawai.nomor_rekening)
+        .where(Pegawai.unit == unit, Pegawai.month == month, Pegawai.year == year, Pegawai.departed == 0)
+        .subquery(name)
+    )
+
+
+def _field_changes(
+    db: Session,
+    unit: str,
+    month: int,
+    year: int,
+    prev_month: int,
+    prev_year: int
+) -> List[Dict]:
+    """
+    Field-level changes of employees present in both snapshots.
+    The join only returns pairs whose fingerprints differ (or are missing),
+    so unchanged employees never leave the database.
+    """
+    current = aliased(Pegawai, name='cur')
+    previous = aliased(Pegawai, name='prev')
+    rows = db.execute(
+        select(
+            current.id,
+            current.nip,
+            *[getattr(current, name).label(name) for name in COMPARABLE_FIELDS],
+            *[getattr(previous, name).label(f"prev_{name}") for name in COMPARABLE_FIELDS]
+        )
+        .join(previous, current.nip == previous.nip)
+        .where(
+            current.unit == unit, current.month == month, current.year == year, current.departed == 0,
+            previous.unit == unit, previous.month == prev_month, previous.year == prev_year, previous.departed == 0,
+            or_(
+                current.fingerprint.is_(None),
+                previous.fingerprint.is_(None),
+                current.fingerprint != previous.fingerprint
+            )
+        )
+        .order_by(current.id)
+    ).all()
+
+    result = []
+    for row in rows:
+        changes = field_changes(
+            {name: getattr(row, name) for name in COMPARABLE_FIELDS},
+            {name: getattr(row, f"prev_{name}") for name in COMPARABLE_FIELDS}
+        )
+        if changes:
+            result.append({'id': row.id, 'nip': row.nip, 'changes': changes})
+    return result
+
+
+def compare_in_database(
+    db: Session,
+    unit: str,
+    month: int,
+    year: int,
+    prev_month: int,
+    prev_year: int
+) -> ComparisonResult:
+    """
+    Compare two snapshots of a unit with one FULL OUTER JOIN on NIP, in the database.
+
+    Only the classification and COMPARISON_FIELDS come back, one row per employee,
+    instead of two full snapshots loaded as ORM objects. Rows are ordered like
+    EmployeeComparator: current employees in upload (id) order, then departed
+    employees in their previous-month order.
+
+    Args:
+        db: Database session
+        unit: Unit kerja
+        month: Current month (1-12)
+        year: Current year
+        prev_month: Month compared against
+        prev_year: Year compared against
+
+    Returns:
+        ComparisonResult: Same categories, summary and field changes as
+        EmployeeComparator.compare_months, with COMPARISON_FIELDS per employee
+    """
+    current = _snapshot(unit, month, year, 'cur')
+    previous = _snapshot(unit, prev_month, prev_year, 'prev')
+
+    status = case(
+        (previous.c.nip.is_(None), literal(STATUS_NEW)),
+        (current.c.nip.is_(None), literal(STATUS_DEPARTED)),
+        (current.c.nomor_rekening != previous.c.nomor_rekening, literal(STATUS_ACCOUNT_CHANGE)),
+        else_=literal(STATUS_UNCHANGED)
+    )
+    rows = db.execute(
+        select(
+            func.coalesce(current.c.id, previous.c.id).label('id'),
+            func.coalesce(current.c.nip, previous.c.nip).label('nip'),
+            func.coalesce(current.c.nama, previous.c.nama).label('nama'),
+            func.coalesce(current.c.nomor_rekening, previous.c.nomor_rekening).label('nomor_rekening'),
+            status.label('status'),
+            previous.c.nomor_rekening.label('nomor_rekening_lama')
+        )
+        .select_from(current.join(previous, current.c.nip == previous.c.nip, full=True))
+        .order_by(current.c.id.is_(None), current.c.id, previous.c.id)
+    ).all()
+
+    categories: Dict[str, List[Dict]] = {
+        STATUS_NEW: [],
+        STATUS_DEPARTED: [],
+        STATUS_ACCOUNT_CHANGE: [],
+        STATUS_UNCHANGED: []
+    }
+    for row in rows:
+        record = {field: getattr(row, field) for field in COMPARISON_FIELDS}
+        if row.status == STATUS_ACCOUNT_CHANGE:
+            record['nomor_rekening_lama'] = row.nomor_rekening_lama
+        categories[row.status].append(record)
+
+    departed_count = len(categories[STATUS_DEPARTED])
+    changed_fields = _field_changes(db, unit, month, year, prev_month, prev_year)
+    summary = ComparisonSummary(
+        total_current=len(rows) - departed_count,
+        total_previous=len(rows) - len(categories[STATUS_NEW]),
+        new_count=len(categories[STATUS_NEW]),
+        departed_count=departed_count,
+        account_change_count=len(categories[STATUS_ACCOUNT_CHANGE]),
+        unchanged_count=len(categories[STATUS_UNCHANGED]),
+        field_change_count=len(changed_fields)
+    )
+    logger.info(
+        f"Compared {unit} {month}/{year} with {prev_month}/{prev_year} in the database: "
+        f"{summary.total_current} current, {summary.total_previous} previous"
+    )
+    return ComparisonResult(
+        new_employees=categories[STATUS_NEW],
+        departed_employees=categories[STATUS_DEPARTED],
+        account_changes=categories[STATUS_ACCOUNT_CHANGE],
+        unchanged_employees=categories[STATUS_UNCHANGED],
+        summary=summary,
+        field_changes=changed_fields
+    )
@@ -0,0 +1,274 @@
+from typing import List, Dict
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, String, Text, select, insert, delete, func, and_, or_, true
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.pegawai import Pegawai
+from app.services.bulk_insert import PEGAWAI_COLUMNS
+from app.services.row_fingerprint import COMPARABLE_FIELDS
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of offending rows listed per staging check
+MAX_REPORTED_ROWS = 20
+
+# Key of uq_nip_month_year_unit, the conflict target of upsert_from_staging
+UPSERT_KEY = ['nip', 'month', 'year', 'unit']
+
+# Employee data compared and rewritten by upsert_from_staging; status belongs to comparison
+UPSERT_DATA_COLUMNS = COMPARABLE_FIELDS
+
+# Statuses of employees no longer on the roster; 'Pindah' is not one of them, since
+# the arrival side of a transfer carries it too (see on_roster)
+DEPARTED_STATUSES = ['Keluar', 'Pensiun']
+
+
+def on_roster():
+    """
+    Condition on pegawai rows that are employees present in their period: not
+    departed rows copied in by comparison (whatever status they were given
+    afterwards) and not marked Keluar or Pensiun.
+    """
+    return and_(Pegawai.departed == 0, Pegawai.status.notin_(DEPARTED_STATUSES))
+
+
+def create_staging_table(db: Session) -> Table:
+    """
+    Create a temporary table with the ingest columns of pegawai.
+
+    Temporary tables are private to the session's connection and are not
+    WAL-logged on PostgreSQL. Text columns are unbounded so over-long values
+    reach check_staging_table instead of failing the bulk load.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Table: The staging table (drop it with drop_staging_table)
+    """
+    columns = []
+    for name in PEGAWAI_COLUMNS:
+        source = Pegawai.__table__.c[name]
+        column_type = Text() if isinstance(source.type, String) else source.type
+        columns.append(Column(name, column_type))
+
+    staging = Table(
+        f"pegawai_staging_{uuid.uuid4().hex[:12]}",
+        MetaData(),
+        *columns,
+        prefixes=['TEMPORARY']
+    )
+    staging.create(bind=db.connection())
+    return staging
+
+
+def drop_staging_table(db: Session, staging: Table) -> None:
+    """Drop a staging table created by create_staging_table."""
+    staging.drop(bind=db.connection(), checkfirst=True)
+
+
+def check_staging_table(
+    db: Session,
+    staging: Table,
+    unit: str,
+    month: int,
+    year: int,
+    check_conflicts: bool = True
+) -> List[str]:
+    """
+    Run the duplicate-NIP and constraint checks against the loaded rows in SQL.
+
+    Args:
+        db: Database session
+        staging: Loaded staging table
+        unit: Unit kerja being replaced
+        month: Month number
+        year: Year number
+        check_conflicts: Report NIPs held by rows the swap keeps (off for upserts,
+            which update those rows in place)
+
+    Returns:
+        List[str]: Error messages (empty when the rows can be swapped in)
+    """
+    errors = []
+
+    # NIPs that collide once whitespace is trimmed
+    duplicates = db.execute(
+        select(staging.c.nip, func.count().label('occurrences'))
+        .group_by(staging.c.nip)
+        .having(func.count() > 1)
+        .order_by(staging.c.nip)
+        .limit(MAX_REPORTED_ROWS)
+    ).all()
+    for nip, occurrences in duplicates:
+        errors.append(f"NIP {nip} appears {occurrences} times")
+
+    # Column lengths of the target table
+    for name in PEGAWAI_COLUMNS:
+        target_type = Pegawai.__table__.c[name].type
+        if not isinstance(target_type, String) or target_type.length is None:
+            continue
+        too_long = db.execute(
+            select(staging.c.nip)
+            .where(func.length(staging.c[name]) > target_type.length)
+            .order_by(staging.c.nip)
+            .limit(MAX_REPORTED_ROWS)
+        ).scalars().all()
+        for nip in too_long:
+            errors.append(f"NIP {nip}: {name} is longer than {target_type.length} characters")
+
+    if not check_conflicts:
+        return errors
+
+    # Rows kept by the swap (Keluar, Pensiun, etc.) occupy uq_nip_month_year_unit
+    conflicts = db.execute(
+        select(Pegawai.nip, Pegawai.status)
+        .join(staging, staging.c.nip == Pegawai.nip)
+        .where(
+            Pegawai.month == month,
+            Pegawai.year == year,
+            Pegawai.unit == unit,
+            Pegawai.status != 'Aktif'
+        )
+        .order_by(Pegawai.nip)
+        .limit(MAX_REPORTED_ROWS)
+    ).all()
+    for nip, status in conflicts:
+        errors.append(f"NIP {nip} is already recorded as '{status}' for {unit} {month}/{year}")
+
+    return errors
+
+
+def swap_from_staging(db: Session, staging: Table, unit: str, month: int, year: int) -> int:
+    """
+    Replace the 'Aktif' rows of one unit/month/year with the staged rows.
+    Runs as DELETE + INSERT ... SELECT; the caller commits, so readers see
+    either the old or the new period, never an empty one.
+
+    Args:
+        db: Database session
+        staging: Checked staging table
+        unit: Unit kerja
+        month: Month number
+        year: Year number
+
+    Returns:
+        int: Number of rows inserted
+    """
+    deleted = db.execute(
+        delete(Pegawai).where(and_(
+            Pegawai.month == month,
+            Pegawai.year == year,
+            Pegawai.unit == unit,
+            Pegawai.status == 'Aktif'
+        ))
+    ).rowcount
+
+    inserted = db.execute(
+        insert(Pegawai.__table__).from_select(
+            PEGAWAI_COLUMNS,
+            select(*[staging.c[name] for name in PEGAWAI_COLUMNS])
+        )
+    ).rowcount
+
+    logger.info(f"Swapped {unit} {month}/{year}: {deleted} 'Aktif' rows replaced by {inserted}")
+    return inserted
+
+
+def _upsert_statement(db: Session, staging: Table):
+    """
+    INSERT ... SELECT from the staging table ON CONFLICT (uq_nip_month_year_unit) DO UPDATE,
+    rewriting a row only when it is not overridden and one of its data columns differs.
+    """
+    target = Pegawai.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        statement = postgresql.insert(target)
+        conflict_target = {'constraint': 'uq_nip_month_year_unit'}
+    elif dialect == 'sqlite':
+        statement = sqlite.insert(target)
+        conflict_target = {'index_elements': UPSERT_KEY}
+    else:
+        raise ValueError(f"Upsert uploads are not supported on {dialect}")
+
+    # WHERE true keeps SQLite from reading ON CONFLICT as a join constraint
+    statement = statement.from_select(
+        PEGAWAI_COLUMNS,
+        select(*[staging.c[name] for name in PEGAWAI_COLUMNS]).where(true())
+    )
+    changed = or_(*[
+        target.c[name].is_distinct_from(statement.excluded[name])
+        for name in UPSERT_DATA_COLUMNS + ['departed']
+    ])
+    return statement.on_conflict_do_update(
+        **conflict_target,
+        set_={
+            **{name: statement.excluded[name] for name in UPSERT_DATA_COLUMNS},
+            'fingerprint': statement.excluded.fingerprint,
+            # An employee back in the file is on the roster again
+            'departed': statement.excluded.departed,
+            # Application clock, like Pegawai.updated_at's onupdate, so incremental recompares see the edit
+            'updated_at': datetime.now()
+        },
+        where=and_(target.c.manual_override == 0, changed)
+    )
+
+
+def upsert_from_staging(db: Session, staging: Table, unit: str, month: int, year: int) -> Dict[str, int]:
+    """
+    Merge the staged rows into one unit/month/year in place.
+
+    Rows are matched on uq_nip_month_year_unit, so they keep their id and their
+    status. A matched row is only written when its data changed; rows with
+    manual_override=1 are never written or deleted. Employees missing from the
+    file are deleted, except departed rows recorded by comparison.
+    The caller commits.
+
+    Args:
+        db: Database session
+        staging: Checked staging table
+        unit: Unit kerja
+        month: Month number
+        year: Year number
+
+    Returns:
+        Dict: Row counts: staged, inserted, updated, unchanged, overridden, deleted
+    """
+    period = and_(Pegawai.month == month, Pegawai.year == year, Pegawai.unit == unit)
+    staged = db.execute(select(func.count()).select_from(staging)).scalar()
+    matched, overridden = db.execute(
+        select(func.count(), func.coalesce(func.sum(Pegawai.manual_override), 0))
+        .select_from(Pegawai)
+        .join(staging, staging.c.nip == Pegawai.nip)
+        .where(period)
+    ).one()
+
+    deleted = db.execute(
+        delete(Pegawai).where(and_(
+            period,
+            Pegawai.manual_override == 0,
+            on_roster(),
+            Pegawai.nip.notin_(select(staging.c.nip))
+        ))
+    ).rowcount
+
+    # Inserted and updated rows are counted together; skipped conflicts are not
+    written = db.execute(_upsert_statement(db, staging)).rowcount
+    inserted = staged - matched
+    updated = written - inserted
+    counts = {
+        'staged': staged,
+        'inserted': inserted,
+        'updated': updated,
+        'unchanged': matched - overridden - updated,
+        'overridden': overridden,
+        'deleted': deleted
+    }
+
+    logger.info(
+        f"Upserted {unit} {month}/{year}: {inserted} inserted, {updated} updated, "
+        f"{counts['unchanged']} unchanged, {overridden} overridden, {deleted} deleted"
+    )
+    return counts
@@ -0,0 +1,190 @@
+from typing import Dict, List, Tuple
+from datetime import datetime
+from contextlib import contextmanager
+from sqlalchemy import MetaData, Table, Column, Text, String, DateTime, values, column, select, insert, update, literal, and_
+from sqlalchemy.orm import Session, aliased
+from app.models.pegawai import Pegawai
+from app.services.bulk_insert import PEGAWAI_COLUMNS
+from app.services.comparator import (
+    ComparisonResult,
+    STATUS_NEW,
+    STATUS_DEPARTED,
+    STATUS_ACCOUNT_CHANGE,
+    STATUS_UNCHANGED
+)
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _status_rows(db: Session, pairs: List[Tuple[str, str]]):
+    """
+    (nip, status) pairs as a FROM source with columns nip and status.
+    An inline VALUES list on PostgreSQL; elsewhere (SQLite in tests), which cannot
+    name the columns of a VALUES list, a temporary table filled with executemany.
+    """
+    if db.get_bind().dialect.name == 'postgresql':
+        yield values(
+            column('nip', String), column('status', String), name='v', literal_binds=True
+        ).data(pairs)
+        return
+
+    rows = Table(
+        f"status_writeback_{uuid.uuid4().hex[:12]}",
+        MetaData(),
+        # Keyed on nip so the UPDATE looks rows up instead of scanning the table per employee
+        Column('nip', Text, primary_key=True),
+        Column('status', Text),
+        prefixes=['TEMPORARY']
+    )
+    rows.create(bind=db.connection())
+    try:
+        db.execute(insert(rows), [{'nip': nip, 'status': status} for nip, status in pairs])
+        yield rows
+    finally:
+        rows.drop(bind=db.connection(), checkfirst=True)
+
+
+def preview_write_back(db: Session, result: ComparisonResult, unit: str, month: int, year: int) -> List[Dict]:
+    """
+    Rows the current period would hold after write_back_statuses, without writing.
+
+    Current employees get their comparison status, except rows with
+    manual_override set, which keep their stored status (one read of the
+    overridden rows). Departed employees follow, as the 'Keluar' rows that
+    would be added (id None, month/year of the current period).
+
+    Args:
+        db: Database session (only read)
+        result: Comparison of the current period
+        unit: Unit kerja
+        month: Current month
+        year: Current year
+
+    Returns:
+        List[Dict]: Rows in the order POST /compare returns them (by id, added rows last)
+    """
+    overridden = dict(db.execute(
+        select(Pegawai.id, Pegawai.status).where(
+            Pegawai.month == month,
+            Pegawai.year == year,
+            Pegawai.unit == unit,
+            Pegawai.manual_override == 1
+        )
+    ).all())
+
+    current = sorted(
+        result.new_employees + result.account_changes + result.unchanged_employees,
+        key=lambda record: record['id']
+    )
+    rows = [
+        {**record, 'status': overridden[record['id']]} if record['id'] in overridden else record
+        for record in current
+    ]
+    rows.extend(
+        {**record, 'id': None, 'month': month, 'year': year, 'status': STATUS_DEPARTED, 'departed': 1}
+        for record in result.departed_employees
+    )
+    return rows
+
+
+def write_back_statuses(
+    db: Session,
+    result: ComparisonResult,
+    unit: str,
+    month: int,
+    year: int,
+    prev_month: int,
+    prev_year: int,
+    departed_only_in_result: bool = False
+) -> Dict[str, int]:
+    """
+    Store a comparison in the current period with two set-based statements.
+
+    One UPDATE ... FROM (VALUES ...) sets Masuk, Rekening Berbeda and Aktif on
+    every row whose status differs, skipping rows with manual_override set;
+    updated_at is kept, so the comparison's own writes are not seen as edits
+    by the next incremental recompare.
+    One INSERT ... SELECT copies every employee of the compared month missing
+    from the current period as 'Keluar' (rows already present, e.g. from a
+    manual override, are left alone). The caller commits.
+
+    Args:
+        db: Database session
+        result: Comparison of the current period with prev_month/prev_year
+        unit: Unit kerja
+        month: Current month
+        year: Current year
+        prev_month: Month the current period was compared with
+        prev_year: Year the current period was compared with
+        departed_only_in_result: Only copy the departed employees listed in
+            result (a partial comparison, see incremental_compare)
+
+    Returns:
+        Dict: Number of statuses changed ('updated') and departed rows added ('departed')
+    """
+    pairs = (
+        [(emp['nip'], STATUS_NEW) for emp in result.new_employees]
+        + [(emp['nip'], STATUS_ACCOUNT_CHANGE) for emp in result.account_changes]
+        + [(emp['nip'], STATUS_UNCHANGED) for emp in result.unchanged_employees]
+    )
+
+    updated = 0
+    if pairs:
+        with _status_rows(db, pairs) as rows:
+            updated = db.execute(
+                update(Pegawai)
+                .where(
+                    Pegawai.nip == rows.c.nip,
+                    Pegawai.month == month,
+                    Pegawai.year == year,
+                    Pegawai.unit == unit,
+                    Pegawai.manual_override == 0,  # Only update if not manually overridden
+                    Pegawai.status != rows.c.status
+                )
+                .values(status=rows.c.status, updated_at=Pegawai.updated_at)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+
+    departed = 0
+    if result.departed_employees:
+        previous = aliased(Pegawai, name='prev')
+        current = aliased(Pegawai, name='cur')
+        now = datetime.now()
+        copied = {
+            'status': literal(STATUS_DEPARTED),
+            'manual_override': literal(0),
+            'departed': literal(1),
+            'month': literal(month),
+            'year': literal(year),
+            'created_at': literal(now, DateTime),
+            'updated_at': literal(now, DateTime)
+        }
+        departed_rows = (
+            select(*[copied.get(name, getattr(previous, name)) for name in PEGAWAI_COLUMNS])
+            .where(
+                previous.month == prev_month,
+                previous.year == prev_year,
+                previous.unit == unit,
+                ~select(current.id).where(and_(
+                    current.nip == previous.nip,
+                    current.month == month,
+                    current.year == year,
+                    current.unit == unit
+                )).exists()
+            )
+            .order_by(previous.id)
+        )
+        if departed_only_in_result:
+            departed_rows = departed_rows.where(previous.nip.in_([emp['nip'] for emp in result.departed_employees]))
+        departed = db.execute(
+            insert(Pegawai.__table__).from_select(PEGAWAI_COLUMNS, departed_rows)
+        ).rowcount
+
+    logger.info(
+        f"Wrote back comparison of {unit} {month}/{year}: {updated} statuses changed, "
+        f"{departed} departed employees added with status {STATUS_DEPARTED}"
+    )
+    return {'updated': updated, 'departed': departed}
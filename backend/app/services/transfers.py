@@ -0,0 +1,101 @@
+from typing import Dict, List, Optional
+from collections import defaultdict
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from app.models.pegawai import Pegawai
+from app.services.comparator import STATUS_NEW, STATUS_DEPARTED
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Status of both rows of a cross-unit transfer
+STATUS_TRANSFER = 'Pindah'
+
+# Statuses that can be one side of a transfer; Pindah is included so the pair is
+# found again when comparing the arrival unit again resets its side to Masuk
+TRANSFER_CANDIDATE_STATUSES = [STATUS_NEW, STATUS_DEPARTED, STATUS_TRANSFER]
+
+# Rows updated per UPDATE ... WHERE id IN (...)
+UPDATE_BATCH_SIZE = 1000
+
+
+def _transfer_pair(rows: List) -> Optional[Dict]:
+    """
+    The arrival and departure row of one NIP, or None when the rows are not a
+    transfer: exactly two units, not both Masuk or both Keluar, not both Pindah.
+    """
+    if len(rows) != 2 or rows[0].unit == rows[1].unit:
+        return None
+    statuses = {rows[0].status, rows[1].status}
+    if statuses in ({STATUS_NEW}, {STATUS_DEPARTED}, {STATUS_TRANSFER}):
+        return None
+    # The Masuk row arrives and the Keluar row departs; a Pindah row is the other side
+    if rows[0].status == STATUS_NEW or rows[1].status == STATUS_DEPARTED:
+        arrival, departure = rows
+    else:
+        departure, arrival = rows
+    return {'arrival': arrival, 'departure': departure}
+
+
+def detect_transfers(db: Session, month: int, year: int) -> List[Dict]:
+    """
+    Reclassify employees who left one unit and joined another in the same
+    period as 'Pindah' on both sides.
+
+    One SELECT loads the Masuk/Keluar/Pindah rows of every unit in the period
+    (manual overrides excluded), a NIP index over them pairs each new row with
+    the departed row of another unit, and one UPDATE per UPDATE_BATCH_SIZE ids
+    sets both rows to Pindah (keeping updated_at, as write_back_statuses does).
+    Run after the units' comparisons were written back; the caller commits.
+
+    Args:
+        db: Database session
+        month: Month (1-12)
+        year: Year
+
+    Returns:
+        List[Dict]: {'nip', 'nama', 'from_unit', 'to_unit'} per transfer whose
+        rows were changed, in NIP order
+    """
+    candidates = db.execute(
+        select(Pegawai.id, Pegawai.nip, Pegawai.nama, Pegawai.unit, Pegawai.status)
+        .where(
+            Pegawai.month == month,
+            Pegawai.year == year,
+            Pegawai.status.in_(TRANSFER_CANDIDATE_STATUSES),
+            Pegawai.manual_override == 0
+        )
+        .order_by(Pegawai.id)
+    ).all()
+
+    index = defaultdict(list)
+    for row in candidates:
+        index[row.nip].append(row)
+
+    transfers = []
+    ids = []
+    for nip in sorted(index):
+        pair = _transfer_pair(index[nip])
+        if pair is None:
+            continue
+        changed = [row.id for row in pair.values() if row.status != STATUS_TRANSFER]
+        if not changed:
+            continue
+        ids.extend(changed)
+        transfers.append({
+            'nip': nip,
+            'nama': pair['arrival'].nama,
+            'from_unit': pair['departure'].unit,
+            'to_unit': pair['arrival'].unit
+        })
+
+    for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+        db.execute(
+            update(Pegawai)
+            .where(Pegawai.id.in_(ids[start:start + UPDATE_BATCH_SIZE]))
+            .values(status=STATUS_TRANSFER, updated_at=Pegawai.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+
+    logger.info(f"Detected {len(transfers)} transfers between units in {month}/{year}")
+    return transfers
@@ -0,0 +1,158 @@
+from typing import Optional, BinaryIO
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.pegawai import Pegawai
+from app.models.upload_fingerprint import UploadFingerprint
+from app.services.excel_parser import ExcelParser
+import pandas as pd
+import hashlib
+
+# Bytes read per chunk while copying and hashing an upload
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def copy_and_hash(source: BinaryIO, target: BinaryIO) -> str:
+    """
+    Copy an uploaded file to its storage location, hashing it on the way.
+
+    Returns:
+        str: SHA-256 hex digest of the file bytes
+    """
+    digest = hashlib.sha256()
+    while True:
+        chunk = source.read(COPY_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+        target.write(chunk)
+    return digest.hexdigest()
+
+
+def file_hash(path: str) -> str:
+    """
+    Hash a file already on disk, reading it in chunks.
+
+    Returns:
+        str: SHA-256 hex digest of the file bytes
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as source:
+        while True:
+            chunk = source.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class RowHasher:
+    """
+    Hash of the normalized rows of a file, fed batch by batch.
+
+    Only the required columns are hashed, as stripped text, in file order, so
+    the same data re-saved from Excel (different bytes, same rows) still matches.
+    """
+
+    def __init__(self):
+        self._digest = hashlib.sha256()
+
+    def update(self, batch: pd.DataFrame) -> None:
+        normalized = pd.DataFrame({
+            column: batch[column].astype(str).str.strip()
+            for column in ExcelParser.REQUIRED_COLUMNS
+        })
+        row_hashes = pd.util.hash_pandas_object(normalized, index=False)
+        self._digest.update(row_hashes.to_numpy().tobytes())
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def find_unchanged_upload(
+    db: Session,
+    unit: str,
+    month: int,
+    year: int,
+    content_hash: Optional[str] = None,
+    rows_hash: Optional[str] = None
+) -> Optional[UploadFingerprint]:
+    """
+    Return the recorded upload of a period if it matches the given hash.
+
+    The period must still hold at least as many rows as that upload stored,
+    so data removed outside the upload path is never reported as unchanged.
+
+    Args:
+        db: Database session
+        unit: Unit kerja
+        month: Month number
+        year: Year number
+        content_hash: SHA-256 of the new file bytes
+        rows_hash: RowHasher digest of the new file
+
+    Returns:
+        UploadFingerprint or None
+    """
+    fingerprint = db.query(UploadFingerprint).filter(
+        UploadFingerprint.unit == unit,
+        UploadFingerprint.month == month,
+        UploadFingerprint.year == year
+    ).first()
+    if fingerprint is None:
+        return None
+
+    matches = (
+        (content_hash is not None and fingerprint.content_hash == content_hash)
+        or (rows_hash is not None and fingerprint.rows_hash == rows_hash)
+    )
+    if not matches:
+        return None
+
+    stored_rows = db.query(func.count(Pegawai.id)).filter(
+        Pegawai.month == month,
+        Pegawai.year == year,
+        Pegawai.unit == unit
+    ).scalar()
+    return fingerprint if stored_rows >= fingerprint.row_count else None
+
+
+def record_upload(
+    db: Session,
+    unit: str,
+    month: int,
+    year: int,
+    filename: str,
+    content_hash: str,
+    rows_hash: str,
+    row_count: int
+) -> UploadFingerprint:
+    """
+    Record the hashes of the file just stored for a period.
+    The caller owns the transaction and must commit.
+    """
+    fingerprint = db.query(UploadFingerprint).filter(
+        UploadFingerprint.unit == unit,
+        UploadFingerprint.month == month,
+        UploadFingerprint.year == year
+    ).first()
+    if fingerprint is None:
+        fingerprint = UploadFingerprint(unit=unit, month=month, year=year)
+        db.add(fingerprint)
+
+    fingerprint.filename = filename
+    fingerprint.content_hash = content_hash
+    fingerprint.rows_hash = rows_hash
+    fingerprint.row_count = row_count
+    return fingerprint
+
+
+def forget_upload(db: Session, unit: str, month: int, year: int) -> None:
+    """
+    Drop the recorded upload of a period whose rows were removed.
+    The caller owns the transaction and must commit.
+    """
+    db.query(UploadFingerprint).filter(
+        UploadFingerprint.unit == unit,
+        UploadFingerprint.month == month,
+        UploadFingerprint.year == year
+    ).delete(synchronize_session=False)
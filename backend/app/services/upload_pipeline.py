@@ -0,0 +1,378 @@
+from typing import Union, BinaryIO, Optional, Callable, Dict
+from datetime import datetime
+from sqlalchemy.orm import Session
+from app.models.pegawai import Pegawai
+from app.services.excel_parser import ExcelParser
+from app.services.validation import validate_employee_frame, format_row_errors, DuplicateNipTracker
+from app.services.date_normalization import normalize_dates
+from app.services.bulk_insert import build_pegawai_row, bulk_insert_pegawai
+from app.services.memory_usage import PeakRSSTracker
+from app.services.upload_dedup import RowHasher
+from app.services.staging import (
+    create_staging_table,
+    drop_staging_table,
+    check_staging_table,
+    swap_from_staging,
+    upsert_from_staging
+)
+from app.services.delta_upload import validate_delta_frame, apply_delta
+from app.services.data_version import bump_version
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Valid unit values
+VALID_UNITS = [
+    "Dinas",
+    "Cabdis Wil. 1",
+    "Cabdis Wil. 2",
+    "Cabdis Wil. 3",
+    "Cabdis Wil. 4",
+    "Cabdis Wil. 5",
+    "Cabdis Wil. 6",
+    "PPPK"
+]
+
+# Upload modes accepted by POST /upload
+MODE_STAGING = 'staging'    # load into a temporary table, check in SQL, swap in one transaction
+MODE_DIRECT = 'direct'      # delete the period, commit, then insert straight into pegawai
+MODE_DELTA = 'delta'        # only added, changed and removed employees, applied onto the previous month
+MODE_UPSERT = 'upsert'      # stage, then update changed rows in place (stable ids, overrides untouched)
+UPLOAD_MODES = [MODE_STAGING, MODE_DIRECT, MODE_DELTA, MODE_UPSERT]
+
+# Rows listed in an upload error message; POST /upload/preflight reports all of them
+MAX_REPORTED_ERRORS = 100
+
+
+def scan_upload(
+    source: Union[str, BinaryIO],
+    filename: str,
+    tracker: Optional[PeakRSSTracker] = None,
+    batch_size: int = None,
+    row_hasher: Optional[RowHasher] = None,
+    sheet_name: Optional[str] = None,
+    delta: bool = False
+) -> int:
+    """
+    Validate an uploaded file batch by batch without keeping it in memory.
+    Checks required columns, duplicate NIPs and every field rule. Error messages
+    list at most MAX_REPORTED_ERRORS rows.
+    
+    Args:
+        source: Path or seekable file object
+        filename: Original filename
+        tracker: Optional peak RSS tracker, sampled after every batch
+        batch_size: Rows per batch
+        row_hasher: Optional RowHasher fed with every batch
+        sheet_name: Worksheet of an .xlsx file (defaults to the active sheet)
+        delta: Validate a delta upload (Aksi column, HAPUS rows only need a NIP)
+        
+    Returns:
+        int: Number of data rows in the file
+        
+    Raises:
+        ValueError: Parsing errors, empty file, duplicate NIPs or validation errors
+    """
+    total_rows = 0
+    nip_tracker = DuplicateNipTracker()
+    all_errors = []
+    error_rows = 0
+    
+    for batch in ExcelParser.iter_batches(source, filename, batch_size, sheet_name):
+        total_rows += len(batch)
+        nip_tracker.add(batch['NIP'])
+        frame_errors = validate_delta_frame(batch) if delta else validate_employee_frame(batch)
+        batch_errors = format_row_errors(frame_errors, row_offset=batch.index[0] + 1)
+        error_rows += len(batch_errors)
+        all_errors.extend(batch_errors[:MAX_REPORTED_ERRORS - len(all_errors)])
+        if row_hasher:
+            row_hasher.update(batch)
+        if tracker:
+            tracker.sample()
+    
+    if total_rows == 0:
+        raise ValueError("File contains no data")
+    
+    if nip_tracker.duplicates:
+        duplicate_details = [
+            f"NIP {nip} appears at rows {indices}"
+            for nip, indices in sorted(nip_tracker.duplicates.items(), key=lambda item: item[1][0])
+        ]
+        if len(duplicate_details) > MAX_REPORTED_ERRORS:
+            omitted = len(duplicate_details) - MAX_REPORTED_ERRORS
+            duplicate_details = duplicate_details[:MAX_REPORTED_ERRORS] + [
+                f"{omitted} more duplicated NIPs (run POST /upload/preflight for the full report)"
+            ]
+        raise ValueError(f"Duplicate NIP entries found: {'; '.join(duplicate_details)}")
+    
+    if all_errors:
+        if error_rows > len(all_errors):
+            all_errors.append(
+                f"{error_rows - len(all_errors)} more rows with errors "
+                f"(run POST /upload/preflight for the full report)"
+            )
+        raise ValueError(f"Validation errors: {' | '.join(all_errors)}")
+    
+    return total_rows
+
+
+def scan_upload_file(
+    path: str,
+    filename: str,
+    batch_size: int = None,
+    sheet_name: Optional[str] = None,
+    mode: str = MODE_STAGING
+) -> Dict:
+    """
+    Validate a stored upload from its path.
+    Module-level so it can run in a worker process; returns only picklable values.
+    
+    Args:
+        path: Path of the stored upload
+        filename: Original filename (selects the reader)
+        batch_size: Rows per batch
+        sheet_name: Worksheet of an .xlsx file (defaults to the active sheet)
+        mode: Upload mode the file will be stored with
+        
+    Returns:
+        Dict: {'rows': data row count, 'rows_hash': RowHasher digest,
+               'peak_rss_mb': peak RSS of the scanning process}
+        
+    Raises:
+        ValueError: Parsing errors, empty file, duplicate NIPs or validation errors
+    """
+    tracker = PeakRSSTracker()
+    row_hasher = RowHasher()
+    rows = scan_upload(path, filename, tracker, batch_size, row_hasher, sheet_name, delta=mode == MODE_DELTA)
+    return {'rows': rows, 'rows_hash': row_hasher.hexdigest(), 'peak_rss_mb': tracker.peak_mb}
+
+
+def store_upload(
+    db: Session,
+    source: Union[str, BinaryIO],
+    filename: str,
+    unit: str,
+    month: int,
+    year: int,
+    tracker: Optional[PeakRSSTracker] = None,
+    batch_size: int = None,
+    progress: Optional[Callable[[int], None]] = None,
+    table_name: str = Pegawai.__tablename__,
+    sheet_name: Optional[str] = None
+) -> int:
+    """
+    Stream a validated file into pegawai (or a staging table), one bulk insert per batch.
+    The caller owns the transaction and must commit or roll back.
+    
+    Args:
+        db: Database session
+        source: Path or seekable file object (rewound by the caller)
+        filename: Original filename
+        unit: Unit kerja
+        month: Month number
+        year: Year number
+        tracker: Optional peak RSS tracker, sampled after every batch
+        batch_size: Rows per batch
+        progress: Optional callback receiving the running stored count after every batch
+        table_name: Target table
+        sheet_name: Worksheet of an .xlsx file (defaults to the active sheet)
+        
+    Returns:
+        int: Number of rows stored
+        
+    Raises:
+        ValueError: If a row cannot be converted
+    """
+    now = datetime.now()
+    stored_count = 0
+    
+    for batch in ExcelParser.iter_batches(source, filename, batch_size, sheet_name):
+        rows = []
+        # Same conversion the validation rule used, one vectorized pass per batch
+        dates = normalize_dates(batch['Tanggal Lahir']).tolist()
+        for employee, tgl_lahir in zip(batch.to_dict('records'), dates):
+            try:
+                if tgl_lahir is None:
+                    raise ValueError(f"Unable to parse date: {employee['Tanggal Lahir']}")
+                rows.append(build_pegawai_row(employee, tgl_lahir, unit, month, year, now))
+            except Exception as e:
+                logger.error(f"Error storing employee {employee.get('NIP')}: {e}")
+                raise ValueError(f"Error storing employee {employee.get('NIP')}: {str(e)}")
+        
+        stored_count += bulk_insert_pegawai(db, rows, table_name=table_name)
+        if tracker:
+            tracker.sample()
+        if progress:
+            progress(stored_count)
+    
+    return stored_count
+
+
+def replace_period(
+    db: Session,
+    source: Union[str, BinaryIO],
+    filename: str,
+    unit: str,
+    month: int,
+    year: int,
+    tracker: Optional[PeakRSSTracker] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    sheet_name: Optional[str] = None
+) -> int:
+    """
+    Replace the 'Aktif' rows of one unit/month/year with a validated file.
+    Keluar, Pensiun, etc. written by comparison are preserved.
+    
+    Args:
+        db: Database session
+        source: Path or seekable file object (already checked with scan_upload)
+        filename: Original filename
+        unit: Unit kerja
+        month: Month number
+        year: Year number
+        tracker: Optional peak RSS tracker
+        progress: Optional callback receiving the running stored count
+        sheet_name: Worksheet of an .xlsx file (defaults to the active sheet)
+        
+    Returns:
+        int: Number of rows stored
+        
+    Raises:
+        ValueError: If a row cannot be converted (the insert is rolled back)
+        IntegrityError: If the database rejects the rows (the insert is rolled back)
+    """
+    # Only delete records with status 'Aktif' to preserve comparison results (Keluar, Pensiun, etc.)
+    existing = db.query(Pegawai).filter(
+        Pegawai.month == month,
+        Pegawai.year == year,
+        Pegawai.unit == unit,
+        Pegawai.status == 'Aktif'
+    )
+    existing_count = existing.count()
+    
+    if existing_count > 0:
+        logger.info(f"Found {existing_count} existing 'Aktif' records for {unit} {month}/{year}. Replacing...")
+        existing.delete(synchronize_session=False)
+        db.commit()  # Commit delete before adding new records
+        logger.info(f"Deleted {existing_count} existing 'Aktif' records")
+    
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    try:
+        stored_count = store_upload(
+            db, source, filename, unit, month, year, tracker,
+            progress=progress, sheet_name=sheet_name
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    logger.info(f"Successfully stored {stored_count} records")
+    return stored_count
+
+
+def replace_period_staged(
+    db: Session,
+    source: Union[str, BinaryIO],
+    filename: str,
+    unit: str,
+    month: int,
+    year: int,
+    tracker: Optional[PeakRSSTracker] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    sheet_name: Optional[str] = None,
+    upsert: bool = False
+) -> int:
+    """
+    Replace the 'Aktif' rows of one unit/month/year through a staging table.
+    The file is bulk-loaded into a temporary table and checked there; pegawai is
+    only touched by the final DELETE + INSERT ... SELECT, committed together.
+    On any failure the period keeps its previous rows.
+    
+    With upsert, the final step is upsert_from_staging instead: existing rows
+    keep their id, unchanged and manually overridden rows are not written.
+    
+    Args:
+        db: Database session
+        source: Path or seekable file object (already checked with scan_upload)
+        filename: Original filename
+        unit: Unit kerja
+        month: Month number
+        year: Year number
+        tracker: Optional peak RSS tracker
+        progress: Optional callback receiving the running staged count
+        sheet_name: Worksheet of an .xlsx file (defaults to the active sheet)
+        upsert: Merge into the period instead of replacing its 'Aktif' rows
+        
+    Returns:
+        int: Number of rows stored
+        
+    Raises:
+        ValueError: If a row cannot be converted or the staging checks fail
+        IntegrityError: If the database rejects the rows
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    
+    staging = create_staging_table(db)
+    try:
+        staged_count = store_upload(
+            db, source, filename, unit, month, year, tracker,
+            progress=progress, table_name=staging.name, sheet_name=sheet_name
+        )
+        
+        errors = check_staging_table(db, staging, unit, month, year, check_conflicts=not upsert)
+        if errors:
+            raise ValueError(f"Staging checks failed: {'; '.join(errors)}")
+        
+        if upsert:
+            stored_count = upsert_from_staging(db, staging, unit, month, year)['staged']
+        else:
+            stored_count = swap_from_staging(db, staging, unit, month, year)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        drop_staging_table(db, staging)
+        db.commit()
+    
+    logger.info(f"Successfully stored {stored_count} of {staged_count} staged records")
+    return stored_count
+
+
+def ingest_upload(
+    db: Session,
+    mode: str,
+    source: Union[str, BinaryIO],
+    filename: str,
+    unit: str,
+    month: int,
+    year: int,
+    tracker: Optional[PeakRSSTracker] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    sheet_name: Optional[str] = None
+) -> int:
+    """
+    Store a validated upload using one of UPLOAD_MODES.
+    Arguments are those of replace_period_staged / replace_period / apply_delta.
+    
+    Raises:
+        ValueError: Unknown mode, or any error raised by the selected mode
+    """
+    try:
+        if mode == MODE_STAGING:
+            return replace_period_staged(db, source, filename, unit, month, year, tracker, progress, sheet_name)
+        if mode == MODE_DIRECT:
+            return replace_period(db, source, filename, unit, month, year, tracker, progress, sheet_name)
+        if mode == MODE_UPSERT:
+            return replace_period_staged(db, source, filename, unit, month, year, tracker, progress, sheet_name, upsert=True)
+        if mode == MODE_DELTA:
+            return apply_delta(db, source, filename, unit, month, year, tracker, progress, sheet_name)
+        raise ValueError(f"Invalid mode. Must be one of: {', '.join(UPLOAD_MODES)}")
+    finally:
+        # Every mode commits its own writes (direct mode even before failing),
+        # so cached comparisons of the period are invalidated in any case
+        bump_version(db, unit, month, year, replaced=True)
+        db.commit()
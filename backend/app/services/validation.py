@@ -1,6 +1,19 @@
-from typing import List, Dict
-from datetime import datetime
-import re
+from typing import List, Dict, Callable
+from app.services.date_normalization import parse_date, normalize_dates
+import numpy as np
+import pandas as pd
+
+# Columns checked by the employee validators
+VALIDATED_COLUMNS = [
+    'NIP',
+    'Nama',
+    'NIK',
+    'NPWP',
+    'Tanggal Lahir',
+    'Kode Bank',
+    'Nama Bank',
+    'Nomor Rekening'
+]
 
 
 def validate_nip(nip: str) -> bool:
@@ -67,22 +80,11 @@ def validate_tanggal_lahir(tanggal: str) -> bool:
     if not tanggal:
         return False
     
-    # Try multiple date formats
-    date_formats = [
-        '%Y-%m-%d',      # 2023-12-31
-        '%d/%m/%Y',      # 31/12/2023
-        '%d-%m-%Y',      # 31-12-2023
-        '%Y/%m/%d',      # 2023/12/31
-    ]
-    
-    for date_format in date_formats:
-        try:
-            datetime.strptime(tanggal, date_format)
-            return True
-        except ValueError:
-            continue
-    
-    return False
+    try:
+        parse_date(tanggal)
+        return True
+    except ValueError:
+        return False
 
 
 def validate_kode_bank(kode: str) -> bool:
@@ -105,10 +107,145 @@ def validate_kode_bank(kode: str) -> bool:
     return len(kode) == 3
 
 
+# str() of cell values that compare equal to 0 (and are therefore falsy)
+ZERO_TEXTS = ['0', '0.0', '-0.0', 'False']
+
+
+def _text(series: pd.Series) -> pd.Series:
+    """
+    Convert a column to Arrow-backed strings with str() semantics.
+    Datetime columns go through object dtype so the time part is kept like str(Timestamp).
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        series = series.astype(object)
+    return series.astype(str).astype('string[pyarrow]')
+
+
+def _missing_mask(series: pd.Series, text: pd.Series) -> np.ndarray:
+    """
+    Vectorized equivalent of `not value` for a column of cell values.
+    None/NaN, empty strings and zero are treated as missing.
+    """
+    missing = series.isna().to_numpy() | (text == '').to_numpy(dtype=bool, na_value=False)
+    
+    # Only rows whose text looks like zero need the (Python) equality check
+    zero_candidates = text.isin(ZERO_TEXTS).to_numpy(dtype=bool, na_value=False) & ~missing
+    values = series.to_numpy()
+    for row in zero_candidates.nonzero()[0]:
+        missing[row] = values[row] == 0
+    return missing
+
+
+def _string_check(text: pd.Series, vectorized: Callable, python_check: Callable) -> np.ndarray:
+    """
+    Evaluate a string predicate over a whole column with Arrow compute kernels.
+    Non-ASCII rows are re-checked with the equivalent Python predicate, because
+    Arrow and str differ on some Unicode categories (e.g. '²'.isdigit()).
+    """
+    mask = vectorized(text).to_numpy(dtype=bool, na_value=False)
+    non_ascii = text.str.contains(r'[^\x00-\x7f]', regex=True).to_numpy(dtype=bool, na_value=False)
+    for row in non_ascii.nonzero()[0]:
+        mask[row] = python_check(text.iat[row])
+    return mask
+
+
+def validate_employee_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Validate a whole upload at once, one vectorized operation per rule and column.
+    Produces the same messages as validate_employee_data.
+    
+    Args:
+        df: DataFrame with the Excel columns (missing columns count as empty)
+        
+    Returns:
+        pd.DataFrame: Error table with columns 'row' (0-based position) and 'message',
+        ordered by row and then by rule. Empty if all rows are valid.
+    """
+    df = df.reset_index(drop=True).reindex(columns=VALIDATED_COLUMNS)
+    
+    text = {col: _text(df[col]) for col in VALIDATED_COLUMNS}
+    missing = {col: _missing_mask(df[col], text[col]) for col in VALIDATED_COLUMNS}
+    
+    def blank(col):
+        return missing[col] | _string_check(
+            text[col],
+            lambda s: s.str.strip() == '',
+            lambda v: not v.strip()
+        )
+    
+    # (mask, message) pairs in the same order as validate_employee_data
+    rules = [
+        (missing['NIP'], "NIP is required"),
+        (
+            ~missing['NIP'] & _string_check(
+                text['NIP'],
+                lambda s: ~s.str.strip().str.isalnum(),
+                lambda v: not v.strip().isalnum()
+            ),
+            "NIP must be non-empty and alphanumeric"
+        ),
+        (blank('Nama'), "Nama is required"),
+        (blank('NIK'), "NIK is required"),
+        (blank('NPWP'), "NPWP is required"),
+        (missing['Tanggal Lahir'], "Tanggal Lahir is required"),
+        (
+            ~missing['Tanggal Lahir'] & normalize_dates(df['Tanggal Lahir']).isna().to_numpy(),
+            "Tanggal Lahir must be in valid date format (YYYY-MM-DD, DD/MM/YYYY, or DD-MM-YYYY)"
+        ),
+        (missing['Kode Bank'], "Kode Bank is required"),
+        (
+            ~missing['Kode Bank'] & _string_check(
+                text['Kode Bank'],
+                lambda s: s.str.strip().str.len() != 3,
+                lambda v: len(v.strip()) != 3
+            ),
+            "Kode Bank must be exactly 3 characters"
+        ),
+        (blank('Nama Bank'), "Nama Bank is required"),
+        (missing['Nomor Rekening'], "Nomor Rekening is required"),
+        (
+            ~missing['Nomor Rekening'] & _string_check(
+                text['Nomor Rekening'],
+                lambda s: ~s.str.strip().str.isdigit(),
+                lambda v: not v.strip().isdigit()
+            ),
+            "Nomor Rekening must be non-empty and numeric"
+        ),
+    ]
+    
+    parts = []
+    for order, (mask, message) in enumerate(rules):
+        rows = mask.nonzero()[0]
+        if len(rows):
+            parts.append(pd.DataFrame({'row': rows, 'rule': order, 'message': message}))
+    
+    if not parts:
+        return pd.DataFrame({'row': pd.Series(dtype='int64'), 'message': pd.Series(dtype=object)})
+    
+    errors = pd.concat(parts, ignore_index=True).sort_values(['row', 'rule'], kind='stable')
+    return errors[['row', 'message']].reset_index(drop=True)
+
+
+def format_row_errors(errors: pd.DataFrame, row_offset: int = 0) -> List[str]:
+    """
+    Format an error table from validate_employee_frame as "Row N: msg; msg" strings.
+    
+    Args:
+        errors: Error table with 'row' and 'message' columns
+        row_offset: Added to the 0-based row position (1 gives spreadsheet-style numbering)
+        
+    Returns:
+        List[str]: One string per row that has errors
+    """
+    grouped = errors.groupby('row', sort=True)['message'].agg('; '.join)
+    return [f"Row {row + row_offset}: {messages}" for row, messages in grouped.items()]
+
+
 def validate_employee_data(employee: Dict) -> List[str]:
     """
     Comprehensive validation of employee data.
     Returns list of validation errors.
+    Thin per-row wrapper around validate_employee_frame.
     
     Args:
         employee: Dictionary containing employee data
@@ -116,57 +253,8 @@ def validate_employee_data(employee: Dict) -> List[str]:
     Returns:
         List[str]: List of validation error messages (empty if valid)
     """
-    errors = []
-    
-    # Validate NIP
-    nip = employee.get('NIP')
-    if not nip:
-        errors.append("NIP is required")
-    elif not validate_nip(str(nip)):
-        errors.append("NIP must be non-empty and alphanumeric")
-    
-    # Validate Nama
-    nama = employee.get('Nama')
-    if not nama or (isinstance(nama, str) and not nama.strip()):
-        errors.append("Nama is required")
-    
-    # Validate NIK
-    nik = employee.get('NIK')
-    if not nik or (isinstance(nik, str) and not str(nik).strip()):
-        errors.append("NIK is required")
-    
-    # Validate NPWP
-    npwp = employee.get('NPWP')
-    if not npwp or (isinstance(npwp, str) and not str(npwp).strip()):
-        errors.append("NPWP is required")
-    
-    # Validate Tanggal Lahir
-    tgl_lahir = employee.get('Tanggal Lahir')
-    if not tgl_lahir:
-        errors.append("Tanggal Lahir is required")
-    elif not validate_tanggal_lahir(str(tgl_lahir)):
-        errors.append("Tanggal Lahir must be in valid date format (YYYY-MM-DD, DD/MM/YYYY, or DD-MM-YYYY)")
-    
-    # Validate Kode Bank
-    kode_bank = employee.get('Kode Bank')
-    if not kode_bank:
-        errors.append("Kode Bank is required")
-    elif not validate_kode_bank(str(kode_bank)):
-        errors.append("Kode Bank must be exactly 3 characters")
-    
-    # Validate Nama Bank
-    nama_bank = employee.get('Nama Bank')
-    if not nama_bank or (isinstance(nama_bank, str) and not nama_bank.strip()):
-        errors.append("Nama Bank is required")
-    
-    # Validate Nomor Rekening
-    nomor_rekening = employee.get('Nomor Rekening')
-    if not nomor_rekening:
-        errors.append("Nomor Rekening is required")
-    elif not validate_nomor_rekening(str(nomor_rekening)):
-        errors.append("Nomor Rekening must be non-empty and numeric")
-    
-    return errors
+    errors = validate_employee_frame(pd.DataFrame([employee]))
+    return errors['message'].tolist()
 
 
 def check_duplicate_nip(employees: List[Dict], month: int, year: int) -> Dict[str, List[int]]:
@@ -195,3 +283,58 @@ def check_duplicate_nip(employees: List[Dict], month: int, year: int) -> Dict[st
     duplicates = {nip: indices for nip, indices in nip_occurrences.items() if len(indices) > 1}
     
     return duplicates
+
+
+class DuplicateNipTracker:
+    """
+    Incremental duplicate-NIP check for uploads processed in batches.
+    Keeps only a sorted array of 64-bit NIP hashes and first-row positions
+    (16 bytes per row) instead of every NIP string.
+    """
+    
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._rows = np.empty(0, dtype=np.int64)
+        # NIP -> all row positions, only for NIPs seen more than once
+        self.duplicates: Dict[str, List[int]] = {}
+    
+    def add(self, nips: pd.Series) -> None:
+        """
+        Register one batch of NIPs.
+        
+        Args:
+            nips: NIP column of one batch, indexed by row position in the whole file
+        """
+        text = _text(nips)
+        present = ~_missing_mask(nips, text)
+        keys = text.str.strip().to_numpy(dtype=object)[present]
+        if not len(keys):
+            return
+        rows = nips.index.to_numpy(dtype=np.int64)[present]
+        
+        hashes = pd.util.hash_array(keys)
+        order = np.argsort(hashes, kind='stable')
+        hashes, rows, keys = hashes[order], rows[order], keys[order]
+        
+        # Seen in an earlier batch, or repeated within this batch
+        pos = np.searchsorted(self._hashes, hashes)
+        if len(self._hashes):
+            seen = self._hashes[np.minimum(pos, len(self._hashes) - 1)] == hashes
+        else:
+            seen = np.zeros(len(hashes), dtype=bool)
+        repeated = np.r_[False, hashes[1:] == hashes[:-1]]
+        
+        for idx in np.flatnonzero(seen | repeated):
+            nip = keys[idx]
+            if nip in self.duplicates:
+                self.duplicates[nip].append(int(rows[idx]))
+            else:
+                first = self._rows[pos[idx]] if seen[idx] else rows[idx - 1]
+                self.duplicates[nip] = [int(first), int(rows[idx])]
+        
+        new = ~seen & ~repeated
+        merged_hashes = np.concatenate([self._hashes, hashes[new]])
+        merged_rows = np.concatenate([self._rows, rows[new]])
+        # Both parts are already sorted, so the stable sort is a linear merge
+        order = np.argsort(merged_hashes, kind='stable')
+        self._hashes, self._rows = merged_hashes[order], merged_rows[order]
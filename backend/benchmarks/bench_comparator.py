@@ -0,0 +1,125 @@
+"""
+Benchmark: the four-pass ORM comparison vs the columnar EmployeeComparator.
+
+The previous path classifies a list of Pegawai objects with identify_new /
+departed / account_changes / unchanged and calls to_dict() on every object.
+The columnar path classifies two frames in one merge (classify) and builds
+the same ComparisonResult from the columns (compare_frames).
+
+Each month has ROWS employees: 5% leave, 5% join and 5% change account.
+Rows carry fingerprints, so the columnar path only diffs the changed ones
+(the ORM path has no field-level diff; 'same result' compares categories).
+Building the ORM objects and frames is not timed.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_comparator
+    python -m benchmarks.bench_comparator 10000 100000
+"""
+import sys
+import time
+from datetime import date, datetime
+import pandas as pd
+from app.models.pegawai import Pegawai
+from app.services.comparator import EmployeeComparator, ComparisonResult, ComparisonSummary, FRAME_COLUMNS
+from app.services.row_fingerprint import row_fingerprint
+
+ROW_COUNTS = [10_000, 100_000, 1_000_000]
+
+
+def make_rows(count: int, month: int, shift: int, changed_every: int):
+    """Rows of one month; NIPs shifted by `shift`, every n-th account number changed."""
+    now = datetime(2024, month, 1, 8, 30)
+    rows = [
+        {
+            'id': i + 1,
+            'nip': f"{198001012000000000 + i + shift}",
+            'nama': f"Pegawai {i + shift}",
+            'nik': f"{3200000000000000 + i + shift}",
+            'npwp': f"0{10000000000000 + i + shift}",
+            'tgl_lahir': date(1980, 1, 1),
+            'kode_bank': '114',
+            'nama_bank': 'BCA',
+            'nomor_rekening': f"{(i + shift) * 7 + (1 if changed_every and i % changed_every == 0 else 0)}",
+            'status': 'Aktif',
+            'manual_override': 0,
+            'unit': 'Dinas',
+            'month': month,
+            'year': 2024,
+            'created_at': now,
+            'updated_at': now
+        }
+        for i in range(count)
+    ]
+    for row in rows:
+        row['fingerprint'] = row_fingerprint(row)
+    return rows
+
+
+CATEGORIES = ('new_employees', 'departed_employees', 'account_changes', 'unchanged_employees')
+
+
+def legacy_compare(current, previous) -> ComparisonResult:
+    """Previous compare_months: four passes over ORM objects, to_dict() on every one."""
+    new = EmployeeComparator.identify_new_employees(current, previous)
+    departed = EmployeeComparator.identify_departed_employees(current, previous)
+    changes = EmployeeComparator.identify_account_changes(current, previous)
+    unchanged = EmployeeComparator.identify_unchanged_employees(current, previous)
+
+    def records(employees, status):
+        result = []
+        for emp in employees:
+            emp_dict = emp.to_dict()
+            emp_dict['status'] = status
+            result.append(emp_dict)
+        return result
+
+    account_changes = []
+    for emp, old_account in changes:
+        emp_dict = emp.to_dict()
+        emp_dict['status'] = 'Rekening Berbeda'
+        emp_dict['nomor_rekening_lama'] = old_account
+        account_changes.append(emp_dict)
+
+    return ComparisonResult(
+        new_employees=records(new, 'Masuk'),
+        departed_employees=records(departed, 'Keluar'),
+        account_changes=account_changes,
+        unchanged_employees=records(unchanged, 'Aktif'),
+        summary=ComparisonSummary(len(current), len(previous), len(new), len(departed), len(changes), len(unchanged))
+    )
+
+
+def same_categories(legacy: ComparisonResult, columnar: ComparisonResult) -> bool:
+    return all(getattr(legacy, name) == getattr(columnar, name) for name in CATEGORIES)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def run(row_counts):
+    print(f"{'rows':>9} {'orm 4-pass (s)':>15} {'classify (s)':>13} {'columnar (s)':>13} {'speedup':>8} {'same result':>12}")
+    for count in row_counts:
+        churn = count // 20
+        previous_rows = make_rows(count, 4, 0, 0)
+        current_rows = make_rows(count, 5, churn, 20)
+
+        previous_frame = pd.DataFrame.from_records(previous_rows, columns=FRAME_COLUMNS)
+        current_frame = pd.DataFrame.from_records(current_rows, columns=FRAME_COLUMNS)
+        previous_objects = [Pegawai(**row) for row in previous_rows]
+        current_objects = [Pegawai(**row) for row in current_rows]
+        del previous_rows, current_rows
+
+        legacy_time, legacy = timed(legacy_compare, current_objects, previous_objects)
+        classify_time, _ = timed(EmployeeComparator.classify, current_frame, previous_frame)
+        columnar_time, columnar = timed(EmployeeComparator.compare_frames, current_frame, previous_frame)
+
+        print(f"{count:>9} {legacy_time:>15.3f} {classify_time:>13.3f} {columnar_time:>13.3f} "
+              f"{legacy_time / columnar_time:>7.1f}x {str(same_categories(legacy, columnar)):>12}")
+        del previous_objects, current_objects, legacy, columnar
+
+
+if __name__ == "__main__":
+    run([int(arg) for arg in sys.argv[1:]] or ROW_COUNTS)
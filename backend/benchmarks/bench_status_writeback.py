@@ -0,0 +1,123 @@
+"""
+Benchmark: per-employee status write-back vs the set-based write_back_statuses.
+
+The previous /compare write-back ran one UPDATE per employee and two SELECTs
+per departed employee before inserting it. write_back_statuses does one
+UPDATE ... FROM and one INSERT ... SELECT. Both write the same comparison of
+a unit with 5% joiners, leavers and account changes into a fresh SQLite file
+database; the time includes the commit.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_status_writeback
+"""
+import os
+import tempfile
+import time
+from datetime import date, datetime
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models.pegawai import Pegawai
+from app.services.comparator import EmployeeComparator
+from app.services.month_utils import get_period_frame
+from app.services.status_writeback import write_back_statuses
+
+ROW_COUNTS = [1_000, 10_000, 50_000]
+
+
+def make_rows(count: int, month: int, shift: int, changed_every: int):
+    now = datetime(2024, month, 1)
+    return [
+        {
+            'nip': f"{198001012000000000 + i + shift}",
+            'nama': f"Pegawai {i + shift}",
+            'nik': '3200000000000000',
+            'npwp': '010000000000000',
+            'tgl_lahir': date(1980, 1, 1),
+            'kode_bank': '114',
+            'nama_bank': 'BCA',
+            'nomor_rekening': f"{(i + shift) * 7 + (1 if changed_every and i % changed_every == 0 else 0)}",
+            'status': 'Aktif',
+            'manual_override': 0,
+            'unit': 'Dinas',
+            'month': month,
+            'year': 2024,
+            'created_at': now,
+            'updated_at': now
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_write_back(db, result, unit, month, year, prev_month, prev_year):
+    """Previous write-back of POST /compare, one statement per employee."""
+    for status, employees in (
+        ('Masuk', result.new_employees),
+        ('Rekening Berbeda', result.account_changes),
+        ('Aktif', result.unchanged_employees)
+    ):
+        for emp_dict in employees:
+            db.query(Pegawai).filter(
+                Pegawai.nip == emp_dict['nip'],
+                Pegawai.month == month,
+                Pegawai.year == year,
+                Pegawai.unit == unit,
+                Pegawai.manual_override == 0
+            ).update({'status': status})
+
+    for emp_dict in result.departed_employees:
+        existing = db.query(Pegawai).filter(
+            Pegawai.nip == emp_dict['nip'], Pegawai.month == month, Pegawai.year == year, Pegawai.unit == unit
+        ).first()
+        if not existing:
+            prev_employee = db.query(Pegawai).filter(
+                Pegawai.nip == emp_dict['nip'], Pegawai.month == prev_month,
+                Pegawai.year == prev_year, Pegawai.unit == unit
+            ).first()
+            if prev_employee:
+                db.add(Pegawai(
+                    nip=prev_employee.nip, nama=prev_employee.nama, nik=prev_employee.nik,
+                    npwp=prev_employee.npwp, tgl_lahir=prev_employee.tgl_lahir,
+                    kode_bank=prev_employee.kode_bank, nama_bank=prev_employee.nama_bank,
+                    nomor_rekening=prev_employee.nomor_rekening, unit=prev_employee.unit,
+                    month=month, year=year, status='Keluar', manual_override=0
+                ))
+
+
+def timed_write_back(write_back, count: int) -> float:
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        Base.metadata.create_all(engine)
+        db = sessionmaker(bind=engine)()
+        db.execute(insert(Pegawai.__table__), make_rows(count, 4, 0, 0))
+        db.execute(insert(Pegawai.__table__), make_rows(count, 5, count // 20, 20))
+        db.commit()
+        result = EmployeeComparator.compare_frames(
+            get_period_frame(db, 5, 2024, 'Dinas'), get_period_frame(db, 4, 2024, 'Dinas')
+        )
+
+        start = time.perf_counter()
+        write_back(db, result, 'Dinas', 5, 2024, 4, 2024)
+        db.commit()
+        elapsed = time.perf_counter() - start
+
+        assert db.query(Pegawai).filter(Pegawai.month == 5, Pegawai.status == 'Keluar').count() == count // 20
+        db.close()
+        return elapsed
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+def run():
+    print(f"{'rows':>7} {'per employee (s)':>17} {'set-based (s)':>14} {'speedup':>8}")
+    for count in ROW_COUNTS:
+        legacy = timed_write_back(legacy_write_back, count)
+        set_based = timed_write_back(write_back_statuses, count)
+        print(f"{count:>7} {legacy:>17.3f} {set_based:>14.3f} {legacy / set_based:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,137 @@
+import asyncio
+import pytest
+from hypothesis import given, strategies as st, settings
+from fastapi import FastAPI, Depends
+from fastapi.testclient import TestClient
+from app.services.admission import AdmissionController, AdmissionRejected, WorkClass, get_admission_controller
+from app.routers import admission
+
+
+def make_controller(limits, memory_budget_mb, max_queue):
+    """Controller with one class per (concurrency, memory_mb) pair, priorities in list order."""
+    classes = {
+        f"class{i}": WorkClass(name=f"class{i}", priority=i, concurrency=concurrency, memory_mb=memory_mb)
+        for i, (concurrency, memory_mb) in enumerate(limits)
+    }
+    return AdmissionController(classes, memory_budget_mb=memory_budget_mb, max_queue=max_queue)
+
+
+# Feature: employee-data-comparison, Property 36: Admission limits
+# Validates: Requirements 8.1, 8.4
+@given(
+    limits=st.lists(
+        st.tuples(st.integers(min_value=1, max_value=3), st.integers(min_value=0, max_value=600)),
+        min_size=1, max_size=3
+    ),
+    memory_budget_mb=st.integers(min_value=100, max_value=1000),
+    max_queue=st.integers(min_value=0, max_value=10),
+    requests=st.lists(
+        st.tuples(st.integers(min_value=0, max_value=2), st.integers(min_value=0, max_value=5)),
+        min_size=1, max_size=30
+    )
+)
+@settings(max_examples=50, deadline=None)
+def test_property_admission_respects_limits(limits, memory_budget_mb, max_queue, requests):
+    """
+    For any class limits and any burst of requests, running requests never exceed
+    their class concurrency or (unless one runs alone) the memory budget, every
+    request is either admitted or rejected, requests of one class run in arrival
+    order and nothing is left waiting.
+    """
+    controller = make_controller(limits, memory_budget_mb, max_queue)
+    admitted_order = {name: [] for name in controller.classes}
+    outcomes = []
+
+    def check_limits():
+        running = [controller.stats()['classes'][name]['running'] for name in controller.classes]
+        for count, work_class in zip(running, controller.classes.values()):
+            assert count <= work_class.concurrency
+        assert controller.memory_reserved_mb <= memory_budget_mb or sum(running) == 1
+
+    async def request(index, name, ticks):
+        try:
+            ticket = await controller.acquire(name)
+        except AdmissionRejected as e:
+            assert e.retry_after >= 1
+            outcomes.append('rejected')
+            return
+        admitted_order[name].append(index)
+        check_limits()
+        for _ in range(ticks):
+            await asyncio.sleep(0)
+        controller.release(ticket)
+        outcomes.append('admitted')
+
+    async def burst():
+        await asyncio.gather(*[
+            request(index, f"class{class_index % len(limits)}", ticks)
+            for index, (class_index, ticks) in enumerate(requests)
+        ])
+
+    asyncio.run(burst())
+
+    assert len(outcomes) == len(requests)
+    stats = controller.stats()
+    assert stats['queue_depth'] == 0
+    assert controller.memory_reserved_mb == 0
+    assert sum(c['rejected'] for c in stats['classes'].values()) == outcomes.count('rejected')
+    for order in admitted_order.values():
+        assert order == sorted(order)
+
+
+def test_waiters_are_admitted_by_priority():
+    """When a slot frees up, the waiting request of the highest-priority class goes first."""
+    controller = make_controller([(1, 100), (1, 100)], memory_budget_mb=100, max_queue=10)
+    admitted = []
+
+    async def request(name):
+        ticket = await controller.acquire(name)
+        admitted.append(name)
+        await asyncio.sleep(0)
+        controller.release(ticket)
+
+    async def scenario():
+        first = await controller.acquire('class1')
+        waiting = [asyncio.create_task(request(name)) for name in ('class1', 'class0', 'class1', 'class0')]
+        await asyncio.sleep(0)
+        assert controller.stats()['queue_depth'] == 4
+        controller.release(first)
+        await asyncio.gather(*waiting)
+
+    asyncio.run(scenario())
+    assert admitted == ['class0', 'class0', 'class1', 'class1']
+
+
+@pytest.fixture
+def client():
+    """App with one route guarded by a class limited to one request and no queue."""
+    controller = make_controller([(1, 100)], memory_budget_mb=1000, max_queue=0)
+    app = FastAPI()
+    app.include_router(admission.router)
+
+    @app.post("/heavy", dependencies=[Depends(admission.admission_slot('class0'))])
+    async def heavy():
+        return {"status": "success"}
+
+    app.dependency_overrides[get_admission_controller] = lambda: controller
+    return TestClient(app), controller
+
+
+def test_full_queue_gets_429_with_retry_after(client):
+    http, controller = client
+    assert http.post("/heavy").status_code == 200
+
+    # Hold the only slot, as a long request would
+    ticket = asyncio.run(controller.acquire('class0'))
+    busy = http.post("/heavy")
+    assert busy.status_code == 429
+    assert int(busy.headers['Retry-After']) >= 1
+
+    controller.release(ticket)
+    assert http.post("/heavy").status_code == 200
+
+    stats = http.get("/admission/stats").json()
+    assert stats['queue_depth'] == 0
+    assert stats['classes']['class0']['admitted'] == 3
+    assert stats['classes']['class0']['rejected'] == 1
+    assert stats['classes']['class0']['running'] == 0
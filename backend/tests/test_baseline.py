@@ -0,0 +1,94 @@
+from hypothesis import given, strategies as st, settings
+from dataclasses import asdict
+from datetime import date
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.batch_compare import compute_comparison
+from app.services.data_version import bump_version
+from app.services.month_utils import find_baseline_period, get_baseline_period, get_previous_month
+
+
+# Context manager for creating test database
+@contextmanager
+def get_test_db():
+    """Create a test database session and a log of its statements."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    TestSessionLocal = sessionmaker(bind=engine)
+    db = TestSessionLocal()
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record_statements(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    try:
+        yield db, statements
+    finally:
+        db.close()
+
+
+def upload(db, nips, month, year):
+    """Add a period as an upload would: the rows, then a version bump."""
+    for nip in nips:
+        db.add(Pegawai(
+            nip=f"N{nip}",
+            nama=f"Pegawai {nip}",
+            nik='1234567890123456',
+            npwp='123456789012345',
+            tgl_lahir=date(1980, 1, 1),
+            kode_bank='114',
+            nama_bank='BCA',
+            nomor_rekening='111',
+            status='Aktif',
+            unit="Dinas",
+            month=month,
+            year=year
+        ))
+    bump_version(db, "Dinas", month, year, replaced=True)
+    db.commit()
+
+
+# (month, year) in 2023-2024
+periods = st.tuples(st.integers(min_value=1, max_value=12), st.integers(min_value=2023, max_value=2024))
+
+
+# Feature: employee-data-comparison, Property 47: The baseline is the latest earlier period with data
+# Validates: Requirements 3.1, 3.2
+@given(
+    uploaded=st.dictionaries(periods, st.sets(st.integers(min_value=1, max_value=10), max_size=6), max_size=8),
+    current=periods
+)
+@settings(max_examples=40, deadline=None)
+def test_property_baseline_is_latest_period_with_data(uploaded, current):
+    """
+    For any uploaded periods (some emptied again), the baseline of a period
+    should be the latest period before it, at most 12 months back, that still
+    has rows, found with one query; comparisons run against it.
+    """
+    with get_test_db() as (db, statements):
+        for (month, year), nips in uploaded.items():
+            upload(db, nips, month, year)
+
+        month, year = current
+        earliest = (year - 1) * 100 + month
+        populated = [
+            (other_month, other_year) for (other_month, other_year), nips in uploaded.items()
+            if nips and earliest <= other_year * 100 + other_month < year * 100 + month
+        ]
+        expected = max(populated, key=lambda period: period[1] * 100 + period[0]) if populated else None
+
+        statements.clear()
+        assert find_baseline_period(db, month, year, "Dinas") == expected
+        assert len(statements) == 1
+        assert get_baseline_period(db, month, year, "Dinas") == (expected or get_previous_month(month, year))
+
+        if uploaded.get(current):
+            baseline = get_baseline_period(db, month, year, "Dinas")
+            assert asdict(compute_comparison(db, "Dinas", month, year)) == asdict(
+                compute_comparison(db, "Dinas", month, year, baseline=baseline)
+            )
+            assert compute_comparison(db, "Dinas", month, year).summary.total_previous == len(uploaded.get(expected, ()))
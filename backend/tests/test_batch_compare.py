@@ -0,0 +1,98 @@
+from hypothesis import given, strategies as st, settings
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+import os
+import tempfile
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.batch_compare import compare_units, rollup, UNIT_COMPLETED, UNIT_FAILED
+from app.services.comparator import EmployeeComparator
+from app.services.month_utils import get_period_frame
+
+UNITS = ["Dinas", "SMP", "SMA"]
+
+
+# Context manager for creating a test database shared by worker threads
+@contextmanager
+def get_test_session_factory():
+    """Create a file-backed test database and a session factory for it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'compare.db')}")
+        Base.metadata.create_all(engine)
+        try:
+            yield sessionmaker(bind=engine)
+        finally:
+            engine.dispose()
+
+
+def add_month(db, accounts, unit, month):
+    for nip, account in accounts:
+        db.add(Pegawai(
+            nip=f"N{nip}",
+            nama=f"Pegawai {nip}",
+            nik='1234567890123456',
+            npwp='123456789012345',
+            tgl_lahir=date(1980, 1, 1),
+            kode_bank='114',
+            nama_bank='BCA',
+            nomor_rekening=account,
+            status='Aktif',
+            unit=unit,
+            month=month,
+            year=2024
+        ))
+
+
+accounts = st.lists(
+    st.tuples(st.integers(min_value=1, max_value=20), st.sampled_from(["111", "222"])),
+    max_size=12,
+    unique_by=lambda pair: pair[0]
+)
+
+
+# Feature: employee-data-comparison, Property 41: Batch comparison matches per-unit comparison
+# Validates: Requirements 3.1, 3.2, 3.3, 3.4
+@given(months=st.fixed_dictionaries({unit: st.tuples(accounts, accounts) for unit in UNITS}))
+@settings(max_examples=15, deadline=None)
+def test_property_batch_matches_per_unit_comparison(months):
+    """
+    For any units compared in one batch, each unit's summary should equal the
+    summary of comparing that unit alone, units without current data should
+    fail without affecting the others, and the rollup should sum the summaries.
+    """
+    with get_test_session_factory() as session_factory:
+        db = session_factory()
+        expected = {}
+        for unit, (previous, current) in months.items():
+            add_month(db, previous, unit, 4)
+            add_month(db, current, unit, 5)
+        db.commit()
+        for unit, (previous, current) in months.items():
+            if current:
+                expected[unit] = EmployeeComparator.compare_frames(
+                    get_period_frame(db, 5, 2024, unit), get_period_frame(db, 4, 2024, unit)
+                ).summary
+        db.close()
+
+        outcomes = compare_units(UNITS, 5, 2024, session_factory=session_factory)
+
+        assert list(outcomes) == UNITS
+        for unit in UNITS:
+            if unit in expected:
+                assert outcomes[unit]['status'] == UNIT_COMPLETED
+                assert outcomes[unit]['summary'] == expected[unit].__dict__
+            else:
+                assert outcomes[unit]['status'] == UNIT_FAILED
+
+        totals = rollup(outcomes)
+        assert totals['units_completed'] == len(expected)
+        assert totals['units_failed'] == len(UNITS) - len(expected)
+        assert totals['new_count'] == sum(summary.new_count for summary in expected.values())
+        assert totals['departed_count'] == sum(summary.departed_count for summary in expected.values())
+
+        db = session_factory()
+        departed = db.query(Pegawai).filter(Pegawai.month == 5, Pegawai.status == 'Keluar').count()
+        db.close()
+        assert departed == totals['departed_count']
@@ -0,0 +1,97 @@
+import pytest
+import psycopg2
+import psycopg2.errors
+from hypothesis import given, strategies as st, settings
+from datetime import date, datetime
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql.psycopg2 import PGDialect_psycopg2
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from unittest import mock
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.bulk_insert import build_pegawai_row, bulk_insert_pegawai
+
+
+# Context manager for creating test database
+@contextmanager
+def get_test_db():
+    """Create a test database session."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    TestSessionLocal = sessionmaker(bind=engine)
+    db = TestSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def make_record(i):
+    """Create a validated upload record keyed by Excel column names."""
+    return {
+        'NIP': f" NIP{i} ",
+        'Nama': f"Employee {i}",
+        'NIK': '1234567890123456',
+        'NPWP': '123456789012345',
+        'Tanggal Lahir': '1990-01-01',
+        'Kode Bank': '014',
+        'Nama Bank': 'BCA',
+        'Nomor Rekening': f"{1000 + i}"
+    }
+
+
+# Feature: employee-data-comparison, Property 3: Data persistence round-trip (bulk path)
+# Validates: Requirements 1.3, 5.1
+@given(
+    num_records=st.integers(min_value=1, max_value=50),
+    batch_size=st.integers(min_value=1, max_value=20)
+)
+@settings(max_examples=25)
+def test_property_bulk_insert_round_trip(num_records, batch_size):
+    """
+    For any set of validated records, the bulk ingestion path should store every row
+    once with status 'Aktif', regardless of how the rows are batched.
+    """
+    with get_test_db() as test_db:
+        now = datetime.now()
+        rows = [
+            build_pegawai_row(make_record(i), date(1990, 1, 1), "Dinas", 5, 2024, now)
+            for i in range(num_records)
+        ]
+
+        inserted = bulk_insert_pegawai(test_db, rows, batch_size=batch_size)
+        test_db.commit()
+
+        stored = test_db.query(Pegawai).order_by(Pegawai.id).all()
+
+        assert inserted == num_records
+        assert len(stored) == num_records
+        for i, emp in enumerate(stored):
+            assert emp.nip == f"NIP{i}"
+            assert emp.nomor_rekening == f"{1000 + i}"
+            assert emp.status == 'Aktif'
+            assert emp.manual_override == 0
+            assert (emp.unit, emp.month, emp.year) == ("Dinas", 5, 2024)
+            assert emp.tgl_lahir == date(1990, 1, 1)
+
+
+def test_bulk_insert_empty_input():
+    """Inserting no rows is a no-op."""
+    with get_test_db() as test_db:
+        assert bulk_insert_pegawai(test_db, []) == 0
+        assert test_db.query(Pegawai).count() == 0
+
+
+def test_copy_errors_are_wrapped_like_insert_errors():
+    """A constraint violation raised by COPY reaches callers as SQLAlchemy's IntegrityError."""
+    db = mock.MagicMock()
+    db.get_bind.return_value.dialect = PGDialect_psycopg2(dbapi=psycopg2)
+    cursor = db.connection.return_value.connection.dbapi_connection.cursor.return_value.__enter__.return_value
+    cursor.copy_expert.side_effect = psycopg2.errors.UniqueViolation("duplicate key value violates unique constraint")
+
+    rows = [build_pegawai_row(make_record(1), date(1990, 1, 1), "Dinas", 5, 2024, datetime(2024, 5, 1))]
+    with pytest.raises(IntegrityError) as excinfo:
+        bulk_insert_pegawai(db, rows)
+    assert isinstance(excinfo.value.orig, psycopg2.errors.UniqueViolation)
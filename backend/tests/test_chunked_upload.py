@@ -0,0 +1,141 @@
+import os
+import time
+import tempfile
+import pytest
+from hypothesis import given, strategies as st, settings
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.routers import upload
+from app.services.chunked_upload import ChunkedUploadStore, get_upload_store
+from app.services.ingest_jobs import IngestJobQueue, get_ingest_queue, FINAL_PHASES, PHASE_COMPLETED
+
+
+def make_csv(nips):
+    """Build an upload CSV with one valid row per NIP."""
+    lines = ["NIP,Nama,NIK,NPWP,Tanggal Lahir,Kode Bank,Nama Bank,Nomor Rekening"]
+    for i, nip in enumerate(nips):
+        lines.append(f"{nip},Employee {i},1234567890123456,123456789012345,1990-01-01,114,BCA,{1000 + i}")
+    return "\n".join(lines).encode('utf-8')
+
+
+# Feature: employee-data-comparison, Property 33: Chunked upload reassembly
+# Validates: Requirements 1.1, 1.3
+@given(
+    content=st.binary(min_size=1, max_size=2000),
+    cuts=st.lists(st.integers(min_value=0, max_value=2000), max_size=8),
+    stale_offsets=st.lists(st.integers(min_value=0, max_value=2000), max_size=4)
+)
+@settings(max_examples=50, deadline=None)
+def test_property_chunks_reassemble_the_file(content, cuts, stale_offsets):
+    """
+    For any way of cutting a file into chunks, with chunks re-sent at wrong offsets
+    in between, the finished upload should hold exactly the original bytes.
+    """
+    bounds = sorted({0, len(content), *(cut for cut in cuts if cut < len(content))})
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ChunkedUploadStore(session_dir=tmp)
+        session = store.create("data.csv", "file", 5, 2024, "Dinas", "staging", size=len(content))
+
+        for index, (start, end) in enumerate(zip(bounds, bounds[1:])):
+            # A retried or out-of-order chunk is refused and changes nothing
+            if index < len(stale_offsets) and stale_offsets[index] != start:
+                with pytest.raises(ValueError, match="does not match"):
+                    store.open_chunk(session['id'], stale_offsets[index])
+                assert store.get(session['id'])['offset'] == start
+
+            writer = store.open_chunk(session['id'], start)
+            writer.write(content[start:end])
+            assert writer.close() == end
+
+        finished, path = store.complete(session['id'])
+        with open(path, 'rb') as received:
+            assert received.read() == content
+        assert finished['offset'] == len(content)
+        assert store.get(session['id']) is None
+
+
+def test_incomplete_upload_cannot_be_finalized():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ChunkedUploadStore(session_dir=tmp)
+        session = store.create("data.csv", "file", 5, 2024, "Dinas", "staging", size=10)
+        writer = store.open_chunk(session['id'], 0)
+        writer.write(b"12345")
+        with pytest.raises(ValueError, match="past the declared upload size"):
+            writer.write(b"678901")
+        writer.close()
+
+        with pytest.raises(ValueError, match="received 5 of 10 bytes"):
+            store.complete(session['id'])
+        assert store.get(session['id'])['offset'] == 5
+
+
+@pytest.fixture
+def client():
+    """Upload router with a temporary session store and a queue on a file SQLite database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'jobs.db')}")
+        Base.metadata.create_all(engine)
+        queue = IngestJobQueue(
+            session_factory=sessionmaker(bind=engine),
+            parse_workers=1,
+            db_workers=1,
+            upload_dir=os.path.join(tmp, 'ingest')
+        )
+        store = ChunkedUploadStore(session_dir=os.path.join(tmp, 'ingest', 'sessions'))
+
+        app = FastAPI()
+        app.include_router(upload.router)
+        app.dependency_overrides[get_ingest_queue] = lambda: queue
+        app.dependency_overrides[get_upload_store] = lambda: store
+        try:
+            yield TestClient(app), sessionmaker(bind=engine)
+        finally:
+            queue.shutdown()
+
+
+def test_chunked_upload_feeds_the_ingest_pipeline(client):
+    """Init, PUT chunks (one resent after a lost response), finalize: the rows are stored."""
+    http, session_factory = client
+    content = make_csv([f"C{i}" for i in range(40)])
+    middle = len(content) // 2
+
+    created = http.post("/upload/sessions", data={
+        "filename": "data.csv", "month": 5, "year": 2024, "unit": "Dinas", "size": len(content)
+    })
+    assert created.status_code == 201
+    session_id = created.json()['id']
+
+    assert http.put(f"/upload/sessions/{session_id}?offset=0", content=content[:middle]).json()['offset'] == middle
+    # The client did not see the answer and sends the first chunk again
+    resent = http.put(f"/upload/sessions/{session_id}?offset=0", content=content[:middle])
+    assert resent.status_code == 409
+    assert http.get(f"/upload/sessions/{session_id}").json()['offset'] == middle
+    assert http.put(f"/upload/sessions/{session_id}?offset={middle}", content=content[middle:]).status_code == 200
+
+    accepted = http.post(f"/upload/sessions/{session_id}/finalize")
+    assert accepted.status_code == 202
+    job_id = accepted.json()['job_id']
+
+    deadline = time.time() + 60
+    while http.get(f"/upload/jobs/{job_id}").json()['phase'] not in FINAL_PHASES:
+        assert time.time() < deadline
+        time.sleep(0.05)
+    assert http.get(f"/upload/jobs/{job_id}").json()['phase'] == PHASE_COMPLETED
+
+    db = session_factory()
+    try:
+        assert db.query(Pegawai).filter(Pegawai.unit == "Dinas").count() == 40
+    finally:
+        db.close()
+    assert http.get(f"/upload/sessions/{session_id}").status_code == 404
+
+
+def test_unknown_session_is_not_found(client):
+    http, _ = client
+    assert http.put("/upload/sessions/abc?offset=0", content=b"x").status_code == 404
+    assert http.post("/upload/sessions/abc/finalize").status_code == 404
+    assert http.delete("/upload/sessions/abc").status_code == 404
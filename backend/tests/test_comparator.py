@@ -1,7 +1,8 @@
 import pytest
 from hypothesis import given, strategies as st
 from datetime import date
-from app.services.comparator import EmployeeComparator
+import pandas as pd
+from app.services.comparator import EmployeeComparator, FRAME_COLUMNS
 from app.models.pegawai import Pegawai
 
 
@@ -158,3 +159,43 @@ def test_property_unchanged_employee_identification(nip, account):
     assert len(unchanged) == 1, f"Expected 1 unchanged employee, got {len(unchanged)}"
     assert unchanged[0].nip == nip, f"Expected NIP {nip}, got {unchanged[0].nip}"
     assert unchanged[0].nomor_rekening == account, f"Expected account {account}, got {unchanged[0].nomor_rekening}"
+
+
+# Feature: employee-data-comparison, Property 37: Columnar comparison matches object comparison
+# Validates: Requirements 3.1, 3.2, 3.3, 3.4
+@given(
+    previous_accounts=st.dictionaries(st.integers(min_value=1, max_value=30), st.sampled_from(["111", "222"]), max_size=20),
+    current_accounts=st.dictionaries(st.integers(min_value=1, max_value=30), st.sampled_from(["111", "222"]), max_size=20)
+)
+def test_property_compare_frames_matches_compare_months(previous_accounts, current_accounts):
+    """
+    For any two months, compare_frames on columnar data should return exactly the
+    ComparisonResult of compare_months on the same rows as ORM objects.
+    """
+    def month_objects(accounts, month, first_id):
+        employees = []
+        for offset, (nip, account) in enumerate(accounts.items()):
+            emp = create_test_employee(f"N{nip}", nama=f"Pegawai {nip}", nomor_rekening=account, month=month)
+            emp.id = first_id + offset
+            employees.append(emp)
+        return employees
+
+    previous = month_objects(previous_accounts, 1, 1)
+    current = month_objects(current_accounts, 2, 100)
+
+    def frame(employees):
+        return pd.DataFrame.from_records(
+            [{name: getattr(emp, name) for name in FRAME_COLUMNS} for emp in employees],
+            columns=FRAME_COLUMNS
+        )
+
+    expected = EmployeeComparator.compare_months(current, previous)
+    actual = EmployeeComparator.compare_frames(frame(current), frame(previous))
+
+    assert actual == expected
+    assert actual.summary.total_current == (
+        actual.summary.new_count + actual.summary.account_change_count + actual.summary.unchanged_count
+    )
+    # The fingerprint is only read by the comparison, never returned
+    records = actual.new_employees + actual.departed_employees + actual.account_changes + actual.unchanged_employees
+    assert all('fingerprint' not in record for record in records)
@@ -0,0 +1,117 @@
+from hypothesis import given, strategies as st, settings
+from datetime import date
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+import os
+import tempfile
+from app.models.pegawai import Pegawai
+from app.database import Base, get_db
+from app.routers import compare
+from app.services.admission import AdmissionController, get_admission_controller
+from app.services.comparison_cache import get_comparison_cache
+
+
+# Context manager for creating a test app on its own database
+@contextmanager
+def get_test_client():
+    """Create a file-backed test database, an app using it and a log of its write statements."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'preview.db')}")
+        Base.metadata.create_all(engine)
+        TestSessionLocal = sessionmaker(bind=engine)
+        writes = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def record_writes(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE", "CREATE")):
+                writes.append(statement)
+
+        def override_get_db():
+            db = TestSessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app = FastAPI()
+        app.include_router(compare.router)
+        app.dependency_overrides[get_db] = override_get_db
+        controller = AdmissionController()
+        app.dependency_overrides[get_admission_controller] = lambda: controller
+        get_comparison_cache().clear()
+        try:
+            yield TestClient(app), TestSessionLocal, writes
+        finally:
+            engine.dispose()
+
+
+def add_month(db, accounts, month, overridden=()):
+    for nip, account in accounts:
+        db.add(Pegawai(
+            nip=f"N{nip}",
+            nama=f"Pegawai {nip}",
+            nik='1234567890123456',
+            npwp='123456789012345',
+            tgl_lahir=date(1980, 1, 1),
+            kode_bank='114',
+            nama_bank='BCA',
+            nomor_rekening=account,
+            status='Pensiun' if nip in overridden else 'Aktif',
+            manual_override=1 if nip in overridden else 0,
+            unit="Dinas",
+            month=month,
+            year=2024
+        ))
+    db.commit()
+
+
+accounts = st.lists(
+    st.tuples(st.integers(min_value=1, max_value=20), st.sampled_from(["111", "222"])),
+    max_size=12,
+    unique_by=lambda pair: pair[0]
+)
+
+
+# Feature: employee-data-comparison, Property 44: Comparison preview writes nothing and matches persisting
+# Validates: Requirements 3.1, 3.2, 3.3, 3.4
+@given(
+    previous=accounts,
+    current=accounts.filter(bool),
+    overridden=st.sets(st.integers(min_value=1, max_value=20), max_size=4),
+    engine=st.sampled_from(['columnar', 'database'])
+)
+@settings(max_examples=25, deadline=None)
+def test_property_preview_matches_persisted_comparison(previous, current, overridden, engine):
+    """
+    For any two months, the preview (GET or POST with persist=false) should
+    not write to the database, and its summary and the statuses in its
+    results should be those POST /compare then writes.
+    """
+    with get_test_client() as (http, session_factory, writes):
+        db = session_factory()
+        add_month(db, previous, 4)
+        add_month(db, current, 5, overridden)
+        db.close()
+
+        writes.clear()
+        preview = http.get("/compare/preview", params={"month": 5, "year": 2024, "unit": "Dinas", "engine": engine})
+        assert preview.status_code == 200
+        get_comparison_cache().clear()
+        preview_post = http.post(
+            "/compare", params={"persist": "false"},
+            json={"month": 5, "year": 2024, "unit": "Dinas", "engine": engine}
+        ).json()
+        assert writes == []
+        preview = preview.json()
+        assert not preview['persisted']
+        assert {**preview_post, 'cached': False} == {**preview, 'cached': False}
+
+        persisted = http.post("/compare", json={"month": 5, "year": 2024, "unit": "Dinas", "engine": engine}).json()
+        assert persisted['persisted']
+        assert preview['summary'] == persisted['summary']
+        assert [(row['nip'], row['status']) for row in preview['results']] == [
+            (row['nip'], row['status']) for row in persisted['results']
+        ]
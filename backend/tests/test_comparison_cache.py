@@ -0,0 +1,171 @@
+from hypothesis import given, strategies as st, settings
+from datetime import date
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+import os
+import tempfile
+from app.models.pegawai import Pegawai
+from app.database import Base, get_db
+from app.routers import compare, update, admin
+from app.services.admission import AdmissionController, get_admission_controller
+from app.services.comparison_cache import get_comparison_cache
+from app.services.data_version import bump_version, bump_all_versions
+from app.models.period_version import PeriodVersion
+
+
+# Context manager for creating a test app on its own database
+@contextmanager
+def get_test_client():
+    """Create a file-backed test database, an app using it and a log of its write statements."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'cache.db')}")
+        Base.metadata.create_all(engine)
+        TestSessionLocal = sessionmaker(bind=engine)
+        writes = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def record_writes(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("INSERT", "UPDATE", "DELETE")):
+                writes.append(statement)
+
+        def override_get_db():
+            db = TestSessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app = FastAPI()
+        app.include_router(compare.router)
+        app.include_router(update.router)
+        app.include_router(admin.router)
+        app.dependency_overrides[get_db] = override_get_db
+        controller = AdmissionController()
+        app.dependency_overrides[get_admission_controller] = lambda: controller
+        get_comparison_cache().clear()
+        try:
+            yield TestClient(app), TestSessionLocal, writes
+        finally:
+            engine.dispose()
+
+
+def add_month(db, nips, month):
+    for nip in nips:
+        db.add(Pegawai(
+            nip=f"N{nip}",
+            nama=f"Pegawai {nip}",
+            nik='1234567890123456',
+            npwp='123456789012345',
+            tgl_lahir=date(1980, 1, 1),
+            kode_bank='114',
+            nama_bank='BCA',
+            nomor_rekening='111',
+            status='Aktif',
+            unit="Dinas",
+            month=month,
+            year=2024
+        ))
+    db.commit()
+
+
+operations = st.lists(st.sampled_from(['compare', 'update_status', 'delete_previous']), min_size=1, max_size=8)
+
+
+# Feature: employee-data-comparison, Property 43: Unchanged comparisons are served from cache
+# Validates: Requirements 3.1, 6.1
+@given(
+    previous=st.sets(st.integers(min_value=1, max_value=15), max_size=10),
+    current=st.sets(st.integers(min_value=1, max_value=15), min_size=1, max_size=10),
+    steps=operations
+)
+@settings(max_examples=20, deadline=None)
+def test_property_compare_is_cached_until_a_write(previous, current, steps):
+    """
+    For any sequence of comparisons, status updates and deletes of the previous
+    month, a comparison with no write since the last one should come from the
+    cache without writing, with the same response; after a write it should be
+    computed again and match a fresh comparison.
+    """
+    with get_test_client() as (http, session_factory, writes):
+        db = session_factory()
+        add_month(db, previous, 4)
+        add_month(db, current, 5)
+        db.close()
+
+        request = {"month": 5, "year": 2024, "unit": "Dinas"}
+        last = None
+        for step in ['compare'] + steps:
+            if step == 'compare':
+                writes.clear()
+                response = http.post("/compare", json=request).json()
+                if last is not None:
+                    assert response['cached']
+                    assert writes == []
+                    assert {**response, 'cached': False} == {**last, 'cached': False}
+                last = response
+                continue
+
+            if step == 'update_status':
+                employee_id = response['results'][0]['id']
+                assert http.put("/update/status", json={"id": employee_id, "status": "Pensiun"}).status_code == 200
+            elif http.request("DELETE", "/admin/data", json={"month": 4, "year": 2024, "unit": "Dinas"}).status_code != 200:
+                continue  # Nothing to delete, nothing written
+
+            response = http.post("/compare", json=request).json()
+            assert not response['cached']
+            get_comparison_cache().clear()
+            fresh = http.post("/compare", json=request).json()
+            assert fresh['summary'] == response['summary']
+            last = fresh
+
+
+def test_writes_of_other_workers_are_never_served_from_cache():
+    """
+    A write committed by another API worker (straight to the database, this
+    process's cache untouched) evicts the cached comparison; so does a restore
+    that rewinds period_version, once it bumps every version.
+    """
+    with get_test_client() as (http, session_factory, writes):
+        db = session_factory()
+        add_month(db, [1, 2], 4)
+        add_month(db, [1, 2, 3], 5)
+        bump_version(db, "Dinas", 5, 2024, replaced=True)
+        db.commit()
+        assert db.query(PeriodVersion).count() == 1
+
+        request = {"month": 5, "year": 2024, "unit": "Dinas", "engine": "columnar"}
+        first = http.post("/compare?persist=false", json=request).json()
+        assert http.post("/compare?persist=false", json=request).json()['cached']
+        evictions = get_comparison_cache().stats()['evictions']
+
+        # Another worker adds N3 to month 4, so N3 is no longer new in month 5
+        db.add(Pegawai(
+            nip="N3", nama="Pegawai 3", nik='1234567890123456', npwp='123456789012345',
+            tgl_lahir=date(1980, 1, 1), kode_bank='114', nama_bank='BCA', nomor_rekening='111',
+            status='Aktif', unit="Dinas", month=4, year=2024
+        ))
+        bump_version(db, "Dinas", 4, 2024, replaced=True)
+        db.commit()
+
+        second = http.post("/compare?persist=false", json=request).json()
+        assert not second['cached']
+        assert second['summary']['new_count'] == first['summary']['new_count'] - 1
+        assert get_comparison_cache().stats()['evictions'] == evictions + 1
+        assert http.post("/compare?persist=false", json=request).json()['cached']
+
+        # Restoring a backup taken before any version was written puts back the old
+        # data and rewinds period_version; bumping every version then lands on the
+        # versions of the cached entry again, so only the version time tells them apart
+        db.query(Pegawai).filter(Pegawai.nip == "N3", Pegawai.month == 4).delete()
+        db.query(PeriodVersion).delete()
+        db.commit()
+        bump_all_versions(db)
+        db.commit()
+        db.close()
+
+        third = http.post("/compare?persist=false", json=request).json()
+        assert not third['cached']
+        assert third['summary'] == first['summary']
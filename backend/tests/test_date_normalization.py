@@ -0,0 +1,62 @@
+import pytest
+from hypothesis import given, strategies as st, settings
+from datetime import date, datetime
+from app.services.date_normalization import normalize_dates, parse_date, infer_date_formats
+import pandas as pd
+
+
+def per_row(value):
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
+date_cells = st.one_of(
+    st.dates(min_value=date(1900, 3, 1), max_value=date(2100, 12, 31)).flatmap(
+        lambda d: st.sampled_from([
+            d.strftime('%Y-%m-%d'),
+            d.strftime('%d/%m/%Y'),
+            f" {d.strftime('%d-%m-%Y')} ",
+            d.strftime('%Y/%m/%d'),
+            pd.Timestamp(d),
+            datetime(d.year, d.month, d.day, 8, 30),
+            d,
+            (d - date(1899, 12, 30)).days,
+            float((d - date(1899, 12, 30)).days) + 0.25,
+        ])
+    ),
+    st.sampled_from(['0001-01-01', '9999-12-31', '1990-13-01', '31/02/1990', 'invalid', '', '  ', None, 0, -5, True])
+)
+
+
+# Feature: employee-data-comparison, Property 31: Date normalization matches per-row parsing
+# Validates: Requirements 1.2, 8.5
+@given(cells=st.lists(date_cells, min_size=1, max_size=40))
+@settings(max_examples=100, deadline=None)
+def test_property_column_normalization_matches_per_row_parse(cells):
+    """
+    Converting a whole column at once should give, for every cell, the same date
+    (or None) as parsing that cell on its own, whatever mix of formats it holds.
+    """
+    series = pd.Series(cells, index=range(10, 10 + len(cells)), dtype=object)
+
+    normalized = normalize_dates(series)
+
+    assert list(normalized.index) == list(series.index)
+    assert normalized.tolist() == [per_row(cell) for cell in cells]
+
+
+def test_dominant_format_is_tried_first():
+    text = pd.Series(['31/12/1990', '01/02/1985', '1990-01-01'])
+
+    assert infer_date_formats(text)[0] == '%d/%m/%Y'
+    assert sorted(infer_date_formats(text)) == sorted(infer_date_formats(pd.Series([], dtype=object)))
+
+
+def test_excel_serials_and_timestamps():
+    series = pd.Series([32874, pd.Timestamp('1990-01-01 13:45'), '1990-01-01', 'not a date'])
+
+    assert normalize_dates(series).tolist() == [date(1990, 1, 1)] * 3 + [None]
+    with pytest.raises(ValueError):
+        parse_date('not a date')
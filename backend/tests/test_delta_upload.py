@@ -0,0 +1,148 @@
+import io
+import pytest
+from hypothesis import given, strategies as st, settings
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.upload_pipeline import scan_upload, ingest_upload, MODE_DELTA
+
+HEADER = "NIP,Nama,NIK,NPWP,Tanggal Lahir,Kode Bank,Nama Bank,Nomor Rekening,Aksi"
+
+
+# Context manager for creating test database
+@contextmanager
+def get_test_db():
+    """Create a test database session."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    TestSessionLocal = sessionmaker(bind=engine)
+    db = TestSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def add_employee(db, nip, month, status='Aktif'):
+    db.add(Pegawai(
+        nip=nip,
+        nama=f"Old {nip}",
+        nik='1234567890123456',
+        npwp='123456789012345',
+        tgl_lahir=date(1980, 1, 1),
+        kode_bank='114',
+        nama_bank='BCA',
+        nomor_rekening='999',
+        status=status,
+        unit="Dinas",
+        month=month,
+        year=2024
+    ))
+
+
+def make_delta(rows):
+    """Build a delta CSV from (nip, action) pairs; HAPUS rows carry only the NIP."""
+    lines = [HEADER]
+    for nip, action in rows:
+        if action == 'HAPUS':
+            lines.append(f"{nip},,,,,,,,{action}")
+        else:
+            lines.append(f"{nip},New {nip},1234567890123456,123456789012345,1990-01-01,114,BCA,555,{action}")
+    return io.BytesIO("\n".join(lines).encode('utf-8'))
+
+
+def period_rows(db, month):
+    return {
+        (emp.nip, emp.nama, emp.status)
+        for emp in db.query(Pegawai).filter(Pegawai.unit == "Dinas", Pegawai.month == month, Pegawai.year == 2024)
+    }
+
+
+# Feature: employee-data-comparison, Property 34: Delta upload materializes the new month
+# Validates: Requirements 1.3, 5.1
+@given(
+    roster=st.sets(st.integers(min_value=1, max_value=40), min_size=1, max_size=20),
+    departed=st.sets(st.integers(min_value=41, max_value=50), max_size=3),
+    changes=st.data()
+)
+@settings(max_examples=25, deadline=None)
+def test_property_delta_applies_onto_previous_roster(roster, departed, changes):
+    """
+    For any previous roster and any consistent delta, the new month should hold the
+    roster minus HAPUS, with UBAH rows replaced and TAMBAH rows added, all 'Aktif'.
+    """
+    edited = changes.draw(st.sets(st.sampled_from(sorted(roster)), max_size=5))
+    removed = changes.draw(st.sets(st.sampled_from(sorted(roster)), max_size=5)) - edited
+    added = changes.draw(st.sets(st.integers(min_value=51, max_value=70), max_size=5))
+    delta = (
+        [(f"N{nip}", 'UBAH') for nip in sorted(edited)]
+        + [(f"N{nip}", 'HAPUS') for nip in sorted(removed)]
+        + [(f"N{nip}", 'TAMBAH') for nip in sorted(added)]
+    )
+    if not delta:
+        delta = [("N99", 'TAMBAH')]
+        added = {99}
+
+    with get_test_db() as test_db:
+        for nip in roster:
+            add_employee(test_db, f"N{nip}", 4)
+        for nip in departed:
+            add_employee(test_db, f"N{nip}", 4, status='Keluar')
+        test_db.commit()
+
+        scan_upload(make_delta(delta), "delta.csv", delta=True)
+        stored = ingest_upload(test_db, MODE_DELTA, make_delta(delta), "delta.csv", "Dinas", 5, 2024)
+
+        expected = (
+            {(f"N{nip}", f"Old N{nip}", 'Aktif') for nip in roster - edited - removed}
+            | {(f"N{nip}", f"New N{nip}", 'Aktif') for nip in edited | added}
+        )
+        assert stored == len(expected)
+        assert period_rows(test_db, 5) == expected
+        # The previous month is read, never changed
+        assert len(period_rows(test_db, 4)) == len(roster) + len(departed)
+
+
+def test_delta_that_does_not_fit_the_previous_month_is_rejected():
+    """Adding a present NIP, editing or removing an absent one fails and writes nothing."""
+    with get_test_db() as test_db:
+        add_employee(test_db, "N1", 4)
+        add_employee(test_db, "N2", 4)
+        add_employee(test_db, "N3", 5)
+        test_db.commit()
+
+        with pytest.raises(ValueError) as excinfo:
+            ingest_upload(
+                test_db, MODE_DELTA,
+                make_delta([("N1", 'TAMBAH'), ("N7", 'UBAH'), ("N8", 'HAPUS')]),
+                "delta.csv", "Dinas", 5, 2024
+            )
+
+        message = str(excinfo.value)
+        assert "NIP N1 is already in Dinas 4/2024" in message
+        assert "NIP N7 is not in Dinas 4/2024" in message
+        assert "NIP N8 to remove is not in Dinas 4/2024" in message
+        assert period_rows(test_db, 5) == {("N3", "Old N3", 'Aktif')}
+
+
+def test_delta_needs_a_previous_month():
+    with get_test_db() as test_db:
+        with pytest.raises(ValueError, match="No data found for Dinas 4/2024"):
+            ingest_upload(test_db, MODE_DELTA, make_delta([("N1", 'TAMBAH')]), "delta.csv", "Dinas", 5, 2024)
+
+
+def test_delta_scan_checks_actions():
+    """HAPUS rows only need a NIP; unknown actions and a missing Aksi column are reported."""
+    content = make_delta([("N1", 'HAPUS'), ("N2", 'hapus'), ("N3", 'pindah')])
+    with pytest.raises(ValueError) as excinfo:
+        scan_upload(content, "delta.csv", delta=True)
+    assert "Row 3: Aksi must be one of TAMBAH, UBAH, HAPUS" in str(excinfo.value)
+    assert "Row 1" not in str(excinfo.value)
+
+    full_roster = io.BytesIO(b"NIP,Nama,NIK,NPWP,Tanggal Lahir,Kode Bank,Nama Bank,Nomor Rekening\n"
+                             b"N1,A,1,2,1990-01-01,114,BCA,5\n")
+    with pytest.raises(ValueError, match="Missing required columns: Aksi"):
+        scan_upload(full_roster, "data.csv", delta=True)
@@ -0,0 +1,100 @@
+import pytest
+from hypothesis import given, strategies as st, settings
+import io
+import pandas as pd
+from app.services.excel_parser import ExcelParser
+
+
+def make_frame(num_rows):
+    """Create an upload-shaped DataFrame."""
+    return pd.DataFrame({
+        'NIP': [f"NIP{i}" for i in range(num_rows)],
+        'Nama': [f"Employee {i}" for i in range(num_rows)],
+        'NIK': ['1234567890123456'] * num_rows,
+        'NPWP': ['123456789012345'] * num_rows,
+        'Tanggal Lahir': ['1990-01-01'] * num_rows,
+        'Kode Bank': ['114'] * num_rows,
+        'Nama Bank': ['BCA'] * num_rows,
+        'Nomor Rekening': [str(1000 + i) for i in range(num_rows)]
+    })
+
+
+def to_file(df, extension):
+    """Serialize a DataFrame to an in-memory .csv or .xlsx file."""
+    buffer = io.BytesIO()
+    if extension == 'csv':
+        buffer.write(df.to_csv(index=False).encode())
+    else:
+        df.to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+@given(
+    num_rows=st.integers(min_value=1, max_value=60),
+    batch_size=st.integers(min_value=1, max_value=25),
+    extension=st.sampled_from(['csv', 'xlsx'])
+)
+@settings(max_examples=30, deadline=None)
+def test_property_streaming_batches_cover_file(num_rows, batch_size, extension):
+    """
+    Streaming a file in batches should yield every row exactly once, in order,
+    in batches no larger than batch_size, indexed by row position in the file.
+    """
+    df = make_frame(num_rows)
+    batches = list(ExcelParser.iter_batches(to_file(df, extension), f"data.{extension}", batch_size))
+    
+    assert all(len(batch) <= batch_size for batch in batches)
+    combined = pd.concat(batches)
+    assert list(combined.index) == list(range(num_rows))
+    assert list(combined['NIP']) == list(df['NIP'])
+    assert [str(value) for value in combined['Nomor Rekening']] == list(df['Nomor Rekening'])
+
+
+def test_streaming_rejects_missing_columns():
+    """Missing required columns are reported before any batch is yielded."""
+    df = make_frame(3).drop(columns=['NIK'])
+    with pytest.raises(ValueError, match="Missing required columns: NIK"):
+        list(ExcelParser.iter_batches(to_file(df, 'csv'), "data.csv"))
+
+
+def test_streaming_rejects_unsupported_format():
+    """Only .xlsx and .csv files are accepted."""
+    with pytest.raises(ValueError, match="Unsupported file format"):
+        list(ExcelParser.iter_batches(io.BytesIO(b"x"), "data.txt"))
+
+
+# Feature: employee-data-comparison, Property 32: Identity numbers are read as text
+# Validates: Requirements 1.2, 1.3
+@given(
+    identities=st.lists(st.from_regex(r'\A0{0,3}[0-9]{1,18}\Z'), min_size=1, max_size=30),
+    batch_size=st.integers(min_value=1, max_value=25)
+)
+@settings(max_examples=30, deadline=None)
+def test_property_csv_identity_columns_keep_their_text(identities, batch_size):
+    """
+    NIP, NIK, NPWP, Kode Bank and Nomor Rekening should come back from a CSV exactly
+    as written: leading zeros kept, long numbers never turned into floats.
+    """
+    df = make_frame(len(identities))
+    for column in ('NIP', 'NIK', 'NPWP', 'Kode Bank', 'Nomor Rekening'):
+        df[column] = identities
+
+    combined = pd.concat(ExcelParser.iter_batches(to_file(df, 'csv'), "data.csv", batch_size))
+
+    for column in ('NIP', 'NIK', 'NPWP', 'Kode Bank', 'Nomor Rekening'):
+        assert list(combined[column]) == identities
+
+
+def test_xlsx_numeric_cells_are_read_as_text():
+    """Numeric identity cells become their digits; date cells stay dates."""
+    df = make_frame(2)
+    df['NIK'] = [3201010101900001, 3201010101900002]
+    df['Nomor Rekening'] = [1234.0, 5678.0]
+    df['Tanggal Lahir'] = pd.to_datetime(['1990-01-01', '1991-02-03'])
+
+    batch = next(ExcelParser.iter_batches(to_file(df, 'xlsx'), "data.xlsx"))
+
+    assert list(batch['NIK']) == ['3201010101900001', '3201010101900002']
+    assert list(batch['Nomor Rekening']) == ['1234', '5678']
+    assert list(batch['Tanggal Lahir']) == list(pd.to_datetime(['1990-01-01', '1991-02-03']))
@@ -0,0 +1,205 @@
+from hypothesis import given, strategies as st, settings
+from dataclasses import asdict
+from datetime import date, datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from unittest import mock
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.batch_compare import compare_unit, compute_comparison
+from app.services.data_version import bump_version
+from app.services.incremental_compare import take_watermark, incremental_comparison, load_outcome
+
+
+# Context manager for creating test database
+@contextmanager
+def get_test_db():
+    """Create a test database session."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    TestSessionLocal = sessionmaker(bind=engine)
+    db = TestSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_stored_outcome_outlives_the_session():
+    """The last comparison is read back from the database by another session, as after a restart."""
+    with get_test_db() as db:
+        for nip in range(1, 11):
+            add_employee(db, nip, 4)
+            add_employee(db, nip, 5)
+        db.commit()
+        # Written well before the comparison
+        db.query(Pegawai).update({Pegawai.updated_at: datetime(2024, 5, 1)})
+        db.commit()
+        compared = compare_unit(db, "Dinas", 5, 2024)
+
+        other = sessionmaker(bind=db.get_bind())()
+        try:
+            stored = load_outcome(other, "Dinas", 5, 2024)
+            assert stored is not None
+            assert stored.watermark.baseline == (4, 2024)
+            assert plain(stored.result) == plain(compared)
+            assert incremental_comparison(
+                other, "Dinas", 5, 2024, take_watermark(other, "Dinas", 5, 2024, (4, 2024))
+            ) is not None
+        finally:
+            other.close()
+
+
+def add_employee(db, nip, month, rekening='111'):
+    db.add(Pegawai(
+        nip=f"N{nip}",
+        nama=f"Pegawai {nip}",
+        nik='1234567890123456',
+        npwp='123456789012345',
+        tgl_lahir=date(1980, 1, 1),
+        kode_bank='114',
+        nama_bank='BCA',
+        nomor_rekening=rekening,
+        status='Aktif',
+        unit="Dinas",
+        month=month,
+        year=2024
+    ))
+
+
+def plain(result):
+    return {**asdict(result), 'transfers': []}
+
+
+edits = st.lists(
+    st.tuples(
+        st.sampled_from(['rekening', 'status', 'add_current', 'add_previous', 'delete_current']),
+        st.integers(min_value=1, max_value=20)
+    ),
+    max_size=6
+)
+
+
+# Feature: employee-data-comparison, Property 45: Incremental recompares match a full comparison
+# Validates: Requirements 3.1, 3.2, 3.3, 3.4
+@given(
+    previous=st.sets(st.integers(min_value=1, max_value=20), max_size=12),
+    current=st.sets(st.integers(min_value=1, max_value=20), min_size=1, max_size=12),
+    rounds=st.lists(edits, min_size=1, max_size=3)
+)
+@settings(max_examples=30, deadline=None)
+def test_property_incremental_recompare_matches_full(previous, current, rounds):
+    """
+    For any edits, added rows and deletes between comparisons of a period,
+    recomparing it from the stored outcome should return and write back
+    exactly what a full comparison of the stored rows would.
+    """
+    with get_test_db() as db, mock.patch.dict('os.environ', {'COMPARE_MAX_RECLASSIFIED_SHARE': '1'}):
+        for nip in previous:
+            add_employee(db, nip, 4)
+        for nip in current:
+            add_employee(db, nip, 5)
+        db.commit()
+        compare_unit(db, "Dinas", 5, 2024)
+
+        for round_edits in rounds:
+            for edit, nip in round_edits:
+                row = db.query(Pegawai).filter(Pegawai.month == 5, Pegawai.nip == f"N{nip}").first()
+                if edit == 'rekening' and row is not None:
+                    row.nomor_rekening = f"9{nip}"
+                elif edit == 'status' and row is not None:
+                    row.status = 'Pensiun'
+                elif edit == 'add_current' and row is None:
+                    add_employee(db, nip, 5, rekening='222')
+                elif edit == 'add_previous' and not db.query(Pegawai).filter(
+                    Pegawai.month == 4, Pegawai.nip == f"N{nip}"
+                ).count():
+                    add_employee(db, nip, 4)
+                elif edit == 'delete_current' and row is not None:
+                    db.delete(row)
+                    bump_version(db, "Dinas", 5, 2024, replaced=True)
+                db.commit()
+
+            if not db.query(Pegawai).filter(Pegawai.month == 5).count():
+                return
+
+            full = compute_comparison(db, "Dinas", 5, 2024)
+            recompared = compare_unit(db, "Dinas", 5, 2024)
+            assert plain(recompared) == plain(full)
+
+            stored = db.query(Pegawai).filter(Pegawai.month == 5).order_by(Pegawai.id).all()
+            by_nip = {record['nip']: record for record in full.new_employees + full.account_changes + full.unchanged_employees}
+            assert len(stored) == full.summary.total_current + full.summary.departed_count
+            assert {row.nip for row in stored} == set(by_nip) | {record['nip'] for record in full.departed_employees}
+
+
+# Feature: employee-data-comparison, Property 45: Incremental recompares match a full comparison
+# Validates: Requirements 3.1
+@given(
+    employees=st.sets(st.integers(min_value=1, max_value=40), min_size=10, max_size=30),
+    edited=st.integers(min_value=1, max_value=40)
+)
+@settings(max_examples=20, deadline=None)
+def test_property_recompare_reclassifies_only_edited_rows(employees, edited):
+    """
+    For any period compared before, editing one employee should reclassify
+    that employee and none of the rows read before the last comparison.
+    """
+    with get_test_db() as db:
+        for nip in employees:
+            add_employee(db, nip, 4)
+            add_employee(db, nip, 5)
+        db.commit()
+        # Written well before the comparison
+        db.query(Pegawai).update({Pegawai.updated_at: datetime(2024, 5, 1)})
+        db.commit()
+        compare_unit(db, "Dinas", 5, 2024)
+
+        row = db.query(Pegawai).filter(Pegawai.month == 5, Pegawai.nip == f"N{edited}").first()
+        if row is not None:
+            row.nomor_rekening = '999'
+        add_employee(db, 100, 5)
+        db.commit()
+
+        untouched = {f"N{nip}" for nip in employees if nip != edited}
+        incremental = incremental_comparison(db, "Dinas", 5, 2024, take_watermark(db, "Dinas", 5, 2024, (4, 2024)))
+        assert incremental is not None
+        merged, partial = incremental
+        reclassified = {
+            record['nip']
+            for record in partial.new_employees + partial.account_changes + partial.unchanged_employees + partial.departed_employees
+        }
+        assert 'N100' in reclassified
+        assert row is None or row.nip in reclassified
+        assert not reclassified & untouched
+        assert plain(merged) == plain(compute_comparison(db, "Dinas", 5, 2024))
+
+
+def test_comparison_writes_are_not_edits():
+    """
+    Right after a comparison wrote its statuses and departed rows back, a
+    recompare reclassifies nobody: only edits made since count as changes.
+    """
+    with get_test_db() as db:
+        for nip in range(1, 11):
+            add_employee(db, nip, 4)
+        for nip in list(range(1, 9)) + [20]:
+            add_employee(db, nip, 5, rekening='222' if nip == 1 else '111')
+        db.commit()
+        compare_unit(db, "Dinas", 5, 2024)
+
+        incremental = incremental_comparison(db, "Dinas", 5, 2024, take_watermark(db, "Dinas", 5, 2024, (4, 2024)))
+        assert incremental is not None
+        merged, partial = incremental
+        assert partial.summary.total_current == partial.summary.total_previous == 0
+        assert plain(merged) == plain(compute_comparison(db, "Dinas", 5, 2024))
+
+        row = db.query(Pegawai).filter(Pegawai.month == 5, Pegawai.nip == "N2").one()
+        row.nama = 'Renamed'
+        db.commit()
+        merged, partial = incremental_comparison(
+            db, "Dinas", 5, 2024, take_watermark(db, "Dinas", 5, 2024, (4, 2024))
+        )
+        assert [record['nip'] for record in partial.unchanged_employees] == ["N2"]
+        assert partial.summary.departed_count == 0
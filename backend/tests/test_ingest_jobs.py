@@ -0,0 +1,360 @@
+import io
+import os
+import time
+import asyncio
+import threading
+import tempfile
+import zipfile
+import pytest
+from openpyxl import Workbook
+from hypothesis import given, strategies as st, settings
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.admission import AdmissionController, AdmissionRejected, WorkClass, WORK_UPLOAD
+from app.services.ingest_jobs import (
+    IngestJobQueue,
+    LocalJobBackend,
+    RedisJobBackend,
+    IngestJob,
+    FINAL_PHASES,
+    PHASE_COMPLETED,
+    PHASE_FAILED
+)
+
+
+class FakeRedis:
+    """Stand-in for a Redis client: only get/set with expiry are used by the backend."""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode('utf-8')
+
+    def get(self, key):
+        return self.data.get(key)
+
+
+def make_csv(nips):
+    """Build an upload CSV with one valid row per NIP."""
+    lines = ["NIP,Nama,NIK,NPWP,Tanggal Lahir,Kode Bank,Nama Bank,Nomor Rekening"]
+    for i, nip in enumerate(nips):
+        lines.append(f"{nip},Employee {i},1234567890123456,123456789012345,1990-01-01,114,BCA,{1000 + i}")
+    return io.BytesIO("\n".join(lines).encode('utf-8'))
+
+
+def wait_for(queue, job_id, timeout=60):
+    """Poll a job until it reaches a final phase."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job['phase'] in FINAL_PHASES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+@pytest.fixture(scope="module")
+def job_queue():
+    """Queue backed by a file SQLite database shared by the worker threads."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'jobs.db')}")
+        Base.metadata.create_all(engine)
+        queue = IngestJobQueue(
+            backend=RedisJobBackend(FakeRedis()),
+            session_factory=sessionmaker(bind=engine),
+            parse_workers=1,
+            db_workers=1,
+            upload_dir=os.path.join(tmp, 'ingest')
+        )
+        try:
+            yield queue, sessionmaker(bind=engine)
+        finally:
+            queue.shutdown()
+
+
+# Feature: employee-data-comparison, Property 29: Upload job state round-trip
+# Validates: Requirements 1.3
+@given(
+    rows_processed=st.integers(min_value=0, max_value=1_000_000),
+    errors=st.lists(st.text(max_size=20), max_size=3),
+    use_redis=st.booleans()
+)
+@settings(max_examples=50)
+def test_property_job_backend_round_trip(rows_processed, errors, use_redis):
+    """
+    For any job update, loading the job from a backend should return what was saved,
+    with the update applied, whether the store is in-process or Redis-like.
+    """
+    backend = RedisJobBackend(FakeRedis()) if use_redis else LocalJobBackend()
+    job = IngestJob(id="job1", filename="data.csv", unit="Dinas", month=5, year=2024).to_dict()
+
+    backend.save(job)
+    backend.update("job1", rows_processed=rows_processed, errors=errors)
+
+    loaded = backend.load("job1")
+    assert loaded == {**job, 'rows_processed': rows_processed, 'errors': errors}
+    assert backend.load("missing") is None
+
+
+def test_job_lifecycle_stores_rows(job_queue):
+    """A valid upload runs through every phase and stores its rows."""
+    queue, session_factory = job_queue
+    job = queue.submit(make_csv([f"NIP{i}" for i in range(25)]), "data.csv", "Dinas", 5, 2024)
+    assert job['phase'] == 'queued'
+
+    finished = wait_for(queue, job['id'])
+
+    assert finished['phase'] == PHASE_COMPLETED
+    assert finished['rows_total'] == 25
+    assert finished['rows_processed'] == 25
+    assert finished['errors'] == []
+    assert finished['result']['records_processed'] == 25
+    assert {'validate_seconds', 'store_seconds', 'total_seconds'} <= set(finished['timings'])
+
+    db = session_factory()
+    try:
+        assert db.query(Pegawai).filter(Pegawai.unit == "Dinas").count() == 25
+    finally:
+        db.close()
+
+
+def test_job_reports_validation_errors(job_queue):
+    """A file with duplicate NIPs fails its job without touching the database."""
+    queue, session_factory = job_queue
+    job = queue.submit(make_csv(["DUP", "DUP"]), "data.csv", "PPPK", 5, 2024)
+
+    finished = wait_for(queue, job['id'])
+
+    assert finished['phase'] == PHASE_FAILED
+    assert "Duplicate NIP entries found" in finished['errors'][0]
+    db = session_factory()
+    try:
+        assert db.query(Pegawai).filter(Pegawai.unit == "PPPK").count() == 0
+    finally:
+        db.close()
+
+
+def test_submit_rejects_unsupported_format(job_queue):
+    queue, _ = job_queue
+    with pytest.raises(ValueError, match="Unsupported file format"):
+        queue.submit(io.BytesIO(b"data"), "data.txt", "Dinas", 5, 2024)
+
+
+def test_identical_reupload_short_circuits(job_queue):
+    """Re-uploading the stored file (or the same rows re-saved) completes without writing."""
+    queue, session_factory = job_queue
+    content = make_csv([f"R{i}" for i in range(10)]).getvalue()
+    first = wait_for(queue, queue.submit(io.BytesIO(content), "data.csv", "Cabdis Wil. 3", 5, 2024)['id'])
+    assert first['result']['unchanged'] is False
+
+    # Same bytes: answered at submit time, never queued
+    second = queue.submit(io.BytesIO(content), "data.csv", "Cabdis Wil. 3", 5, 2024)
+    assert second['phase'] == PHASE_COMPLETED
+    assert second['result']['unchanged'] is True
+    assert second['result']['records_unchanged'] == 10
+
+    # Same rows, different bytes: answered after the scan
+    third = wait_for(queue, queue.submit(io.BytesIO(content + b"\n"), "data.csv", "Cabdis Wil. 3", 5, 2024)['id'])
+    assert third['result']['unchanged'] is True
+
+    db = session_factory()
+    try:
+        assert db.query(Pegawai).filter(Pegawai.unit == "Cabdis Wil. 3").count() == 10
+    finally:
+        db.close()
+
+    # Different rows are stored as usual
+    changed = make_csv([f"R{i}" for i in range(11)])
+    fourth = wait_for(queue, queue.submit(changed, "data.csv", "Cabdis Wil. 3", 5, 2024)['id'])
+    assert fourth['result']['unchanged'] is False
+    assert fourth['result']['records_processed'] == 11
+
+
+def make_workbook(sheets):
+    """Build an .xlsx workbook with one sheet of valid rows per (sheet name, NIPs) pair."""
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for sheet_name, nips in sheets:
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(["NIP", "Nama", "NIK", "NPWP", "Tanggal Lahir", "Kode Bank", "Nama Bank", "Nomor Rekening"])
+        for i, nip in enumerate(nips):
+            sheet.append([nip, f"Employee {i}", "1234567890123456", "123456789012345",
+                          "1990-01-01", "114", "BCA", str(1000 + i)])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def test_workbook_job_reports_each_unit(job_queue):
+    """Each unit sheet is stored in its own transaction; a bad sheet does not block the others."""
+    queue, session_factory = job_queue
+    workbook = make_workbook([
+        ("Cabdis Wil. 1", [f"W1N{i}" for i in range(12)]),
+        ("cabdis  wil. 2", [f"W2N{i}" for i in range(7)]),
+        ("Cabdis Wil. 4", ["DUP", "DUP"]),
+        ("Notes", []),
+    ])
+
+    job = queue.submit_workbook(workbook, "month-end.xlsx", 6, 2024)
+    finished = wait_for(queue, job['id'])
+
+    assert finished['phase'] == PHASE_COMPLETED
+    report = {unit['unit']: unit for unit in finished['result']['units']}
+    assert finished['result']['status'] == 'partial'
+    assert finished['result']['skipped'] == ["Notes"]
+    assert report["Cabdis Wil. 1"]['status'] == 'success'
+    assert report["Cabdis Wil. 1"]['records_processed'] == 12
+    assert report["Cabdis Wil. 2"]['records_processed'] == 7
+    assert report["Cabdis Wil. 4"]['status'] == 'failed'
+    assert "Duplicate NIP entries found" in report["Cabdis Wil. 4"]['errors'][0]
+    assert finished['result']['records_processed'] == 19
+
+    db = session_factory()
+    try:
+        counts = {
+            unit: db.query(Pegawai).filter(Pegawai.unit == unit, Pegawai.month == 6).count()
+            for unit in ("Cabdis Wil. 1", "Cabdis Wil. 2", "Cabdis Wil. 4")
+        }
+    finally:
+        db.close()
+    assert counts == {"Cabdis Wil. 1": 12, "Cabdis Wil. 2": 7, "Cabdis Wil. 4": 0}
+
+
+def test_zip_job_reads_per_unit_files(job_queue):
+    """A zip of per-unit files is split by file name."""
+    queue, _ = job_queue
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zipped:
+        zipped.writestr("upload/Cabdis Wil. 5.csv", make_csv([f"Z5N{i}" for i in range(4)]).getvalue())
+        zipped.writestr("upload/Cabdis Wil. 6.xlsx", make_workbook([("Sheet", ["Z6N0", "Z6N1"])]).getvalue())
+        zipped.writestr("upload/readme.txt", b"notes")
+    archive.seek(0)
+
+    finished = wait_for(queue, queue.submit_workbook(archive, "month-end.zip", 6, 2024)['id'])
+
+    assert finished['result']['status'] == 'success', finished['errors']
+    assert {unit['unit']: unit['records_processed'] for unit in finished['result']['units']} == {
+        "Cabdis Wil. 5": 4,
+        "Cabdis Wil. 6": 2
+    }
+    assert finished['result']['skipped'] == ["readme.txt"]
+
+
+def test_workbook_without_units_fails(job_queue):
+    queue, _ = job_queue
+    finished = wait_for(queue, queue.submit_workbook(make_workbook([("Data", ["A"])]), "x.xlsx", 6, 2024)['id'])
+
+    assert finished['phase'] == PHASE_FAILED
+    assert "No sheet or file named after a unit" in finished['errors'][0]
+
+
+def test_jobs_hold_an_upload_admission_slot():
+    """A job waits for an upload slot before validating and holds it until stored."""
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+    controller = AdmissionController(
+        classes={WORK_UPLOAD: WorkClass(WORK_UPLOAD, priority=0, concurrency=1, memory_mb=0)},
+        memory_budget_mb=1024,
+        max_queue=1
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'jobs.db')}")
+        Base.metadata.create_all(engine)
+        queue = IngestJobQueue(
+            session_factory=sessionmaker(bind=engine),
+            parse_workers=1,
+            db_workers=1,
+            upload_dir=os.path.join(tmp, 'ingest')
+        )
+        queue.use_admission(controller, loop)
+        try:
+            held = controller.acquire_threadsafe(WORK_UPLOAD, loop)
+            job = queue.submit(make_csv(["A1", "A2"]), "data.csv", "Dinas", 5, 2024)
+
+            # Queued behind the held slot; its reservation was handed back when it started
+            deadline = time.time() + 10
+            while (controller.stats()['classes'][WORK_UPLOAD]['queued'],
+                   controller.stats()['classes'][WORK_UPLOAD]['reserved']) != (1, 0):
+                assert time.time() < deadline
+                time.sleep(0.05)
+            assert queue.get(job['id'])['phase'] not in FINAL_PHASES
+
+            controller.release_threadsafe(held, loop)
+            finished = wait_for(queue, job['id'])
+            assert finished['phase'] == PHASE_COMPLETED
+            assert finished['result']['records_processed'] == 2
+            assert 'admission_seconds' in finished['timings']
+
+            deadline = time.time() + 10
+            while controller.stats()['classes'][WORK_UPLOAD]['running'] != 0:
+                assert time.time() < deadline
+                time.sleep(0.05)
+            assert controller.stats()['classes'][WORK_UPLOAD]['admitted'] == 2
+        finally:
+            queue.shutdown()
+            loop.call_soon_threadsafe(loop.stop)
+            loop_thread.join()
+            loop.close()
+
+
+def test_job_backlog_is_bounded_by_the_admission_queue():
+    """Jobs waiting for a worker count against max_queue; beyond it submit is rejected."""
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+    controller = AdmissionController(
+        classes={WORK_UPLOAD: WorkClass(WORK_UPLOAD, priority=0, concurrency=1, memory_mb=0)},
+        memory_budget_mb=1024,
+        max_queue=2
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'jobs.db')}")
+        Base.metadata.create_all(engine)
+        queue = IngestJobQueue(
+            session_factory=sessionmaker(bind=engine),
+            parse_workers=1,
+            db_workers=1,
+            upload_dir=os.path.join(tmp, 'ingest')
+        )
+        queue.use_admission(controller, loop)
+        try:
+            held = controller.acquire_threadsafe(WORK_UPLOAD, loop)
+            running = queue.submit(make_csv(["A1"]), "data.csv", "Dinas", 5, 2024)
+            deadline = time.time() + 10
+            while (controller.stats()['classes'][WORK_UPLOAD]['queued'],
+                   controller.stats()['classes'][WORK_UPLOAD]['reserved']) != (1, 0):
+                assert time.time() < deadline
+                time.sleep(0.05)
+
+            # The only DB thread waits for the held slot; this one waits for the thread
+            waiting = queue.submit(make_csv(["B1"]), "data.csv", "Dinas", 6, 2024)
+            stats = controller.stats()
+            assert stats['queue_depth'] == 2
+            assert stats['classes'][WORK_UPLOAD]['queued'] == 2
+            assert stats['classes'][WORK_UPLOAD]['reserved'] == 1
+
+            with pytest.raises(AdmissionRejected) as rejected:
+                queue.submit(make_csv(["C1"]), "data.csv", "Dinas", 7, 2024)
+            assert rejected.value.retry_after >= 1
+            assert controller.stats()['classes'][WORK_UPLOAD]['rejected'] == 1
+            assert sorted(os.listdir(os.path.join(tmp, 'ingest'))) == sorted([
+                f"{running['id']}.csv", f"{waiting['id']}.csv"
+            ])
+
+            controller.release_threadsafe(held, loop)
+            assert wait_for(queue, running['id'])['phase'] == PHASE_COMPLETED
+            assert wait_for(queue, waiting['id'])['phase'] == PHASE_COMPLETED
+            deadline = time.time() + 10
+            while controller.stats()['queue_depth'] != 0:
+                assert time.time() < deadline
+                time.sleep(0.05)
+        finally:
+            queue.shutdown()
+            loop.call_soon_threadsafe(loop.stop)
+            loop_thread.join()
+            loop.close()
@@ -0,0 +1,115 @@
+from hypothesis import given, strategies as st, settings
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.batch_compare import compare_unit, compute_comparison
+from app.services.movement import movement_events
+
+
+# Context manager for creating test database
+@contextmanager
+def get_test_db():
+    """Create a test database session."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    TestSessionLocal = sessionmaker(bind=engine)
+    db = TestSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def add_employee(db, nip, month, rekening):
+    db.add(Pegawai(
+        nip=f"N{nip}",
+        nama=f"Pegawai {nip}",
+        nik='1234567890123456',
+        npwp='123456789012345',
+        tgl_lahir=date(1980, 1, 1),
+        kode_bank='114',
+        nama_bank='BCA',
+        nomor_rekening=rekening,
+        status='Aktif',
+        unit="Dinas",
+        month=month,
+        year=2024
+    ))
+
+
+def event_set(movement):
+    return {(event['nip'], event['event'], event['month']) for event in movement['events']}
+
+
+# Month (1-6) -> account number of one employee; absent months without the employee
+histories = st.dictionaries(
+    st.integers(min_value=1, max_value=15),
+    st.dictionaries(st.integers(min_value=1, max_value=6), st.sampled_from(['111', '222'])),
+    max_size=12
+)
+
+
+# Feature: employee-data-comparison, Property 46: Range movement matches consecutive comparisons
+# Validates: Requirements 3.1, 3.2, 3.3
+@given(history=histories)
+@settings(max_examples=40, deadline=None)
+def test_property_range_events_match_consecutive_comparisons(history):
+    """
+    For any employees joining, leaving, returning and changing accounts over
+    several months (some without data), the range event stream should hold
+    exactly the new, departed and account-change employees of comparing each
+    month with data against the previous month with data, and comparing and
+    writing back the months should not change it.
+    """
+    with get_test_db() as db:
+        for nip, months in history.items():
+            for month, rekening in months.items():
+                add_employee(db, nip, month, rekening)
+        db.commit()
+
+        movement = movement_events(db, "Dinas", 1, 2024, 6, 2024)
+        populated = sorted({month for months in history.values() for month in months})
+        assert [period['month'] for period in movement['periods']] == populated
+
+        expected = set()
+        for baseline, month in zip(populated, populated[1:]):
+            result = compute_comparison(db, "Dinas", month, 2024, baseline=(baseline, 2024))
+            expected |= {(emp['nip'], 'Masuk', month) for emp in result.new_employees}
+            expected |= {(emp['nip'], 'Keluar', month) for emp in result.departed_employees}
+            expected |= {(emp['nip'], 'Rekening Berbeda', month) for emp in result.account_changes}
+        assert event_set(movement) == expected
+        assert sum(
+            period['new_count'] + period['departed_count'] + period['account_change_count']
+            for period in movement['summary']
+        ) == len(movement['events'])
+
+        for month in populated:
+            compare_unit(db, "Dinas", month, 2024)
+        assert event_set(movement_events(db, "Dinas", 1, 2024, 6, 2024)) == expected
+
+
+def test_overridden_departure_is_an_exit_in_its_own_month():
+    """
+    An employee copied in as departed and then overridden to Pensiun leaves
+    in the month they went missing, not in the next one.
+    """
+    with get_test_db() as db:
+        for nip in (1, 2, 3):
+            add_employee(db, nip, 1, '111')
+        for month in (2, 3):
+            for nip in (1, 2):
+                add_employee(db, nip, month, '111')
+        db.commit()
+        compare_unit(db, "Dinas", 2, 2024)
+
+        departed = db.query(Pegawai).filter(Pegawai.month == 2, Pegawai.nip == "N3").one()
+        departed.status = 'Pensiun'
+        departed.manual_override = 1
+        db.commit()
+
+        movement = movement_events(db, "Dinas", 1, 2024, 3, 2024)
+        assert event_set(movement) == {("N3", 'Keluar', 2)}
+        assert [period['departed_count'] for period in movement['summary']] == [0, 1, 0]
@@ -0,0 +1,98 @@
+import io
+import os
+import json
+import tempfile
+import pytest
+from hypothesis import given, strategies as st, settings
+from openpyxl import load_workbook
+from app.services.excel_parser import ExcelParser
+from app.services.preflight import preflight_ndjson, write_annotated_workbook
+from app.services.upload_pipeline import scan_upload, MAX_REPORTED_ERRORS
+from app.services.validation import validate_employee_frame, format_row_errors
+
+
+def make_csv(rows):
+    """Build an upload CSV from (nip, nik) pairs; other fields are valid."""
+    lines = ["NIP,Nama,NIK,NPWP,Tanggal Lahir,Kode Bank,Nama Bank,Nomor Rekening"]
+    for i, (nip, nik) in enumerate(rows):
+        lines.append(f"{nip},Employee {i},{nik},123456789012345,1990-01-01,114,BCA,{1000 + i}")
+    return "\n".join(lines).encode('utf-8')
+
+
+row_strategy = st.tuples(
+    st.sampled_from(["A1", "A2", "A3", "B7", "", "N-1"]),
+    st.sampled_from(["1234567890123456", "", "12345678901234XY"])
+)
+
+
+# Feature: employee-data-comparison, Property 25: Validation failure handling (preflight report)
+# Validates: Requirements 1.4, 1.5
+@given(
+    rows=st.lists(row_strategy, min_size=1, max_size=30),
+    batch_size=st.integers(min_value=1, max_value=10)
+)
+@settings(max_examples=30, deadline=None)
+def test_property_preflight_reports_every_problem(rows, batch_size):
+    """
+    For any file, the NDJSON report should list exactly the rows that fail validation,
+    every duplicated NIP, and a summary that is valid only when nothing failed.
+    """
+    content = make_csv(rows)
+    lines = [
+        json.loads(line)
+        for line in preflight_ndjson(ExcelParser.iter_batches(io.BytesIO(content), "data.csv", batch_size))
+    ]
+
+    row_errors = [line for line in lines if line['type'] == 'row_error']
+    duplicates = {line['nip']: line['rows'] for line in lines if line['type'] == 'duplicate_nip'}
+    summary = lines[-1]
+
+    # Same rows and messages as the upload path reports, 1-based
+    whole_file = next(ExcelParser.iter_batches(io.BytesIO(content), "data.csv", len(rows)))
+    expected_errors = format_row_errors(validate_employee_frame(whole_file), row_offset=1)
+
+    expected_duplicates = {}
+    for index, (nip, _) in enumerate(rows):
+        if nip:
+            expected_duplicates.setdefault(nip, []).append(index + 1)
+    expected_duplicates = {nip: found for nip, found in expected_duplicates.items() if len(found) > 1}
+
+    assert summary['type'] == 'summary'
+    assert summary['rows'] == len(rows)
+    assert [f"Row {line['row']}: {'; '.join(line['messages'])}" for line in row_errors] == expected_errors
+    assert duplicates == expected_duplicates
+    assert summary['invalid_rows'] == len(expected_errors)
+    assert summary['valid'] == (not expected_errors and not expected_duplicates)
+
+
+def test_annotated_workbook_marks_failing_rows():
+    content = make_csv([("A1", "1234567890123456"), ("A2", ""), ("A1", "1234567890123456")])
+    handle, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(handle)
+    try:
+        summary = write_annotated_workbook(io.BytesIO(content), "data.csv", path)
+        sheet = load_workbook(path)["Preflight"]
+        values = list(sheet.values)
+    finally:
+        os.remove(path)
+
+    assert summary['rows'] == 3
+    assert summary['invalid_rows'] == 1
+    assert summary['duplicate_nips'] == 1
+    assert summary['valid'] is False
+    assert values[0][-1] == "Errors"
+    assert values[1][-1] == "Duplicate NIP A1 (rows 1, 3)"
+    assert "NIK" in values[2][-1]
+    assert values[3][-1] == "Duplicate NIP A1 (rows 1, 3)"
+
+
+def test_upload_error_message_is_capped():
+    """A file with many bad rows produces a bounded error message."""
+    content = make_csv([(f"A{i}", "") for i in range(MAX_REPORTED_ERRORS + 50)])
+
+    with pytest.raises(ValueError) as excinfo:
+        scan_upload(io.BytesIO(content), "data.csv", batch_size=40)
+
+    message = str(excinfo.value)
+    assert message.count("Row ") == MAX_REPORTED_ERRORS
+    assert "50 more rows with errors" in message
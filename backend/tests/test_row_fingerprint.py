@@ -0,0 +1,96 @@
+from hypothesis import given, strategies as st, settings
+from datetime import date, datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.bulk_insert import build_pegawai_row, bulk_insert_pegawai
+from app.services.comparator import EmployeeComparator
+from app.services.month_utils import get_period_frame
+from app.services.row_fingerprint import COMPARABLE_FIELDS, row_fingerprint
+from app.services.sql_comparator import compare_in_database
+
+
+# Context manager for creating test database
+@contextmanager
+def get_test_db():
+    """Create a test database session."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    TestSessionLocal = sessionmaker(bind=engine)
+    db = TestSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def upload_record(index):
+    return {
+        'NIP': f"19800101200000{index:04d}",
+        'Nama': f"Pegawai {index}",
+        'NIK': f"320000000000{index:04d}",
+        'NPWP': f"01000000000{index:04d}",
+        'Kode Bank': '114',
+        'Nama Bank': 'BCA',
+        'Nomor Rekening': f"{index * 7}"
+    }
+
+
+def changed_value(field, value):
+    if field == 'tgl_lahir':
+        return date(1990, 6, 15)
+    return f"{value}X"
+
+
+# Feature: employee-data-comparison, Property 40: Field changes are found through fingerprints
+# Validates: Requirements 3.1, 3.3
+@given(
+    count=st.integers(min_value=1, max_value=15),
+    edits=st.dictionaries(st.integers(min_value=0, max_value=14), st.sampled_from(COMPARABLE_FIELDS), max_size=8)
+)
+@settings(max_examples=30, deadline=None)
+def test_property_field_changes_follow_fingerprints(count, edits):
+    """
+    For any two uploads of the same employees where some rows have one field
+    edited, both engines should report exactly the edited rows, with the edited
+    field and its old and new value; rows with equal fingerprints report nothing.
+    """
+    edits = {index: field for index, field in edits.items() if index < count}
+    now = datetime(2024, 2, 1)
+    previous_rows = [
+        build_pegawai_row(upload_record(i), date(1980, 1, 1), "Dinas", 1, 2024, now) for i in range(count)
+    ]
+    current_rows = []
+    for i, previous_row in enumerate(previous_rows):
+        row = build_pegawai_row(upload_record(i), date(1980, 1, 1), "Dinas", 2, 2024, now)
+        if i in edits:
+            row[edits[i]] = changed_value(edits[i], row[edits[i]])
+            row['fingerprint'] = row_fingerprint(row)
+        current_rows.append(row)
+
+    with get_test_db() as test_db:
+        bulk_insert_pegawai(test_db, previous_rows)
+        bulk_insert_pegawai(test_db, current_rows)
+        test_db.commit()
+
+        stored = test_db.query(Pegawai).filter(Pegawai.month == 2).order_by(Pegawai.id).all()
+        assert [emp.fingerprint for emp in stored] == [row_fingerprint(emp.to_dict()) for emp in stored]
+
+        result = EmployeeComparator.compare_frames(
+            get_period_frame(test_db, 2, 2024, "Dinas"),
+            get_period_frame(test_db, 1, 2024, "Dinas")
+        )
+        expected = []
+        for index in sorted(edits):
+            field = edits[index]
+            old, new = previous_rows[index][field], current_rows[index][field]
+            if field == 'tgl_lahir':
+                old, new = old.isoformat(), new.isoformat()
+            expected.append({'nip': previous_rows[index]['nip'], 'changes': [{'field': field, 'old': old, 'new': new}]})
+
+        assert [{'nip': item['nip'], 'changes': item['changes']} for item in result.field_changes] == expected
+        assert [item['id'] for item in result.field_changes] == [stored[index].id for index in sorted(edits)]
+        assert result.summary.field_change_count == len(edits)
+        assert compare_in_database(test_db, "Dinas", 2, 2024, 1, 2024).field_changes == result.field_changes
@@ -0,0 +1,84 @@
+from hypothesis import given, strategies as st, settings
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.comparator import EmployeeComparator
+from app.services.month_utils import get_period_frame
+from app.services.sql_comparator import compare_in_database, COMPARISON_FIELDS
+
+
+# Context manager for creating test database
+@contextmanager
+def get_test_db():
+    """Create a test database session."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    TestSessionLocal = sessionmaker(bind=engine)
+    db = TestSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def add_month(db, accounts, month, year, unit="Dinas"):
+    for nip, account in accounts:
+        db.add(Pegawai(
+            nip=f"N{nip}",
+            nama=f"Pegawai {nip}",
+            nik='1234567890123456',
+            npwp='123456789012345',
+            tgl_lahir=date(1980, 1, 1),
+            kode_bank='114',
+            nama_bank='BCA',
+            nomor_rekening=account,
+            status='Aktif',
+            unit=unit,
+            month=month,
+            year=year
+        ))
+    db.commit()
+
+
+accounts = st.lists(
+    st.tuples(st.integers(min_value=1, max_value=30), st.sampled_from(["111", "222"])),
+    max_size=20,
+    unique_by=lambda pair: pair[0]
+)
+
+
+# Feature: employee-data-comparison, Property 38: In-database comparison matches the columnar comparison
+# Validates: Requirements 3.1, 3.2, 3.3, 3.4
+@given(previous=accounts, current=accounts, other_unit=accounts)
+@settings(max_examples=50, deadline=None)
+def test_property_database_engine_matches_columnar(previous, current, other_unit):
+    """
+    For any two months of a unit, the FULL OUTER JOIN engine should put the same
+    employees, in the same order, in the same categories as compare_frames,
+    ignoring other units.
+    """
+    with get_test_db() as test_db:
+        add_month(test_db, previous, 12, 2023)
+        add_month(test_db, current, 1, 2024)
+        add_month(test_db, other_unit, 12, 2023, unit="PPPK")
+
+        expected = EmployeeComparator.compare_frames(
+            get_period_frame(test_db, 1, 2024, "Dinas"),
+            get_period_frame(test_db, 12, 2023, "Dinas")
+        )
+        actual = compare_in_database(test_db, "Dinas", 1, 2024, 12, 2023)
+
+        assert actual.summary == expected.summary
+        for category in ('new_employees', 'departed_employees', 'unchanged_employees'):
+            assert getattr(actual, category) == [
+                {field: record[field] for field in COMPARISON_FIELDS}
+                for record in getattr(expected, category)
+            ]
+        assert actual.account_changes == [
+            {**{field: record[field] for field in COMPARISON_FIELDS}, 'nomor_rekening_lama': record['nomor_rekening_lama']}
+            for record in expected.account_changes
+        ]
+        assert actual.field_changes == expected.field_changes
@@ -0,0 +1,187 @@
+import io
+import pytest
+from hypothesis import given, strategies as st, settings
+from datetime import date, datetime
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.upload_pipeline import replace_period_staged, ingest_upload, MODE_UPSERT
+
+
+# Context manager for creating test database
+@contextmanager
+def get_test_db():
+    """Create a test database session."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    TestSessionLocal = sessionmaker(bind=engine)
+    db = TestSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def make_csv(nips):
+    """Build an upload CSV with one valid row per NIP."""
+    lines = ["NIP,Nama,NIK,NPWP,Tanggal Lahir,Kode Bank,Nama Bank,Nomor Rekening"]
+    for i, nip in enumerate(nips):
+        lines.append(f"{nip},Employee {i},1234567890123456,123456789012345,1990-01-01,114,BCA,{1000 + i}")
+    return io.BytesIO("\n".join(lines).encode('utf-8'))
+
+
+def add_employee(db, nip, status='Aktif'):
+    db.add(Pegawai(
+        nip=nip,
+        nama=f"Old {nip}",
+        nik='1234567890123456',
+        npwp='123456789012345',
+        tgl_lahir=date(1980, 1, 1),
+        kode_bank='114',
+        nama_bank='BCA',
+        nomor_rekening='999',
+        status=status,
+        unit="Dinas",
+        month=5,
+        year=2024
+    ))
+
+
+def period_rows(db):
+    return {
+        (emp.nip, emp.status)
+        for emp in db.query(Pegawai).filter(Pegawai.unit == "Dinas", Pegawai.month == 5, Pegawai.year == 2024)
+    }
+
+
+# Feature: employee-data-comparison, Property 3: Data persistence round-trip (staged swap)
+# Validates: Requirements 1.3, 5.1
+@given(
+    old_nips=st.sets(st.integers(min_value=1, max_value=60), max_size=20),
+    new_nips=st.sets(st.integers(min_value=1, max_value=60), min_size=1, max_size=20),
+    departed_nips=st.sets(st.integers(min_value=61, max_value=80), max_size=5)
+)
+@settings(max_examples=25, deadline=None)
+def test_property_staged_swap_replaces_active_rows(old_nips, new_nips, departed_nips):
+    """
+    For any existing period and any valid upload, the staged swap should leave exactly
+    the uploaded NIPs as 'Aktif' and keep every row written by comparison.
+    """
+    with get_test_db() as test_db:
+        for nip in old_nips:
+            add_employee(test_db, f"N{nip}")
+        for nip in departed_nips:
+            add_employee(test_db, f"N{nip}", status='Keluar')
+        test_db.commit()
+
+        stored = replace_period_staged(
+            test_db, make_csv([f"N{nip}" for nip in sorted(new_nips)]), "data.csv", "Dinas", 5, 2024
+        )
+
+        assert stored == len(new_nips)
+        assert period_rows(test_db) == (
+            {(f"N{nip}", 'Aktif') for nip in new_nips}
+            | {(f"N{nip}", 'Keluar') for nip in departed_nips}
+        )
+
+
+def test_staged_swap_failure_keeps_previous_rows():
+    """A file rejected by the staging checks leaves the period untouched and drops the staging table."""
+    with get_test_db() as test_db:
+        add_employee(test_db, "N1")
+        add_employee(test_db, "N2", status='Keluar')
+        test_db.commit()
+
+        # N2 collides with the preserved 'Keluar' row; ' N3' and 'N3' collide once trimmed
+        with pytest.raises(ValueError) as excinfo:
+            replace_period_staged(test_db, make_csv(["N2", " N3", "N3"]), "data.csv", "Dinas", 5, 2024)
+
+        message = str(excinfo.value)
+        assert "NIP N3 appears 2 times" in message
+        assert "NIP N2 is already recorded as 'Keluar'" in message
+        assert period_rows(test_db) == {("N1", 'Aktif'), ("N2", 'Keluar')}
+        assert not [
+            name for name in inspect(test_db.connection()).get_temp_table_names()
+            if name.startswith('pegawai_staging_')
+        ]
+
+
+def make_upsert_csv(nips, changed):
+    """Rows whose data depends only on the NIP; NIPs in `changed` get another account number."""
+    lines = ["NIP,Nama,NIK,NPWP,Tanggal Lahir,Kode Bank,Nama Bank,Nomor Rekening"]
+    for nip in sorted(nips):
+        account = 5000 + nip if nip in changed else 1000 + nip
+        lines.append(f"N{nip},Employee {nip},1234567890123456,123456789012345,1990-01-01,114,BCA,{account}")
+    return io.BytesIO("\n".join(lines).encode('utf-8'))
+
+
+# Feature: employee-data-comparison, Property 35: Upsert upload keeps row identity
+# Validates: Requirements 1.3, 5.1, 6.4
+@given(
+    old_nips=st.sets(st.integers(min_value=1, max_value=40), max_size=15),
+    new_nips=st.sets(st.integers(min_value=1, max_value=40), min_size=1, max_size=15),
+    changes=st.data()
+)
+@settings(max_examples=25, deadline=None)
+def test_property_upsert_writes_only_changed_rows(old_nips, new_nips, changes):
+    """
+    For any existing period and any upload, an upsert should keep the id of every
+    employee still present, write only rows whose data changed, never touch a
+    manually overridden row and remove only non-departed employees missing from the file.
+    """
+    overridden = changes.draw(st.sets(st.sampled_from(sorted(old_nips)), max_size=4)) if old_nips else set()
+    changed = changes.draw(st.sets(st.sampled_from(sorted(new_nips)), max_size=5))
+    departed = changes.draw(st.sets(st.integers(min_value=41, max_value=45), max_size=3))
+    long_ago = datetime(2000, 1, 1)
+
+    with get_test_db() as test_db:
+        for nip in old_nips | departed:
+            test_db.add(Pegawai(
+                nip=f"N{nip}", nama=f"Employee {nip}", nik='1234567890123456', npwp='123456789012345',
+                tgl_lahir=date(1990, 1, 1), kode_bank='114', nama_bank='BCA', nomor_rekening=str(1000 + nip),
+                status='Keluar' if nip in departed else ('Pensiun' if nip in overridden else 'Masuk'),
+                manual_override=1 if nip in overridden else 0,
+                unit="Dinas", month=5, year=2024, created_at=long_ago, updated_at=long_ago
+            ))
+        test_db.commit()
+        ids_before = {emp.nip: emp.id for emp in test_db.query(Pegawai)}
+
+        stored = ingest_upload(
+            test_db, MODE_UPSERT, make_upsert_csv(new_nips, changed), "data.csv", "Dinas", 5, 2024
+        )
+        assert stored == len(new_nips)
+
+        after = {emp.nip: emp for emp in test_db.query(Pegawai)}
+        expected_nips = new_nips | overridden | departed
+        assert set(after) == {f"N{nip}" for nip in expected_nips}
+
+        for nip in expected_nips:
+            row = after[f"N{nip}"]
+            if nip in old_nips | departed:
+                assert row.id == ids_before[row.nip]
+            written = nip in changed and nip not in overridden and nip in old_nips | departed
+            assert (row.updated_at != long_ago) == (written or nip not in old_nips | departed)
+            if nip in overridden:
+                assert (row.status, row.manual_override, row.nomor_rekening) == ('Pensiun', 1, str(1000 + nip))
+            elif nip in new_nips:
+                expected_account = 5000 + nip if nip in changed else 1000 + nip
+                assert row.nomor_rekening == str(expected_account)
+                # Status belongs to comparison: kept for existing rows, 'Aktif' for new ones
+                if nip in departed:
+                    assert row.status == 'Keluar'
+                elif nip in old_nips:
+                    assert row.status == 'Masuk'
+                else:
+                    assert row.status == 'Aktif'
+
+
+def test_upsert_of_the_same_file_writes_nothing():
+    """Uploading the stored period again updates no row and changes no id."""
+    with get_test_db() as test_db:
+        ingest_upload(test_db, MODE_UPSERT, make_upsert_csv({1, 2, 3}, set()), "data.csv", "Dinas", 5, 2024)
+        before = {(emp.id, emp.nip, emp.updated_at) for emp in test_db.query(Pegawai)}
+
+        ingest_upload(test_db, MODE_UPSERT, make_upsert_csv({1, 2, 3}, set()), "data.csv", "Dinas", 5, 2024)
+        assert {(emp.id, emp.nip, emp.updated_at) for emp in test_db.query(Pegawai)} == before
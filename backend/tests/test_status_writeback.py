@@ -0,0 +1,98 @@
+from hypothesis import given, strategies as st, settings
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.comparator import EmployeeComparator
+from app.services.month_utils import get_period_frame
+from app.services.status_writeback import write_back_statuses
+
+
+# Context manager for creating test database
+@contextmanager
+def get_test_db():
+    """Create a test database session."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    TestSessionLocal = sessionmaker(bind=engine)
+    db = TestSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def add_employee(db, nip, account, month, status='Aktif', manual_override=0):
+    db.add(Pegawai(
+        nip=f"N{nip}",
+        nama=f"Pegawai {nip}",
+        nik='1234567890123456',
+        npwp='123456789012345',
+        tgl_lahir=date(1980, 1, 1),
+        kode_bank='114',
+        nama_bank='BCA',
+        nomor_rekening=account,
+        status=status,
+        manual_override=manual_override,
+        unit="Dinas",
+        month=month,
+        year=2024
+    ))
+
+
+accounts = st.dictionaries(st.integers(min_value=1, max_value=30), st.sampled_from(["111", "222"]), max_size=20)
+
+
+# Feature: employee-data-comparison, Property 39: Set-based status write-back
+# Validates: Requirements 3.1, 3.2, 3.3, 6.4
+@given(previous=accounts, current=accounts, overrides=st.sets(st.integers(min_value=1, max_value=30)))
+@settings(max_examples=50, deadline=None)
+def test_property_write_back_stores_comparison(previous, current, overrides):
+    """
+    For any two months, the write-back should give every current row without a
+    manual override its comparison status, leave overridden rows alone and add
+    each departed employee once as 'Keluar' with the previous month's data.
+    """
+    with get_test_db() as test_db:
+        for nip, account in previous.items():
+            add_employee(test_db, nip, account, 4)
+        for nip, account in current.items():
+            if nip in overrides:
+                add_employee(test_db, nip, account, 5, status='Pensiun', manual_override=1)
+            else:
+                add_employee(test_db, nip, account, 5)
+        # A departed employee already recorded by hand for May
+        manual_departed = sorted(set(previous) - set(current))[:1]
+        for nip in manual_departed:
+            add_employee(test_db, nip, previous[nip], 5, status='Pindah', manual_override=1)
+        test_db.commit()
+
+        result = EmployeeComparator.compare_frames(
+            get_period_frame(test_db, 5, 2024, "Dinas"),
+            get_period_frame(test_db, 4, 2024, "Dinas")
+        )
+        counts = write_back_statuses(test_db, result, "Dinas", 5, 2024, 4, 2024)
+        test_db.commit()
+
+        expected = {}
+        for nip, account in current.items():
+            if nip in overrides:
+                expected[f"N{nip}"] = ('Pensiun', account)
+            elif nip not in previous:
+                expected[f"N{nip}"] = ('Masuk', account)
+            elif previous[nip] != account:
+                expected[f"N{nip}"] = ('Rekening Berbeda', account)
+            else:
+                expected[f"N{nip}"] = ('Aktif', account)
+        for nip in set(previous) - set(current):
+            expected[f"N{nip}"] = ('Pindah' if nip in manual_departed else 'Keluar', previous[nip])
+
+        rows = test_db.query(Pegawai).filter(Pegawai.month == 5).all()
+        assert len(rows) == len(expected)
+        assert {emp.nip: (emp.status, emp.nomor_rekening) for emp in rows} == expected
+        assert counts['departed'] == len(set(previous) - set(current)) - len(manual_departed)
+        assert counts['updated'] == sum(
+            1 for nip in current if nip not in overrides and expected[f"N{nip}"][0] != 'Aktif'
+        )
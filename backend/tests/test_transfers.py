@@ -0,0 +1,192 @@
+import io
+from hypothesis import given, strategies as st, settings
+from datetime import date
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
+from app.models.pegawai import Pegawai
+from app.database import Base
+from app.services.batch_compare import compare_unit, ENGINE_COLUMNAR, ENGINE_DATABASE
+from app.services.transfers import detect_transfers
+from app.services.upload_pipeline import ingest_upload, MODE_DELTA, MODE_UPSERT
+
+UNITS = ["Dinas", "Cabdis Wil. 2", "Cabdis Wil. 4"]
+
+
+# Context manager for creating test database
+@contextmanager
+def get_test_db():
+    """Create a test database session."""
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    TestSessionLocal = sessionmaker(bind=engine)
+    db = TestSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def add_employee(db, nip, unit, month):
+    db.add(Pegawai(
+        nip=f"N{nip}",
+        nama=f"Pegawai {nip}",
+        nik='1234567890123456',
+        npwp='123456789012345',
+        tgl_lahir=date(1980, 1, 1),
+        kode_bank='114',
+        nama_bank='BCA',
+        nomor_rekening='111',
+        status='Aktif',
+        unit=unit,
+        month=month,
+        year=2024
+    ))
+
+
+unit_or_none = st.one_of(st.none(), st.sampled_from(UNITS))
+
+
+# Feature: employee-data-comparison, Property 42: Cross-unit transfers are classified as Pindah
+# Validates: Requirements 3.1, 3.2
+@given(
+    placements=st.dictionaries(st.integers(min_value=1, max_value=20), st.tuples(unit_or_none, unit_or_none), max_size=15),
+    recompare=st.sampled_from(UNITS)
+)
+@settings(max_examples=40, deadline=None)
+def test_property_transfers_are_pindah_on_both_sides(placements, recompare):
+    """
+    For any employees moving between units from one month to the next, after
+    every unit is compared both the arrival row and the departed row should
+    be Pindah, other joiners and leavers keep Masuk and Keluar, and comparing
+    a unit again keeps the arrivals in that unit as transfers.
+    """
+    with get_test_db() as test_db:
+        for nip, (previous_unit, current_unit) in placements.items():
+            if previous_unit:
+                add_employee(test_db, nip, previous_unit, 4)
+            if current_unit:
+                add_employee(test_db, nip, current_unit, 5)
+        test_db.commit()
+
+        compared = [unit for unit in UNITS if any(current == unit for _, current in placements.values())]
+        for unit in compared:
+            compare_unit(test_db, unit, 5, 2024)
+
+        def expected_statuses():
+            expected = {}
+            for nip, (previous_unit, current_unit) in placements.items():
+                # The departed row only exists once the unit left behind was compared
+                moved = previous_unit in compared and current_unit and previous_unit != current_unit
+                if current_unit:
+                    expected[(f"N{nip}", current_unit)] = (
+                        'Pindah' if moved else 'Aktif' if previous_unit == current_unit else 'Masuk'
+                    )
+                if previous_unit and previous_unit != current_unit and previous_unit in compared:
+                    expected[(f"N{nip}", previous_unit)] = 'Pindah' if moved else 'Keluar'
+            return expected
+
+        def stored_statuses():
+            return {(emp.nip, emp.unit): emp.status for emp in test_db.query(Pegawai).filter(Pegawai.month == 5)}
+
+        assert stored_statuses() == expected_statuses()
+
+        if recompare in compared:
+            compare_unit(test_db, recompare, 5, 2024)
+            statuses = stored_statuses()
+            for nip, (previous_unit, current_unit) in placements.items():
+                if current_unit == recompare and previous_unit in compared and previous_unit != current_unit:
+                    assert statuses[(f"N{nip}", current_unit)] == 'Pindah'
+
+        assert detect_transfers(test_db, 5, 2024) == []
+
+
+def make_upload(nips, action=None):
+    """Upload CSV of the given NIPs; with an action, a delta file (Aksi column)."""
+    header = "NIP,Nama,NIK,NPWP,Tanggal Lahir,Kode Bank,Nama Bank,Nomor Rekening"
+    lines = [header + (",Aksi" if action else "")]
+    for nip in sorted(nips):
+        line = f"N{nip},Pegawai {nip},1234567890123456,123456789012345,1980-01-01,114,BCA,222"
+        lines.append(line + (f",{action}" if action else ""))
+    return io.BytesIO("\n".join(lines).encode('utf-8'))
+
+
+# Feature: employee-data-comparison, Property 48: Transfer arrivals stay on the roster
+# Validates: Requirements 1.3, 3.1, 5.1
+@given(
+    stayed=st.sets(st.integers(min_value=1, max_value=10), min_size=1, max_size=6),
+    moved=st.sets(st.integers(min_value=11, max_value=20), min_size=1, max_size=4)
+)
+@settings(max_examples=20, deadline=None)
+def test_property_transfer_arrivals_stay_on_the_roster(stayed, moved):
+    """
+    For any employees transferred from one unit to another, once both units
+    are compared the arrival rows (Pindah) should still be the receiving
+    unit's roster: a delta for the next month edits and carries them, an
+    upsert missing them deletes them, while the departure rows left behind
+    are kept and never carried over.
+    """
+    with get_test_db() as test_db:
+        for nip in stayed | moved:
+            add_employee(test_db, nip, "Cabdis Wil. 2", 4)
+        for nip in stayed:
+            add_employee(test_db, nip, "Cabdis Wil. 2", 5)
+        for nip in moved:
+            add_employee(test_db, nip, "Cabdis Wil. 4", 5)
+        test_db.commit()
+        compare_unit(test_db, "Cabdis Wil. 2", 5, 2024)
+        compare_unit(test_db, "Cabdis Wil. 4", 5, 2024)
+
+        def period(unit, month):
+            return {
+                emp.nip: emp.status
+                for emp in test_db.query(Pegawai).filter(Pegawai.unit == unit, Pegawai.month == month)
+            }
+
+        assert period("Cabdis Wil. 4", 5) == {f"N{nip}": 'Pindah' for nip in moved}
+
+        ingest_upload(test_db, MODE_DELTA, make_upload(moved, 'UBAH'), "delta.csv", "Cabdis Wil. 4", 6, 2024)
+        assert period("Cabdis Wil. 4", 6) == {f"N{nip}": 'Aktif' for nip in moved}
+
+        ingest_upload(test_db, MODE_DELTA, make_upload({30}, 'TAMBAH'), "delta.csv", "Cabdis Wil. 2", 6, 2024)
+        assert period("Cabdis Wil. 2", 6) == {f"N{nip}": 'Aktif' for nip in stayed | {30}}
+
+        ingest_upload(test_db, MODE_UPSERT, make_upload(stayed), "data.csv", "Cabdis Wil. 2", 5, 2024)
+        assert period("Cabdis Wil. 2", 5) == {
+            **{f"N{nip}": 'Aktif' for nip in stayed}, **{f"N{nip}": 'Pindah' for nip in moved}
+        }
+
+        ingest_upload(test_db, MODE_UPSERT, make_upload({30}), "data.csv", "Cabdis Wil. 4", 5, 2024)
+        assert period("Cabdis Wil. 4", 5) == {"N30": 'Aktif'}
+
+
+# Feature: employee-data-comparison, Property 49: Recomparing keeps departed and transfer rows
+# Validates: Requirements 3.1, 3.2, 3.3
+@given(
+    placements=st.dictionaries(st.integers(min_value=1, max_value=20), st.tuples(unit_or_none, unit_or_none), max_size=15),
+    engine=st.sampled_from([ENGINE_COLUMNAR, ENGINE_DATABASE]),
+    order=st.permutations(UNITS)
+)
+@settings(max_examples=30, deadline=None)
+def test_property_recompare_keeps_departed_rows(placements, engine, order):
+    """
+    For any employees leaving or moving between units, comparing every unit
+    again (in any order) should leave the Keluar and Pindah rows and every
+    unit's counts as the first comparisons stored them.
+    """
+    with get_test_db() as test_db:
+        for nip, (previous_unit, current_unit) in placements.items():
+            if previous_unit:
+                add_employee(test_db, nip, previous_unit, 4)
+            if current_unit:
+                add_employee(test_db, nip, current_unit, 5)
+        test_db.commit()
+
+        compared = [unit for unit in UNITS if any(current == unit for _, current in placements.values())]
+        summaries = {unit: compare_unit(test_db, unit, 5, 2024, engine).summary for unit in compared}
+        stored = {(emp.nip, emp.unit): emp.status for emp in test_db.query(Pegawai).filter(Pegawai.month == 5)}
+
+        for unit in order:
+            if unit in compared:
+                assert compare_unit(test_db, unit, 5, 2024, engine).summary == summaries[unit]
+        assert {(emp.nip, emp.unit): emp.status for emp in test_db.query(Pegawai).filter(Pegawai.month == 5)} == stored
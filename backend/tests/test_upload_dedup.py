@@ -0,0 +1,54 @@
+import io
+from hypothesis import given, strategies as st, settings
+from app.services.excel_parser import ExcelParser
+from app.services.upload_dedup import RowHasher, copy_and_hash
+import hashlib
+
+
+def make_csv(nips, padding=""):
+    """Build an upload CSV with one valid row per NIP, optionally padding every value."""
+    lines = ["NIP,Nama,NIK,NPWP,Tanggal Lahir,Kode Bank,Nama Bank,Nomor Rekening"]
+    for i, nip in enumerate(nips):
+        values = [nip, f"Employee {i}", '1234567890123456', '123456789012345',
+                  '1990-01-01', '114', 'BCA', str(1000 + i)]
+        lines.append(",".join(f"{padding}{value}{padding}" for value in values))
+    return "\n".join(lines).encode('utf-8')
+
+
+def rows_hash(content, batch_size):
+    hasher = RowHasher()
+    for batch in ExcelParser.iter_batches(io.BytesIO(content), "data.csv", batch_size):
+        hasher.update(batch)
+    return hasher.hexdigest()
+
+
+# Feature: employee-data-comparison, Property 30: Upload fingerprint stability
+# Validates: Requirements 1.3
+@given(
+    nips=st.lists(st.integers(min_value=1, max_value=10**6), min_size=1, max_size=40, unique=True),
+    batch_size=st.integers(min_value=1, max_value=50)
+)
+@settings(max_examples=30, deadline=None)
+def test_property_rows_hash_ignores_batching_and_padding(nips, batch_size):
+    """
+    For any file, the normalized-row hash should not depend on how the file is batched
+    or on surrounding whitespace, but should change when the row order changes.
+    """
+    labels = [f"N{nip}" for nip in nips]
+    content = make_csv(labels)
+
+    expected = rows_hash(content, len(labels))
+    assert rows_hash(content, batch_size) == expected
+    assert rows_hash(make_csv(labels, padding=" "), batch_size) == expected
+    if len(labels) > 1:
+        assert rows_hash(make_csv(labels[::-1]), batch_size) != expected
+
+
+def test_copy_and_hash_copies_bytes():
+    content = make_csv(["A", "B"]) * 500
+    target = io.BytesIO()
+
+    digest = copy_and_hash(io.BytesIO(content), target)
+
+    assert target.getvalue() == content
+    assert digest == hashlib.sha256(content).hexdigest()
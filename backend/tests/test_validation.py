@@ -6,8 +6,62 @@ from app.services.validation import (
     validate_tanggal_lahir,
     validate_kode_bank,
     validate_employee_data,
-    check_duplicate_nip
+    validate_employee_frame,
+    format_row_errors,
+    check_duplicate_nip,
+    DuplicateNipTracker
 )
+import pandas as pd
+
+
+def _row_errors(employee):
+    """
+    Per-row validation as it was before validate_employee_frame, kept as an
+    independent oracle for the column-wise engine.
+    """
+    errors = []
+    
+    nip = employee.get('NIP')
+    if not nip:
+        errors.append("NIP is required")
+    elif not validate_nip(str(nip)):
+        errors.append("NIP must be non-empty and alphanumeric")
+    
+    nama = employee.get('Nama')
+    if not nama or (isinstance(nama, str) and not nama.strip()):
+        errors.append("Nama is required")
+    
+    nik = employee.get('NIK')
+    if not nik or (isinstance(nik, str) and not str(nik).strip()):
+        errors.append("NIK is required")
+    
+    npwp = employee.get('NPWP')
+    if not npwp or (isinstance(npwp, str) and not str(npwp).strip()):
+        errors.append("NPWP is required")
+    
+    tgl_lahir = employee.get('Tanggal Lahir')
+    if not tgl_lahir:
+        errors.append("Tanggal Lahir is required")
+    elif not validate_tanggal_lahir(str(tgl_lahir)):
+        errors.append("Tanggal Lahir must be in valid date format (YYYY-MM-DD, DD/MM/YYYY, or DD-MM-YYYY)")
+    
+    kode_bank = employee.get('Kode Bank')
+    if not kode_bank:
+        errors.append("Kode Bank is required")
+    elif not validate_kode_bank(str(kode_bank)):
+        errors.append("Kode Bank must be exactly 3 characters")
+    
+    nama_bank = employee.get('Nama Bank')
+    if not nama_bank or (isinstance(nama_bank, str) and not nama_bank.strip()):
+        errors.append("Nama Bank is required")
+    
+    nomor_rekening = employee.get('Nomor Rekening')
+    if not nomor_rekening:
+        errors.append("Nomor Rekening is required")
+    elif not validate_nomor_rekening(str(nomor_rekening)):
+        errors.append("Nomor Rekening must be non-empty and numeric")
+    
+    return errors
 
 
 # Feature: employee-data-comparison, Property 4: Duplicate NIP rejection
@@ -175,3 +229,64 @@ def test_property_validation_failure_handling(
     for error in errors:
         assert isinstance(error, str), "Error messages should be strings"
         assert len(error) > 0, "Error messages should not be empty"
+
+
+# Feature: employee-data-comparison, Property 25: Validation failure handling (column-wise)
+# Validates: Requirements 8.5
+@given(
+    employees=st.lists(
+        st.fixed_dictionaries({
+            'NIP': st.sampled_from(['ABC123', '', None, '  ', 'AB-12', 196801012000]),
+            'Nama': st.sampled_from(['Test Employee', '', '   ', None]),
+            'NIK': st.sampled_from(['1234567890123456', '', None, 0]),
+            'NPWP': st.sampled_from(['123456789012345', '', None]),
+            'Tanggal Lahir': st.sampled_from(['1990-01-01', '31/12/1990', '31-12-1990', '1990/12/31', '1990-13-01', 'invalid', '', None]),
+            'Kode Bank': st.sampled_from(['014', ' 014 ', '12', '1234', '', None]),
+            'Nama Bank': st.sampled_from(['BCA', '', None]),
+            'Nomor Rekening': st.sampled_from(['1234567890', ' 1234567890 ', 'ABC', '12-34', '', None])
+        }),
+        min_size=1,
+        max_size=20
+    )
+)
+@settings(max_examples=100, deadline=None)
+def test_property_frame_validation_matches_row_validation(employees):
+    """
+    Validating a whole DataFrame at once should report exactly the same messages,
+    in the same order, as the original per-row validation of every row.
+    """
+    # Batches from ExcelParser hold the cell values as they are (object dtype)
+    errors = validate_employee_frame(pd.DataFrame(employees, dtype=object))
+    
+    for idx, employee in enumerate(employees):
+        expected = _row_errors(employee)
+        actual = errors.loc[errors['row'] == idx, 'message'].tolist()
+        assert actual == expected, f"Row {idx}: expected {expected}, got {actual}"
+        assert validate_employee_data(employee) == expected, f"Row {idx}: per-row wrapper differs"
+    
+    # Formatted rows use 1-based numbering, one entry per invalid row
+    formatted = format_row_errors(errors, row_offset=1)
+    invalid_rows = [idx for idx, emp in enumerate(employees) if _row_errors(emp)]
+    assert [line.split(':')[0] for line in formatted] == [f"Row {idx + 1}" for idx in invalid_rows]
+
+
+# Feature: employee-data-comparison, Property 4: Duplicate NIP rejection (streaming)
+# Validates: Requirements 1.4
+@given(
+    nips=st.lists(st.sampled_from(['A1', 'B2', 'C3', ' A1 ', 'D4', '', None, 'E5', 'F6']), min_size=1, max_size=40),
+    batch_size=st.integers(min_value=1, max_value=10)
+)
+@settings(max_examples=100, deadline=None)
+def test_property_streaming_duplicate_nip_detection(nips, batch_size):
+    """
+    Checking NIPs batch by batch should find exactly the duplicates, with the same
+    row positions, as checking the whole upload at once.
+    """
+    tracker = DuplicateNipTracker()
+    for start in range(0, len(nips), batch_size):
+        batch = nips[start:start + batch_size]
+        tracker.add(pd.Series(batch, index=range(start, start + len(batch)), dtype=object))
+    
+    expected = check_duplicate_nip([{'NIP': nip} for nip in nips], 1, 2024)
+    
+    assert tracker.duplicates == expected
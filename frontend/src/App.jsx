@@ -180,7 +180,9 @@ function AppContent() {
     localStorage.setItem("uploadedUnit", result.unit);
 
     showNotification(
-      `Berhasil upload ${result.records_processed} records untuk ${result.unit}`,
+      result.unchanged
+        ? `Tidak ada perubahan: data ${result.unit} sama dengan upload sebelumnya`
+        : `Berhasil upload ${result.records_processed} records untuk ${result.unit}`,
       "success"
     );
 
@@ -26,29 +26,102 @@ apiClient.interceptors.request.use(
   }
 );
 
+// Interval between upload job status checks
+const UPLOAD_POLL_INTERVAL_MS = 1000;
+
+// Files larger than this are sent in resumable chunks
+const CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024;
+
+// Attempts per chunk before a chunked upload gives up
+const CHUNK_RETRIES = 5;
+
+// Time allowed for one chunk on a slow link
+const CHUNK_TIMEOUT_MS = 120000;
+
 /**
- * Upload Excel file with employee data
+ * Send a file through a resumable upload session: the file is sent in chunks,
+ * and after a failed chunk the upload resumes from the bytes the server has.
+ * @param {File} file - File to send
+ * @param {Object} fields - month, year, and unit (omit unit for a workbook)
+ * @returns {Promise} The finalize response, same as POST /upload or /upload/workbook
+ */
+async function uploadInChunks(file, fields) {
+  const formData = new FormData();
+  formData.append("filename", file.name);
+  formData.append("size", file.size);
+  Object.entries(fields).forEach(([key, value]) => formData.append(key, value));
+
+  const created = await apiClient.post("/upload/sessions", formData, {
+    headers: {
+      "Content-Type": "multipart/form-data",
+    },
+  });
+  const session = created.data;
+
+  let offset = 0;
+  let failures = 0;
+  while (offset < file.size) {
+    try {
+      const response = await apiClient.put(
+        `/upload/sessions/${session.id}`,
+        file.slice(offset, offset + session.chunk_size),
+        {
+          params: { offset },
+          headers: { "Content-Type": "application/octet-stream" },
+          timeout: CHUNK_TIMEOUT_MS,
+        }
+      );
+      offset = response.data.offset;
+      failures = 0;
+    } catch (error) {
+      failures += 1;
+      const status = error.response && error.response.status;
+      if (failures > CHUNK_RETRIES || (status && status !== 409 && status < 500)) {
+        throw error;
+      }
+      await new Promise((resolve) => setTimeout(resolve, failures * UPLOAD_POLL_INTERVAL_MS));
+      // Continue from what the server actually received
+      const current = await apiClient.get(`/upload/sessions/${session.id}`);
+      offset = current.data.offset;
+    }
+  }
+
+  const finalized = await apiClient.post(`/upload/sessions/${session.id}/finalize`);
+  return finalized.data;
+}
+
+/**
+ * Upload Excel file with employee data.
+ * The server processes uploads as background jobs; this waits for the job
+ * to finish so callers receive the final result.
  * @param {File} file - Excel file (.xlsx or .csv)
  * @param {number} month - Month number (1-12)
  * @param {number} year - Year number
  * @param {string} unit - Unit kerja
+ * @param {Function} onProgress - Optional callback receiving the job status while it runs
  * @returns {Promise} Response with upload status and record count
  */
-export async function uploadFile(file, month, year, unit) {
+export async function uploadFile(file, month, year, unit, onProgress) {
   try {
-    const formData = new FormData();
-    formData.append("file", file);
-    formData.append("month", month);
-    formData.append("year", year);
-    formData.append("unit", unit);
+    let accepted;
+    if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+      accepted = await uploadInChunks(file, { month, year, unit });
+    } else {
+      const formData = new FormData();
+      formData.append("file", file);
+      formData.append("month", month);
+      formData.append("year", year);
+      formData.append("unit", unit);
 
-    const response = await apiClient.post("/upload", formData, {
-      headers: {
-        "Content-Type": "multipart/form-data",
-      },
-    });
+      const response = await apiClient.post("/upload", formData, {
+        headers: {
+          "Content-Type": "multipart/form-data",
+        },
+      });
+      accepted = response.data;
+    }
 
-    return response.data;
+    return await waitForUploadJob(accepted.job_id, onProgress);
   } catch (error) {
     // Transform error for better handling
     if (error.response) {
@@ -62,12 +135,87 @@ export async function uploadFile(file, month, year, unit) {
       // Request made but no response
       throw new Error("No response from server. Please check your connection.");
     } else {
-      // Error setting up request
+      // Error setting up request, or the upload job failed
+      throw new Error(error.message || "Failed to upload file");
+    }
+  }
+}
+
+/**
+ * Upload one workbook with a sheet per unit, or a zip of per-unit files
+ * @param {File} file - Workbook (.xlsx) or archive (.zip)
+ * @param {number} month - Month number (1-12)
+ * @param {number} year - Year number
+ * @param {Function} onProgress - Optional callback receiving the job status while it runs
+ * @returns {Promise} Result with a per-unit report
+ */
+export async function uploadWorkbook(file, month, year, onProgress) {
+  try {
+    let accepted;
+    if (file.size > CHUNKED_UPLOAD_THRESHOLD) {
+      accepted = await uploadInChunks(file, { month, year });
+    } else {
+      const formData = new FormData();
+      formData.append("file", file);
+      formData.append("month", month);
+      formData.append("year", year);
+
+      const response = await apiClient.post("/upload/workbook", formData, {
+        headers: {
+          "Content-Type": "multipart/form-data",
+        },
+      });
+      accepted = response.data;
+    }
+
+    return await waitForUploadJob(accepted.job_id, onProgress);
+  } catch (error) {
+    if (error.response) {
+      throw new Error(
+        error.response.data.detail ||
+          error.response.data.message ||
+          "Upload failed"
+      );
+    } else if (error.request) {
+      throw new Error("No response from server. Please check your connection.");
+    } else {
       throw new Error(error.message || "Failed to upload file");
     }
   }
 }
 
+/**
+ * Poll an upload job until it completes
+ * @param {string} jobId - Job id returned by POST /upload or /upload/workbook
+ * @param {Function} onProgress - Optional callback receiving the job status
+ * @returns {Promise} The job result; rejects with the job errors if it failed
+ */
+async function waitForUploadJob(jobId, onProgress) {
+  for (;;) {
+    const job = await getUploadJob(jobId);
+    if (onProgress) {
+      onProgress(job);
+    }
+    if (job.phase === "completed") {
+      return job.result;
+    }
+    if (job.phase === "failed") {
+      throw new Error(job.errors.join("; ") || "Upload failed");
+    }
+    await new Promise((resolve) => setTimeout(resolve, UPLOAD_POLL_INTERVAL_MS));
+  }
+}
+
+/**
+ * Get the status of an upload job
+ * @param {string} jobId - Job id returned by POST /upload
+ * @returns {Promise} Job phase, rows processed, errors, timings and result
+ */
+export async function getUploadJob(jobId) {
+  const response = await apiClient.get(`/upload/jobs/${jobId}`);
+  return response.data;
+}
+
 /**
  * Get comparison results for a specific month/year/unit
  * @param {number} month - Month number (1-12)
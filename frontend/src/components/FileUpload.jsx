@@ -99,7 +99,9 @@ function FileUpload({ onUploadSuccess, onUploadError }) {
       const result = await uploadFile(file, month, year, unit);
       setMessage({
         type: "success",
-        text: `Successfully uploaded ${result.records_processed} records for ${unit} ${month}/${year}`,
+        text: result.unchanged
+          ? result.message
+          : `Successfully uploaded ${result.records_processed} records for ${unit} ${month}/${year}`,
       });
 
       // Clear file input